@@ -1,25 +1,48 @@
 from flask import Flask
-from app.db import get_db, close_db
-from app.routes import auth, complaints, main, other
+from app.db import close_db, init_db
+from app.db.queries.other import load_reference_data
+from app.routes import auth, complaints, geo, images, main, other
+from app.utils.cache import TTLCache
+from app.utils.ratelimit import FailureLimiter
+from app.utils import analytics, cache, jsonprovider, metrics, passwords, sse, uploads
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__, instance_relative_config=True)
     app.config.from_object("app.config.Config")
+    if config:
+        app.config.update(config)
 
     app.secret_key = app.config["SECRET_KEY"]
 
     app.teardown_appcontext(close_db)
+    metrics.init_app(app)
+    jsonprovider.init_app(app)
+    cache.init_app(app)
+
+    app.extensions["principal_cache"] = TTLCache(
+        maxsize=app.config["PRINCIPAL_CACHE_SIZE"],
+        ttl=app.config["PRINCIPAL_CACHE_TTL"],
+    )
+    passwords.init_app(app)
+    uploads.init_app(app)
+    sse.init_app(app)
+    analytics.init_app(app)
+    app.extensions["login_limiter"] = FailureLimiter(
+        limit=app.config["LOGIN_FAILURE_LIMIT"],
+        window=app.config["LOGIN_FAILURE_WINDOW"],
+    )
     
     # Register blueprints
     app.register_blueprint(auth.auth_bp)
     app.register_blueprint(complaints.complaints_bp)
+    app.register_blueprint(geo.geo_bp)
+    app.register_blueprint(images.images_bp)
     app.register_blueprint(main.main_bp)
     app.register_blueprint(other.other_bp)
     
-    # Initialize DB with schema
+    # Check the schema version (applying pending migrations if allowed)
     with app.app_context():
-        db = get_db()
-        with open("app/db/schema.sql") as f:
-            db.executescript(f.read())
+        init_db()
+        load_reference_data()
 
     return app
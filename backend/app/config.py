@@ -1,4 +1,152 @@
+import os
+
+
 class Config:
-    DEBUG = True
+    DEBUG = os.environ.get("FLASK_DEBUG", "1") == "1"
     DATABASE = "instance/complaints.db"
+    # Storage: "sqlite" (DATABASE above) or "postgres" (DATABASE_URL, needs
+    # psycopg: `uv sync --extra postgres`). `manage.py copy-to-postgres`
+    # moves an existing SQLite database over.
+    DB_BACKEND = os.environ.get("DB_BACKEND", "sqlite")
+    DATABASE_URL = os.environ.get("DATABASE_URL", "postgresql://civic@localhost/civic")
     SECRET_KEY = "he$e923i"
+
+    # Connection pool (per process)
+    DB_POOL_SIZE = 8
+    DB_POOL_TIMEOUT = 5.0  # seconds to wait for a free connection
+    # Applied once to every new SQLite connection
+    DB_PRAGMAS = {
+        "busy_timeout": 5000,  # ms
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,  # KiB (negative) => ~16 MB page cache
+        "mmap_size": 134217728,  # 128 MB
+    }
+    # Apply pending migrations at startup; with "0" the app refuses to start
+    # on an outdated schema and `manage.py migrate` has to be run first
+    DB_AUTO_MIGRATE = os.environ.get("DB_AUTO_MIGRATE", "1") == "1"
+    # Read-only replicas: copies of DATABASE made while it is in use by
+    # `manage.py backup` (run with `--every` to keep them fresh). Reads that
+    # opt in (exports, analytics) use one at most DB_REPLICA_MAX_LAG seconds
+    # behind, and the database itself when there is none
+    DB_REPLICAS = [path for path in os.environ.get("DB_REPLICAS", "").split(",") if path]
+    DB_REPLICA_MAX_LAG = float(os.environ.get("DB_REPLICA_MAX_LAG", 30))  # seconds
+    # Pages copied per backup step; -1 copies one snapshot in a single step,
+    # which blocks no writer in WAL mode. Smaller steps let checkpoints run
+    # in between, but any commit from elsewhere starts the copy over
+    DB_BACKUP_PAGES = -1
+
+    # Per-statement timings/row counts, exported at /api/metrics
+    DB_INSTRUMENTATION = True
+    SLOW_QUERY_MS = 100  # log statements slower than this with their query plan
+    # /api/metrics exposes route names, request rates, pool and replica
+    # state and slow statement counts, so it is not public: it takes an
+    # admin's token or, for scrapers, "Authorization: Bearer <METRICS_TOKEN>"
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN") or None
+
+    # Resolved users for authenticated requests, keyed by user id
+    PRINCIPAL_CACHE_SIZE = 4096
+    PRINCIPAL_CACHE_TTL = 60  # seconds
+
+    # Cache for computed results (stats, complaint details): "local" keeps it
+    # per process, "redis" shares it between all workers and replicas through
+    # a Redis protocol server at CACHE_URL (`manage.py cache-server` runs a
+    # small stand-in). Entries are invalidated by the writes that change them
+    # and expire after CACHE_TTL seconds regardless.
+    CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "local")
+    CACHE_URL = os.environ.get("CACHE_URL", "redis://127.0.0.1:6379/0")
+    CACHE_PREFIX = "civic"
+    CACHE_TTL = 300  # seconds
+    CACHE_LOCK_TIMEOUT = 5.0  # seconds to wait for another worker computing the same key
+    CACHE_LOCAL_SIZE = 10000  # entries, "local" backend
+    # "local" entries only see writes made by their own process, so they are
+    # kept briefly: this bounds how stale other workers can be
+    CACHE_LOCAL_TTL = 5  # seconds
+    CACHE_POOL_SIZE = 8  # idle connections kept per process, "redis" backend
+    CACHE_SOCKET_TIMEOUT = 0.5  # seconds
+
+    # Password hashing (werkzeug method string; "pbkdf2:sha256:600000" also
+    # works). Stored hashes made with other parameters are upgraded on login.
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 2))  # hashing processes per worker, 0 => hash inline
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", 8))  # queued + running, beyond that 429
+    PASSWORD_HASH_TIMEOUT = 10.0  # seconds
+    PASSWORD_HASH_NICE = 10  # niceness added to hashing processes, 0 => same priority
+    # Failed logins per email before further attempts get 429 (per process)
+    LOGIN_FAILURE_LIMIT = 5
+    LOGIN_FAILURE_WINDOW = 300  # seconds
+
+    # Possible duplicates offered when a complaint is created: open complaints
+    # of the same category from the last DUPLICATE_WINDOW_DAYS whose text is at
+    # least DUPLICATE_THRESHOLD similar (estimated Jaccard of their words) and,
+    # when both have coordinates, that lie within DUPLICATE_RADIUS_M
+    DUPLICATE_WINDOW_DAYS = 30
+    DUPLICATE_THRESHOLD = 0.4
+    DUPLICATE_RADIUS_M = 500
+    DUPLICATE_LIMIT = 5
+
+    # Uploaded photos (POST /api/images/upload), stored once per content
+    # hash; resized variants are made by IMAGE_WORKERS Pillow processes per
+    # server worker (optional dependency: `uv sync --extra images`)
+    UPLOAD_FOLDER = os.environ.get("UPLOAD_FOLDER", "instance/uploads")
+    UPLOAD_MAX_BYTES = 20 * 1024 * 1024
+    IMAGE_VARIANTS = {"thumbnail": 320, "medium": 1280}  # name -> longest side in pixels
+    IMAGE_QUALITY = 82  # JPEG quality of the variants
+    IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", 2))  # 0 => resize in the request thread
+    IMAGE_WORKER_NICE = 10
+    IMAGE_MAX_AGE = 31536000  # Cache-Control max-age for images; URLs change with the content
+
+    # Live feed of complaint changes (GET /api/complaints/events, Server-Sent
+    # Events). Each worker runs one hub thread that reads complaint_events
+    # every SSE_POLL_INTERVAL seconds (at once after a change made in the same
+    # worker) and hands new events to every open stream.
+    SSE_POLL_INTERVAL = 1.0  # seconds
+    SSE_HEARTBEAT = 15  # seconds between keep-alive comments on an idle stream
+    SSE_RETRY = 3000  # milliseconds browsers wait before reconnecting
+    SSE_BUFFER = 4096  # recent events kept in memory per worker for streams to catch up from
+    SSE_BACKLOG_LIMIT = 500  # events per query when replaying from Last-Event-ID
+    # open streams per worker; 0 => half of SERVER_THREADS on gthread workers,
+    # where every stream holds a thread, and unlimited otherwise
+    SSE_MAX_STREAMS = int(os.environ.get("SSE_MAX_STREAMS", 0))
+    EVENT_RETENTION_DAYS = 7  # older events are pruned; resuming from before them gets a reset
+
+    # Reports for the operations dashboards (GET /api/other/analytics/*, needs
+    # NumPy): each worker keeps a columnar snapshot of the complaints, about 27
+    # bytes per complaint, and tops it up with new and changed complaints when
+    # it is more than ANALYTICS_REFRESH_INTERVAL seconds old
+    ANALYTICS_REFRESH_INTERVAL = 30
+    ANALYTICS_BATCH_SIZE = 50000  # rows per query while loading
+
+    # `manage.py archive` moves Resolved/Rejected complaints not changed for
+    # ARCHIVE_AFTER_DAYS to complaints_archive, ARCHIVE_BATCH_SIZE per
+    # transaction; lookups and search reach them with ?archived=1
+    ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", 180))
+    ARCHIVE_BATCH_SIZE = 500
+
+    # JSON responses: "orjson" (optional dependency), "default" (standard
+    # library) or "auto" for orjson when it is installed
+    JSON_PROVIDER = os.environ.get("JSON_PROVIDER", "auto")
+    JSON_COMPACT = None  # None => pretty-printed in debug mode only (Flask's default)
+
+    # Categories/statuses served from memory
+    REFERENCE_DATA_TTL = 300  # seconds before a worker reloads them
+    REFERENCE_DATA_MAX_AGE = 300  # Cache-Control max-age for the endpoints
+
+    # Serving: "development" runs Werkzeug's debug server, "production" a
+    # gunicorn pre-fork pool of SERVER_WORKERS processes x SERVER_THREADS threads
+    SERVER = os.environ.get("SERVER", "development")
+    SERVER_HOST = os.environ.get("SERVER_HOST", "127.0.0.1")
+    SERVER_PORT = int(os.environ.get("SERVER_PORT", 5000))
+    SERVER_WORKERS = int(os.environ.get("SERVER_WORKERS", 0))  # 0 => one per CPU core
+    SERVER_THREADS = int(os.environ.get("SERVER_THREADS", 4))
+    # "gthread", or "gevent" (optional dependency) for many open event
+    # streams: SERVER_WORKER_CONNECTIONS greenlets per worker instead of threads
+    SERVER_WORKER_CLASS = os.environ.get("SERVER_WORKER_CLASS", "gthread")
+    SERVER_WORKER_CONNECTIONS = int(os.environ.get("SERVER_WORKER_CONNECTIONS", 5000))
+    SERVER_TIMEOUT = int(os.environ.get("SERVER_TIMEOUT", 30))  # seconds per request
+    SERVER_GRACEFUL_TIMEOUT = int(os.environ.get("SERVER_GRACEFUL_TIMEOUT", 30))
+    SERVER_KEEPALIVE = int(os.environ.get("SERVER_KEEPALIVE", 5))  # seconds
+    SERVER_MAX_REQUESTS = int(os.environ.get("SERVER_MAX_REQUESTS", 10000))
+    SERVER_MAX_REQUESTS_JITTER = int(os.environ.get("SERVER_MAX_REQUESTS_JITTER", 1000))
+    SERVER_PRELOAD = os.environ.get("SERVER_PRELOAD", "0") == "1"  # preloading disables code reload on SIGHUP
+    SERVER_ACCESS_LOG = os.environ.get("SERVER_ACCESS_LOG")  # "-" for stdout
@@ -1,15 +1,305 @@
+import logging
+import os
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from queue import Empty, LifoQueue
 from flask import g, current_app
+from app.db import migrations
+from app.db.instrumentation import InstrumentedConnection
+from app.utils.geo import haversine_m
 
+logger = logging.getLogger(__name__)
 
-def get_db():
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Per-process pool of reusable SQLite connections.
+
+    Connections are opened lazily up to ``size`` and handed out to one
+    request at a time. Pragmas are applied once, when a connection is
+    opened. Writes go through a single dedicated writer connection guarded
+    by a lock, so commits from the same process never contend with each
+    other for the database write lock.
+    """
+
+    def __init__(
+        self, database, size=8, timeout=5.0, pragmas=None, instrument=False, slow_query_ms=None, uri=False
+    ):
+        self.database = database
+        self.uri = uri
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = pragmas or {}
+        self.instrument = instrument
+        self.slow_query_ms = slow_query_ms
+        self.pid = os.getpid()
+
+        self._idle = LifoQueue()
+        self._lock = threading.Lock()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+        self._created = 0
+        self._in_use = 0
+        self._acquired = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+        self._timeouts = 0
+        self._writer_acquired = 0
+        self._writer_wait_time = 0.0
+        self._writer_max_wait = 0.0
+
+    def connect(self, isolation_level=""):
+        busy_timeout = self.pragmas.get("busy_timeout", 5000) / 1000
+        conn = sqlite3.connect(
+            self.database,
+            timeout=busy_timeout,
+            isolation_level=isolation_level,
+            check_same_thread=False,
+            uri=self.uri,
+            factory=InstrumentedConnection if self.instrument else sqlite3.Connection,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.create_function("haversine", 4, haversine_m, deterministic=True)
+        if self.instrument:
+            conn.slow_query_ms = self.slow_query_ms
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def acquire(self):
+        start = time.perf_counter()
+        try:
+            conn = self._idle.get_nowait()
+        except Empty:
+            conn = None
+
+        if conn is None:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    conn = self.connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except Empty:
+                    with self._lock:
+                        self._timeouts += 1
+                    raise PoolTimeout(
+                        f"No database connection available after {self.timeout}s"
+                    )
+                waited = time.perf_counter() - start
+                with self._lock:
+                    self._waits += 1
+                    self._wait_time += waited
+                    self._max_wait = max(self._max_wait, waited)
+
+        with self._lock:
+            self._in_use += 1
+            self._acquired += 1
+        return conn
+
+    def release(self, conn):
+        with self._lock:
+            self._in_use -= 1
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def close_idle(self):
+        """Close the connections not checked out (of a replica file that has
+        been replaced)."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except Empty:
+                return
+            with self._lock:
+                self._created -= 1
+            conn.close()
+
+    @contextmanager
+    def writer(self):
+        start = time.perf_counter()
+        with self._writer_lock:
+            waited = time.perf_counter() - start
+            with self._lock:
+                self._writer_acquired += 1
+                self._writer_wait_time += waited
+                self._writer_max_wait = max(self._writer_max_wait, waited)
+            if self._writer is None:
+                # IMMEDIATE takes the write lock up front, so a writer in
+                # another process makes us wait on busy_timeout instead of
+                # failing half way through a transaction.
+                self._writer = self.connect(isolation_level="IMMEDIATE")
+            yield self._writer
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "open": self._created,
+                "in_use": self._in_use,
+                "idle": self._created - self._in_use,
+                "acquired": self._acquired,
+                "waits": self._waits,
+                "wait_time_ms": round(self._wait_time * 1000, 3),
+                "max_wait_ms": round(self._max_wait * 1000, 3),
+                "timeouts": self._timeouts,
+                "writer_acquired": self._writer_acquired,
+                "writer_wait_time_ms": round(self._writer_wait_time * 1000, 3),
+                "writer_max_wait_ms": round(self._writer_max_wait * 1000, 3),
+            }
+
+
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    pool = current_app.extensions.get("db_pool")
+    # a forked worker must not share sqlite handles with its parent
+    if pool is None or pool.pid != os.getpid():
+        with _pool_lock:
+            pool = current_app.extensions.get("db_pool")
+            if pool is None or pool.pid != os.getpid():
+                if current_app.config["DB_BACKEND"] == "postgres":
+                    from app.db.postgres import PostgresPool
+
+                    cls, database = PostgresPool, current_app.config["DATABASE_URL"]
+                else:
+                    cls, database = ConnectionPool, current_app.config["DATABASE"]
+                pool = cls(
+                    database,
+                    size=current_app.config["DB_POOL_SIZE"],
+                    timeout=current_app.config["DB_POOL_TIMEOUT"],
+                    pragmas=current_app.config["DB_PRAGMAS"],
+                    instrument=current_app.config["DB_INSTRUMENTATION"],
+                    slow_query_ms=current_app.config["SLOW_QUERY_MS"],
+                )
+                current_app.extensions["db_pool"] = pool
+    return pool
+
+
+def get_replicas():
+    """The process's ReplicaManager, or None without DB_REPLICAS (SQLite only)."""
+    config = current_app.config
+    if not config["DB_REPLICAS"] or config["DB_BACKEND"] != "sqlite":
+        return None
+    replicas = current_app.extensions.get("db_replicas")
+    if replicas is None or replicas.pid != os.getpid():
+        with _pool_lock:
+            replicas = current_app.extensions.get("db_replicas")
+            if replicas is None or replicas.pid != os.getpid():
+                from app.db.replica import ReplicaManager
+
+                replicas = ReplicaManager(
+                    config["DB_REPLICAS"],
+                    max_lag=config["DB_REPLICA_MAX_LAG"],
+                    size=config["DB_POOL_SIZE"],
+                    timeout=config["DB_POOL_TIMEOUT"],
+                    pragmas=config["DB_PRAGMAS"],
+                    instrument=config["DB_INSTRUMENTATION"],
+                    slow_query_ms=config["SLOW_QUERY_MS"],
+                )
+                current_app.extensions["db_replicas"] = replicas
+    return replicas
+
+
+def get_db(replica=False):
+    """The request's connection. With ``replica``, reads that can lag the
+    database by up to DB_REPLICA_MAX_LAG seconds (exports, analytics) get a
+    read-only replica's instead, when one is that fresh; the first call of a
+    request decides, so every such read in it sees the same snapshot."""
+    if replica:
+        if "replica_db" not in g:
+            replicas = get_replicas()
+            pool = replicas.choose() if replicas is not None else None
+            g.replica_db = (pool, pool.acquire()) if pool is not None else None
+        if g.replica_db is not None:
+            return g.replica_db[1]
     if "db" not in g:
-        g.db = sqlite3.connect(current_app.config["DATABASE"])
-        g.db.row_factory = sqlite3.Row
+        g.db = get_pool().acquire()
     return g.db
 
 
 def close_db(e=None):
     db = g.pop("db", None)
     if db is not None:
-        db.close()
+        get_pool().release(db)
+    replica_db = g.pop("replica_db", None)
+    if replica_db is not None:
+        get_replicas().release(*replica_db)
+
+
+@contextmanager
+def transaction():
+    """Run writes on the pool's single writer connection and commit them."""
+    with get_pool().writer() as db:
+        try:
+            yield db
+        except Exception:
+            db.rollback()
+            raise
+        else:
+            db.commit()
+
+
+@contextmanager
+def dedicated_connection(replica=False):
+    """A connection of its own, outside the pool, for long-running reads
+    (exports) that should not hold a pooled connection for minutes; to a
+    fresh enough replica with ``replica``, as get_db()."""
+    replicas = get_replicas() if replica else None
+    pool = replicas.choose() if replicas is not None else None
+    conn = (pool or get_pool()).connect()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def init_db():
+    """Check the schema version once at startup and apply pending migrations
+    when DB_AUTO_MIGRATE is on; otherwise ``manage.py migrate`` must be run."""
+    if current_app.config["DB_BACKEND"] == "postgres":
+        from app.db import postgres as schema
+    else:
+        schema = migrations
+    version = schema.schema_version(get_db())
+    if version == schema.LATEST_VERSION:
+        return
+    if version > schema.LATEST_VERSION:
+        logger.warning(
+            "Database schema version %s is newer than this code (%s)",
+            version, schema.LATEST_VERSION,
+        )
+        return
+    if not current_app.config["DB_AUTO_MIGRATE"]:
+        raise RuntimeError(
+            f"Database schema is at version {version}, expected {schema.LATEST_VERSION}; "
+            "run `python manage.py migrate`"
+        )
+    if schema is migrations:
+        busy_timeout = current_app.config["DB_PRAGMAS"].get("busy_timeout", 5000) / 1000
+        applied = migrations.migrate(current_app.config["DATABASE"], busy_timeout=busy_timeout)
+    else:
+        applied = schema.migrate(current_app.config["DATABASE_URL"])
+    for migration, elapsed in applied:
+        logger.info("Applied migration %04d_%s in %.2fs", migration.version, migration.name, elapsed)
+
+
+def pool_stats():
+    return get_pool().stats()
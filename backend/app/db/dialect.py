@@ -0,0 +1,44 @@
+from flask import current_app
+
+# Queries are written once, in SQLite's dialect with ? placeholders (the
+# Postgres connections translate those). Where the two databases have no
+# common spelling, queries take the fragment for the configured backend.
+
+FRAGMENTS = {
+    "sqlite": {
+        # ids passed as one JSON array parameter
+        "id_list": "SELECT value FROM json_each(?)",
+        # the day after a date parameter, for inclusive "to" filters
+        "next_day": "date(?, '+1 day')",
+        # the date some days back from today, parameter "-N days"
+        "days_ago": "date('now', ?)",
+        "day_of": "date({})",  # date part of a timestamp column
+        "age_s": "CAST((julianday('now') - julianday(created_at)) * 86400 AS INTEGER)",
+        "epoch": "unixepoch({})",  # Unix time of a UTC timestamp column
+        "week": "date(day, 'weekday 0', '-6 days')",  # weeks start on Monday
+        "month": "strftime('%Y-%m-01', day)",
+        "json_object_agg": "json_group_object(CAST({} AS TEXT), {})",  # JSON object text of key/value rows
+        # grid cell of a coordinate: (value - ?) / ? clamped to [0, ?]
+        "cell": "MIN(MAX(CAST(({} - ?) / ? AS INTEGER), 0), ?)",
+    },
+    "postgres": {
+        "id_list": "SELECT CAST(value AS BIGINT) FROM json_array_elements_text(CAST(? AS json))",
+        "next_day": "CAST(? AS date) + 1",
+        "days_ago": "CURRENT_DATE + CAST(? AS interval)",
+        "day_of": "CAST({} AS date)",
+        "age_s": "CAST(EXTRACT(EPOCH FROM LOCALTIMESTAMP - created_at) AS INTEGER)",
+        "epoch": "CAST(EXTRACT(EPOCH FROM {}) AS BIGINT)",
+        "week": "CAST(date_trunc('week', day) AS date)",
+        "month": "CAST(date_trunc('month', day) AS date)",
+        "json_object_agg": "json_object_agg({}, {})",
+        "cell": "LEAST(GREATEST(CAST(FLOOR(({} - ?) / ?) AS INTEGER), 0), ?)",
+    },
+}
+
+
+def backend():
+    return current_app.config["DB_BACKEND"]
+
+
+def fragment(name):
+    return FRAGMENTS[backend()][name]
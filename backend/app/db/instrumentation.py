@@ -0,0 +1,94 @@
+import logging
+import sqlite3
+import time
+from app.utils import metrics
+
+logger = logging.getLogger("app.db.slow_query")
+
+
+def _operation(sql):
+    words = sql.lstrip().split(None, 1)
+    return words[0].upper() if words else "UNKNOWN"
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that times statements and counts the rows they return."""
+
+    operation = "UNKNOWN"
+
+    def execute(self, sql, parameters=()):
+        self.operation = _operation(sql)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._record(sql, parameters, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        self.operation = _operation(sql)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._record(sql, None, time.perf_counter() - start)
+
+    def _record(self, sql, parameters, elapsed):
+        metrics.record_statement(self.operation, elapsed)
+        if self.rowcount > 0:
+            metrics.STATEMENT_ROWS.inc(self.operation, amount=self.rowcount)
+        slow_ms = self.connection.slow_query_ms
+        if slow_ms is not None and elapsed * 1000 >= slow_ms:
+            metrics.SLOW_STATEMENTS.inc(self.operation)
+            self.connection.log_slow_query(sql, parameters, elapsed)
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            metrics.STATEMENT_ROWS.inc(self.operation)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        if rows:
+            metrics.STATEMENT_ROWS.inc(self.operation, amount=len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        if rows:
+            metrics.STATEMENT_ROWS.inc(self.operation, amount=len(rows))
+        return rows
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3 connection whose execute()/executemany() go through InstrumentedCursor.
+
+    Statements slower than ``slow_query_ms`` are logged with their
+    EXPLAIN QUERY PLAN output.
+    """
+
+    slow_query_ms = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def log_slow_query(self, sql, parameters, elapsed):
+        plan = []
+        if parameters is not None:
+            try:
+                cursor = super().cursor()
+                plan = [row[-1] for row in cursor.execute("EXPLAIN QUERY PLAN " + sql, parameters)]
+            except sqlite3.Error:
+                pass
+        logger.warning(
+            "slow query (%.1f ms): %s\n  plan: %s",
+            elapsed * 1000,
+            " ".join(sql.split()),
+            " | ".join(plan) or "n/a",
+        )
@@ -73,4 +73,4 @@ END;
 
 -- index on user id
 CREATE INDEX IF NOT EXISTS idx_complaints_user_id ON complaints(user_id);
-CREATE INDEX IF NOT EXISTS idx_complaints_status_id ON complaints(status_id);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_complaints_status_id ON complaints(status_id);
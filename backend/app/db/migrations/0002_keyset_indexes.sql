@@ -0,0 +1,10 @@
+-- keyset pagination indexes: newest first by (created_at, id) for the
+-- admin, per-user, per-status and per-user+status listings
+CREATE INDEX IF NOT EXISTS idx_complaints_created ON complaints(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_complaints_user_created ON complaints(user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_complaints_status_created ON complaints(status_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_complaints_user_status_created ON complaints(user_id, status_id, created_at, id);
+
+-- superseded by the composite indexes above
+DROP INDEX IF EXISTS idx_complaints_user_id;
+DROP INDEX IF EXISTS idx_complaints_status_id;
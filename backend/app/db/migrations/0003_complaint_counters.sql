@@ -0,0 +1,54 @@
+-- Materialized complaint counters (per status, and per day/category/status),
+-- kept current by the triggers below so stats never scan complaints
+CREATE TABLE IF NOT EXISTS complaint_status_counts (
+    status_id INTEGER PRIMARY KEY,
+    count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS complaint_daily_counts (
+    day TEXT NOT NULL,
+    category_id INTEGER NOT NULL,
+    status_id INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, category_id, status_id)
+) WITHOUT ROWID;
+
+-- backfill once for databases that predate the counters
+INSERT INTO complaint_status_counts (status_id, count)
+SELECT status_id, COUNT(*) FROM complaints
+WHERE NOT EXISTS (SELECT 1 FROM complaint_status_counts)
+GROUP BY status_id;
+
+INSERT INTO complaint_daily_counts (day, category_id, status_id, count)
+SELECT date(created_at), category_id, status_id, COUNT(*) FROM complaints
+WHERE NOT EXISTS (SELECT 1 FROM complaint_daily_counts)
+GROUP BY date(created_at), category_id, status_id;
+
+CREATE TRIGGER IF NOT EXISTS complaints_counts_ai AFTER INSERT ON complaints BEGIN
+    INSERT INTO complaint_status_counts (status_id, count) VALUES (new.status_id, 1)
+    ON CONFLICT(status_id) DO UPDATE SET count = count + 1;
+    INSERT INTO complaint_daily_counts (day, category_id, status_id, count)
+    VALUES (date(new.created_at), new.category_id, new.status_id, 1)
+    ON CONFLICT(day, category_id, status_id) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS complaints_counts_ad AFTER DELETE ON complaints BEGIN
+    UPDATE complaint_status_counts SET count = count - 1 WHERE status_id = old.status_id;
+    UPDATE complaint_daily_counts SET count = count - 1
+    WHERE day = date(old.created_at) AND category_id = old.category_id AND status_id = old.status_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS complaints_counts_au AFTER UPDATE OF status_id, category_id, created_at ON complaints
+WHEN old.status_id IS NOT new.status_id
+    OR old.category_id IS NOT new.category_id
+    OR date(old.created_at) IS NOT date(new.created_at)
+BEGIN
+    UPDATE complaint_status_counts SET count = count - 1 WHERE status_id = old.status_id;
+    UPDATE complaint_daily_counts SET count = count - 1
+    WHERE day = date(old.created_at) AND category_id = old.category_id AND status_id = old.status_id;
+    INSERT INTO complaint_status_counts (status_id, count) VALUES (new.status_id, 1)
+    ON CONFLICT(status_id) DO UPDATE SET count = count + 1;
+    INSERT INTO complaint_daily_counts (day, category_id, status_id, count)
+    VALUES (date(new.created_at), new.category_id, new.status_id, 1)
+    ON CONFLICT(day, category_id, status_id) DO UPDATE SET count = count + 1;
+END;
@@ -0,0 +1,24 @@
+"""Porter stemming and prefix indexes for complaint_search."""
+
+OPTIONS = "tokenize='porter unicode61 remove_diacritics 2'"
+
+
+def upgrade(db):
+    search = db.execute(
+        "SELECT sql FROM sqlite_master WHERE name = 'complaint_search'"
+    ).fetchone()
+    # databases set up by schema.sql may already have the new definition
+    if search is not None and OPTIONS in search[0]:
+        return
+    db.execute("DROP TABLE IF EXISTS complaint_search")
+    db.execute(f"""
+        CREATE VIRTUAL TABLE complaint_search USING fts5(
+            title,
+            description,
+            content='complaints',
+            content_rowid='id',
+            {OPTIONS},
+            prefix='2 3'
+        )
+    """)
+    db.execute("INSERT INTO complaint_search(complaint_search) VALUES ('rebuild')")
@@ -0,0 +1,73 @@
+"""lat/lon columns parsed from complaints.location, indexed with R*Tree."""
+
+from app.utils.geo import parse_location
+
+BATCH = 10000
+
+
+def upgrade(db):
+    columns = {row[1] for row in db.execute("PRAGMA table_info(complaints)")}
+    if "lat" not in columns:
+        db.execute("ALTER TABLE complaints ADD COLUMN lat REAL")
+    if "lon" not in columns:
+        db.execute("ALTER TABLE complaints ADD COLUMN lon REAL")
+
+    # backfill from the free-text locations before the triggers exist, then
+    # fill the index in one statement. complaints_au would re-index every
+    # row's search text for a lat/lon change, so it is lifted meanwhile.
+    search_trigger = db.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'complaints_au'"
+    ).fetchone()
+    db.execute("DROP TRIGGER IF EXISTS complaints_au")
+    last_id = 0
+    while True:
+        rows = db.execute(
+            "SELECT id, location FROM complaints WHERE id > ? AND location IS NOT NULL ORDER BY id LIMIT ?",
+            (last_id, BATCH),
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        updates = []
+        for complaint_id, location in rows:
+            lat, lon = parse_location(location)
+            if lat is not None:
+                updates.append((lat, lon, complaint_id))
+        db.executemany("UPDATE complaints SET lat = ?, lon = ? WHERE id = ?", updates)
+    if search_trigger:
+        db.execute(search_trigger[0])
+
+    # R*Tree of points (min = max); entries are 32-bit floats rounded
+    # outwards, so queries use it as a filter and re-check lat/lon
+    db.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS complaint_geo USING rtree(
+            id, min_lat, max_lat, min_lon, max_lon
+        )
+    """)
+    db.execute("DELETE FROM complaint_geo")
+    db.execute("""
+        INSERT INTO complaint_geo (id, min_lat, max_lat, min_lon, max_lon)
+        SELECT id, lat, lat, lon, lon FROM complaints WHERE lat IS NOT NULL AND lon IS NOT NULL
+    """)
+
+    db.execute("""
+        CREATE TRIGGER IF NOT EXISTS complaints_geo_ai AFTER INSERT ON complaints
+        WHEN new.lat IS NOT NULL AND new.lon IS NOT NULL
+        BEGIN
+            INSERT INTO complaint_geo (id, min_lat, max_lat, min_lon, max_lon)
+            VALUES (new.id, new.lat, new.lat, new.lon, new.lon);
+        END
+    """)
+    db.execute("""
+        CREATE TRIGGER IF NOT EXISTS complaints_geo_ad AFTER DELETE ON complaints BEGIN
+            DELETE FROM complaint_geo WHERE id = old.id;
+        END
+    """)
+    db.execute("""
+        CREATE TRIGGER IF NOT EXISTS complaints_geo_au AFTER UPDATE OF lat, lon ON complaints BEGIN
+            DELETE FROM complaint_geo WHERE id = old.id;
+            INSERT INTO complaint_geo (id, min_lat, max_lat, min_lon, max_lon)
+            SELECT new.id, new.lat, new.lat, new.lon, new.lon
+            WHERE new.lat IS NOT NULL AND new.lon IS NOT NULL;
+        END
+    """)
@@ -0,0 +1,59 @@
+"""MinHash/LSH index for near-duplicate complaints, and complaints.duplicate_of."""
+
+from datetime import datetime, timedelta, timezone
+from app.db.queries.duplicates import index_complaints
+
+BACKFILL_DAYS = 30  # the default DUPLICATE_WINDOW_DAYS
+BATCH = 10000
+
+
+def upgrade(db):
+    columns = {row[1] for row in db.execute("PRAGMA table_info(complaints)")}
+    if "duplicate_of" not in columns:
+        db.execute("ALTER TABLE complaints ADD COLUMN duplicate_of INTEGER REFERENCES complaints(id)")
+    # only merged complaints carry a value, so index just those
+    db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_complaints_duplicate_of ON complaints(duplicate_of)
+        WHERE duplicate_of IS NOT NULL
+    """)
+
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS complaint_minhash (
+            complaint_id INTEGER PRIMARY KEY,
+            signature BLOB NOT NULL
+        )
+    """)
+    # one row per (band bucket, complaint); created_at in the key lets a
+    # lookup seek straight to the recent entries of each bucket
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS complaint_lsh (
+            bucket INTEGER NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            complaint_id INTEGER NOT NULL,
+            PRIMARY KEY (bucket, created_at, complaint_id)
+        ) WITHOUT ROWID
+    """)
+    db.execute("CREATE INDEX IF NOT EXISTS idx_complaint_lsh_complaint_id ON complaint_lsh(complaint_id)")
+    db.execute("""
+        CREATE TRIGGER IF NOT EXISTS complaints_duplicates_ad AFTER DELETE ON complaints BEGIN
+            DELETE FROM complaint_minhash WHERE complaint_id = old.id;
+            DELETE FROM complaint_lsh WHERE complaint_id = old.id;
+        END
+    """)
+
+    # older complaints are never offered as duplicates, so only the recent
+    # ones need signatures
+    since = (datetime.now(timezone.utc) - timedelta(days=BACKFILL_DAYS)).strftime("%Y-%m-%d %H:%M:%S")
+    last_id = 0
+    while True:
+        rows = db.execute(
+            """
+            SELECT id, category_id, created_at, title, description FROM complaints
+            WHERE id > ? AND created_at >= ? ORDER BY id LIMIT ?
+            """,
+            (last_id, since, BATCH),
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        index_complaints(db, rows)
@@ -0,0 +1,50 @@
+-- Re-index search text only when it changes; status updates used to
+-- rewrite the complaint's FTS entry every time
+DROP TRIGGER IF EXISTS complaints_au;
+
+CREATE TRIGGER IF NOT EXISTS complaints_au AFTER UPDATE OF title, description ON complaints
+WHEN old.title IS NOT new.title OR old.description IS NOT new.description
+BEGIN
+    UPDATE complaint_search SET title = new.title, description = new.description
+    WHERE rowid = old.id;
+END;
+
+-- Append-only audit trail of status changes
+CREATE TABLE IF NOT EXISTS complaint_status_history (
+    id INTEGER PRIMARY KEY,
+    complaint_id INTEGER NOT NULL,
+    from_status_id INTEGER,
+    to_status_id INTEGER NOT NULL,
+    changed_by INTEGER,  -- users.id, NULL when not made by a user
+    changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    age_s INTEGER  -- seconds between the complaint's creation and the change
+);
+
+CREATE INDEX IF NOT EXISTS idx_status_history_complaint ON complaint_status_history(complaint_id, id);
+
+CREATE TRIGGER IF NOT EXISTS complaint_status_history_bu BEFORE UPDATE ON complaint_status_history BEGIN
+    SELECT RAISE(ABORT, 'complaint_status_history is append-only');
+END;
+
+CREATE TRIGGER IF NOT EXISTS complaint_status_history_bd BEFORE DELETE ON complaint_status_history BEGIN
+    SELECT RAISE(ABORT, 'complaint_status_history is append-only');
+END;
+
+-- Transitions per day, kept current by the trigger below so dashboards
+-- never scan the history
+CREATE TABLE IF NOT EXISTS complaint_transition_counts (
+    day TEXT NOT NULL,
+    from_status_id INTEGER NOT NULL,
+    to_status_id INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    total_age_s INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, from_status_id, to_status_id)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS complaint_status_history_ai AFTER INSERT ON complaint_status_history BEGIN
+    INSERT INTO complaint_transition_counts (day, from_status_id, to_status_id, count, total_age_s)
+    VALUES (date(new.changed_at), COALESCE(new.from_status_id, 0), new.to_status_id, 1, COALESCE(new.age_s, 0))
+    ON CONFLICT(day, from_status_id, to_status_id) DO UPDATE SET
+        count = count + 1,
+        total_age_s = total_age_s + excluded.total_age_s;
+END;
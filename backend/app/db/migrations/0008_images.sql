@@ -0,0 +1,13 @@
+-- Uploaded photos, stored by content hash under UPLOAD_FOLDER; the same
+-- photo uploaded twice is stored once
+CREATE TABLE IF NOT EXISTS images (
+    sha256 TEXT PRIMARY KEY,
+    content_type TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    uploaded_by INTEGER REFERENCES users(id),
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+) WITHOUT ROWID;
+
+-- Set for complaints whose photo was uploaded here (image_url then points at
+-- it); listings derive the thumbnail URL from it
+ALTER TABLE complaints ADD COLUMN image_sha256 TEXT REFERENCES images(sha256);
@@ -0,0 +1,15 @@
+-- Change log behind the live feed (GET /api/complaints/events): one row per
+-- complaint created or moved to another status, written by the same
+-- transaction as the change. AUTOINCREMENT so ids never go back after
+-- pruning; they are the feed's Last-Event-ID.
+CREATE TABLE IF NOT EXISTS complaint_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    complaint_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,  -- the complaint's owner, whose feed shows it
+    from_status_id INTEGER,  -- NULL for new complaints
+    status_id INTEGER NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- a citizen's backlog on reconnect
+CREATE INDEX IF NOT EXISTS idx_complaint_events_user ON complaint_events(user_id, id);
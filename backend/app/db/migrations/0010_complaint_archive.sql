@@ -0,0 +1,61 @@
+-- Closed complaints past ARCHIVE_AFTER_DAYS are moved here by
+-- `manage.py archive` (app/db/queries/archive.py), out of the tables and
+-- indexes that listings, search and the map read. Same columns as
+-- complaints, plus when the row was moved.
+CREATE TABLE IF NOT EXISTS complaints_archive (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    category_id INTEGER NOT NULL,
+    status_id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    image_url TEXT,
+    location TEXT,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    lat REAL,
+    lon REAL,
+    duplicate_of INTEGER,
+    image_sha256 TEXT,
+    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Search over archived complaints (?archived=1), as complaint_search
+CREATE VIRTUAL TABLE IF NOT EXISTS complaint_archive_search USING fts5(
+    title,
+    description,
+    content='complaints_archive',
+    content_rowid='id',
+    tokenize='porter unicode61 remove_diacritics 2',
+    prefix='2 3'
+);
+
+-- An external content FTS table needs the deleted row's text to drop its
+-- terms; by AFTER DELETE the row is gone from complaints, so the old trigger
+-- left every deleted complaint in the index
+DROP TRIGGER IF EXISTS complaints_ad;
+
+CREATE TRIGGER IF NOT EXISTS complaints_ad AFTER DELETE ON complaints BEGIN
+    INSERT INTO complaint_search(complaint_search, rowid, title, description)
+    VALUES ('delete', old.id, old.title, old.description);
+END;
+
+-- Archived complaints still count in the stats: moving one takes it out of
+-- the counters (complaints_counts_ad) and puts it back in here
+CREATE TRIGGER IF NOT EXISTS complaints_archive_ai AFTER INSERT ON complaints_archive BEGIN
+    INSERT INTO complaint_archive_search(rowid, title, description)
+    VALUES (new.id, new.title, new.description);
+    INSERT INTO complaint_status_counts (status_id, count) VALUES (new.status_id, 1)
+    ON CONFLICT(status_id) DO UPDATE SET count = count + 1;
+    INSERT INTO complaint_daily_counts (day, category_id, status_id, count)
+    VALUES (date(new.created_at), new.category_id, new.status_id, 1)
+    ON CONFLICT(day, category_id, status_id) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS complaints_archive_ad AFTER DELETE ON complaints_archive BEGIN
+    INSERT INTO complaint_archive_search(complaint_archive_search, rowid, title, description)
+    VALUES ('delete', old.id, old.title, old.description);
+    UPDATE complaint_status_counts SET count = count - 1 WHERE status_id = old.status_id;
+    UPDATE complaint_daily_counts SET count = count - 1
+    WHERE day = date(old.created_at) AND category_id = old.category_id AND status_id = old.status_id;
+END;
@@ -0,0 +1,36 @@
+-- Listing totals and status facets (GET /api/complaints/get): complaints
+-- per user and status, with user_id 0 for every user, kept current by the
+-- triggers below. Like the listings, they only count complaints still in
+-- complaints; archiving one takes it out.
+CREATE TABLE IF NOT EXISTS complaint_user_status_counts (
+    user_id INTEGER NOT NULL,
+    status_id INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, status_id)
+) WITHOUT ROWID;
+
+INSERT INTO complaint_user_status_counts (user_id, status_id, count)
+SELECT user_id, status_id, COUNT(*) FROM complaints GROUP BY user_id, status_id
+UNION ALL
+SELECT 0, status_id, COUNT(*) FROM complaints GROUP BY status_id;
+
+CREATE TRIGGER IF NOT EXISTS complaints_user_counts_ai AFTER INSERT ON complaints BEGIN
+    INSERT INTO complaint_user_status_counts (user_id, status_id, count)
+    VALUES (new.user_id, new.status_id, 1), (0, new.status_id, 1)
+    ON CONFLICT(user_id, status_id) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS complaints_user_counts_ad AFTER DELETE ON complaints BEGIN
+    UPDATE complaint_user_status_counts SET count = count - 1
+    WHERE user_id IN (old.user_id, 0) AND status_id = old.status_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS complaints_user_counts_au AFTER UPDATE OF user_id, status_id ON complaints
+WHEN old.user_id IS NOT new.user_id OR old.status_id IS NOT new.status_id
+BEGIN
+    UPDATE complaint_user_status_counts SET count = count - 1
+    WHERE user_id IN (old.user_id, 0) AND status_id = old.status_id;
+    INSERT INTO complaint_user_status_counts (user_id, status_id, count)
+    VALUES (new.user_id, new.status_id, 1), (0, new.status_id, 1)
+    ON CONFLICT(user_id, status_id) DO UPDATE SET count = count + 1;
+END;
@@ -0,0 +1,108 @@
+import importlib
+import os
+import re
+import sqlite3
+import time
+
+# Schema migrations, applied in order and tracked with PRAGMA user_version.
+#
+# Each migration is a file named NNNN_description.sql (statements run in
+# order) or NNNN_description.py (defining ``upgrade(db)``). A migration runs
+# in its own BEGIN IMMEDIATE transaction together with the user_version bump,
+# so it is applied completely or not at all, and two processes migrating at
+# once apply it exactly once. Never edit a migration that has shipped; add a
+# new one instead.
+
+MIGRATIONS_DIR = os.path.dirname(__file__)
+_FILENAME = re.compile(r"^(\d{4})_(\w+)\.(sql|py)$")
+
+
+class Migration:
+    def __init__(self, version, name, path, package=__name__):
+        self.version = version
+        self.name = name
+        self.path = path
+        self.package = package
+
+    def apply(self, db):
+        if self.path.endswith(".sql"):
+            with open(self.path, encoding="utf-8") as f:
+                for statement in split_statements(f.read()):
+                    db.execute(statement)
+        else:
+            module = importlib.import_module(f"{self.package}.{self.version:04d}_{self.name}")
+            module.upgrade(db)
+
+
+def split_statements(script):
+    """Split a SQL script into statements; trigger bodies stay whole."""
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            yield statement.strip()
+            statement = ""
+    leftover = [l for l in statement.splitlines() if l.strip() and not l.strip().startswith("--")]
+    if leftover:
+        raise ValueError(f"Incomplete SQL statement: {statement.strip()}")
+
+
+def discover(directory=MIGRATIONS_DIR, package=__name__):
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = _FILENAME.match(filename)
+        if match:
+            version, name, _ = match.groups()
+            migrations.append(Migration(int(version), name, os.path.join(directory, filename), package))
+    versions = [m.version for m in migrations]
+    if versions != list(range(1, len(versions) + 1)):
+        raise RuntimeError(f"Migration versions must be 1..N without gaps, found {versions}")
+    return migrations
+
+
+MIGRATIONS = discover()
+LATEST_VERSION = MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+def schema_version(db):
+    return db.execute("PRAGMA user_version").fetchone()[0]
+
+
+def pending(db):
+    version = schema_version(db)
+    return [m for m in MIGRATIONS if m.version > version]
+
+
+def migrate(database, target=None, busy_timeout=5.0):
+    """Apply pending migrations up to ``target`` (default: all).
+
+    Returns (migration, seconds) for each migration applied by this call.
+    """
+    target = LATEST_VERSION if target is None else target
+    applied = []
+    db = sqlite3.connect(database, timeout=busy_timeout, isolation_level=None)
+    try:
+        current = schema_version(db)
+        for migration in MIGRATIONS:
+            if migration.version <= current:
+                continue
+            if migration.version > target:
+                break
+            start = time.perf_counter()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                # re-check under the write lock: another process may have won
+                if schema_version(db) >= migration.version:
+                    db.execute("COMMIT")
+                    continue
+                migration.apply(db)
+                db.execute(f"PRAGMA user_version = {migration.version}")
+                db.execute("COMMIT")
+            except BaseException:
+                if db.in_transaction:
+                    db.execute("ROLLBACK")
+                raise
+            applied.append((migration, time.perf_counter() - start))
+    finally:
+        db.close()
+    return applied
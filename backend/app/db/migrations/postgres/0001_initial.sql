@@ -0,0 +1,206 @@
+-- Schema for DB_BACKEND = "postgres": the SQLite schema as of migration
+-- 0007, with Postgres features in place of SQLite's. Run as one script in
+-- one transaction by app.db.postgres.migrate().
+--
+-- Timestamps are UTC without a time zone, like SQLite's CURRENT_TIMESTAMP.
+
+CREATE TABLE roles (
+    id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE users (
+    id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    email VARCHAR(100) UNIQUE NOT NULL,
+    name VARCHAR(50) NOT NULL,
+    password_hash TEXT NOT NULL,
+    role_id INTEGER NOT NULL DEFAULT 1 REFERENCES roles(id)
+);
+
+CREATE TABLE categories (
+    id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name VARCHAR(50) NOT NULL UNIQUE
+);
+
+CREATE TABLE statuses (
+    id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE complaints (
+    id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    category_id INTEGER NOT NULL REFERENCES categories(id),
+    status_id INTEGER NOT NULL REFERENCES statuses(id),
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    image_url TEXT,
+    location TEXT,
+    created_at TIMESTAMP(0) DEFAULT (now() AT TIME ZONE 'utc'),
+    updated_at TIMESTAMP(0) DEFAULT (now() AT TIME ZONE 'utc'),
+    lat DOUBLE PRECISION,
+    lon DOUBLE PRECISION,
+    -- checked at commit: merges may point complaints at each other in any order
+    duplicate_of INTEGER REFERENCES complaints(id) DEFERRABLE INITIALLY DEFERRED
+);
+
+-- keyset pagination indexes: newest first by (created_at, id) for the
+-- admin, per-user, per-status and per-user+status listings
+CREATE INDEX idx_complaints_created ON complaints(created_at, id);
+CREATE INDEX idx_complaints_user_created ON complaints(user_id, created_at, id);
+CREATE INDEX idx_complaints_status_created ON complaints(status_id, created_at, id);
+CREATE INDEX idx_complaints_user_status_created ON complaints(user_id, status_id, created_at, id);
+CREATE INDEX idx_complaints_duplicate_of ON complaints(duplicate_of) WHERE duplicate_of IS NOT NULL;
+
+-- Search: one weighted tsvector per complaint (title A, description B)
+-- under a GIN index, kept current by the trigger below
+CREATE TABLE complaint_search (
+    complaint_id INTEGER PRIMARY KEY REFERENCES complaints(id) ON DELETE CASCADE,
+    document TSVECTOR NOT NULL
+);
+
+CREATE INDEX idx_complaint_search_document ON complaint_search USING GIN (document);
+
+CREATE FUNCTION complaint_search_document() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO complaint_search (complaint_id, document)
+    VALUES (
+        new.id,
+        setweight(to_tsvector('english', new.title), 'A') || setweight(to_tsvector('english', new.description), 'B')
+    )
+    ON CONFLICT (complaint_id) DO UPDATE SET document = excluded.document;
+    RETURN NULL;
+END $$;
+
+CREATE TRIGGER complaints_search_ai AFTER INSERT ON complaints
+FOR EACH ROW EXECUTE FUNCTION complaint_search_document();
+
+CREATE TRIGGER complaints_search_au AFTER UPDATE OF title, description ON complaints
+FOR EACH ROW WHEN (old.title IS DISTINCT FROM new.title OR old.description IS DISTINCT FROM new.description)
+EXECUTE FUNCTION complaint_search_document();
+
+-- Materialized complaint counters (per status, and per day/category/status)
+CREATE TABLE complaint_status_counts (
+    status_id INTEGER PRIMARY KEY,
+    count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE complaint_daily_counts (
+    day DATE NOT NULL,
+    category_id INTEGER NOT NULL,
+    status_id INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, category_id, status_id)
+);
+
+CREATE FUNCTION complaint_counts() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF tg_op IN ('DELETE', 'UPDATE') THEN
+        UPDATE complaint_status_counts SET count = count - 1 WHERE status_id = old.status_id;
+        UPDATE complaint_daily_counts SET count = count - 1
+        WHERE day = CAST(old.created_at AS date) AND category_id = old.category_id AND status_id = old.status_id;
+    END IF;
+    IF tg_op IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO complaint_status_counts AS counts (status_id, count) VALUES (new.status_id, 1)
+        ON CONFLICT (status_id) DO UPDATE SET count = counts.count + 1;
+        INSERT INTO complaint_daily_counts AS counts (day, category_id, status_id, count)
+        VALUES (CAST(new.created_at AS date), new.category_id, new.status_id, 1)
+        ON CONFLICT (day, category_id, status_id) DO UPDATE SET count = counts.count + 1;
+    END IF;
+    RETURN NULL;
+END $$;
+
+CREATE TRIGGER complaints_counts_ai AFTER INSERT ON complaints
+FOR EACH ROW EXECUTE FUNCTION complaint_counts();
+
+CREATE TRIGGER complaints_counts_ad AFTER DELETE ON complaints
+FOR EACH ROW EXECUTE FUNCTION complaint_counts();
+
+CREATE TRIGGER complaints_counts_au AFTER UPDATE OF status_id, category_id, created_at ON complaints
+FOR EACH ROW WHEN (
+    old.status_id IS DISTINCT FROM new.status_id
+    OR old.category_id IS DISTINCT FROM new.category_id
+    OR CAST(old.created_at AS date) IS DISTINCT FROM CAST(new.created_at AS date)
+)
+EXECUTE FUNCTION complaint_counts();
+
+-- Map queries: the SQLite schema keeps an R*Tree of points; here the same
+-- columns come from a view over complaints, served by a (lat, lon) index
+CREATE INDEX idx_complaints_lat_lon ON complaints(lat, lon) WHERE lat IS NOT NULL AND lon IS NOT NULL;
+
+CREATE VIEW complaint_geo AS
+SELECT id, lat AS min_lat, lat AS max_lat, lon AS min_lon, lon AS max_lon
+FROM complaints
+WHERE lat IS NOT NULL AND lon IS NOT NULL;
+
+-- great-circle distance in meters, as app.utils.geo.haversine_m
+CREATE FUNCTION haversine(lat1 DOUBLE PRECISION, lon1 DOUBLE PRECISION, lat2 DOUBLE PRECISION, lon2 DOUBLE PRECISION)
+RETURNS DOUBLE PRECISION LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE AS $$
+    SELECT 2 * 6371008.8 * asin(LEAST(1.0, sqrt(
+        sin(radians(lat2 - lat1) / 2) ^ 2
+        + cos(radians(lat1)) * cos(radians(lat2)) * sin(radians(lon2 - lon1) / 2) ^ 2
+    )))
+$$;
+
+-- Near-duplicate index (see app.db.queries.duplicates)
+CREATE TABLE complaint_minhash (
+    complaint_id INTEGER PRIMARY KEY REFERENCES complaints(id) ON DELETE CASCADE,
+    signature BYTEA NOT NULL
+);
+
+CREATE TABLE complaint_lsh (
+    bucket BIGINT NOT NULL,
+    created_at TIMESTAMP(0) NOT NULL,
+    complaint_id INTEGER NOT NULL REFERENCES complaints(id) ON DELETE CASCADE,
+    PRIMARY KEY (bucket, created_at, complaint_id)
+);
+
+CREATE INDEX idx_complaint_lsh_complaint_id ON complaint_lsh(complaint_id);
+
+-- Append-only audit trail of status changes
+CREATE TABLE complaint_status_history (
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    complaint_id INTEGER NOT NULL,
+    from_status_id INTEGER,
+    to_status_id INTEGER NOT NULL,
+    changed_by INTEGER,  -- users.id, NULL when not made by a user
+    changed_at TIMESTAMP(0) NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+    age_s INTEGER  -- seconds between the complaint's creation and the change
+);
+
+CREATE INDEX idx_status_history_complaint ON complaint_status_history(complaint_id, id);
+
+CREATE FUNCTION complaint_status_history_append_only() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    RAISE EXCEPTION 'complaint_status_history is append-only';
+END $$;
+
+CREATE TRIGGER complaint_status_history_bu BEFORE UPDATE OR DELETE ON complaint_status_history
+FOR EACH ROW EXECUTE FUNCTION complaint_status_history_append_only();
+
+CREATE TABLE complaint_transition_counts (
+    day DATE NOT NULL,
+    from_status_id INTEGER NOT NULL,
+    to_status_id INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    total_age_s BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, from_status_id, to_status_id)
+);
+
+CREATE FUNCTION complaint_transition_counts() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO complaint_transition_counts AS counts (day, from_status_id, to_status_id, count, total_age_s)
+    VALUES (CAST(new.changed_at AS date), COALESCE(new.from_status_id, 0), new.to_status_id, 1, COALESCE(new.age_s, 0))
+    ON CONFLICT (day, from_status_id, to_status_id) DO UPDATE SET
+        count = counts.count + 1,
+        total_age_s = counts.total_age_s + excluded.total_age_s;
+    RETURN NULL;
+END $$;
+
+CREATE TRIGGER complaint_status_history_ai AFTER INSERT ON complaint_status_history
+FOR EACH ROW EXECUTE FUNCTION complaint_transition_counts();
+
+-- Reference data (app/db/seed.sql for SQLite)
+INSERT INTO roles (name) VALUES ('user'), ('admin') ON CONFLICT DO NOTHING;
+INSERT INTO statuses (name) VALUES ('Pending'), ('In Progress'), ('Resolved'), ('Rejected') ON CONFLICT DO NOTHING;
+INSERT INTO categories (name) VALUES ('Roads'), ('Garbage'), ('Water'), ('Electricity') ON CONFLICT DO NOTHING;
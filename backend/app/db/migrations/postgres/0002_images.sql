@@ -0,0 +1,10 @@
+-- Uploaded photos (SQLite migration 0008)
+CREATE TABLE images (
+    sha256 TEXT PRIMARY KEY,
+    content_type TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    uploaded_by INTEGER REFERENCES users(id),
+    created_at TIMESTAMP(0) NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
+);
+
+ALTER TABLE complaints ADD COLUMN image_sha256 TEXT REFERENCES images(sha256);
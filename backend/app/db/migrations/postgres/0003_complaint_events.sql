@@ -0,0 +1,11 @@
+-- Change log behind the live feed (SQLite migration 0009)
+CREATE TABLE complaint_events (
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    complaint_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    from_status_id INTEGER,
+    status_id INTEGER NOT NULL,
+    created_at TIMESTAMP(0) NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
+);
+
+CREATE INDEX idx_complaint_events_user ON complaint_events(user_id, id);
@@ -0,0 +1,51 @@
+-- Archived complaints (SQLite migration 0010): closed complaints moved out of
+-- complaints by `manage.py archive`, with their own search documents
+CREATE TABLE complaints_archive (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    category_id INTEGER NOT NULL,
+    status_id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    image_url TEXT,
+    location TEXT,
+    created_at TIMESTAMP(0),
+    updated_at TIMESTAMP(0),
+    lat DOUBLE PRECISION,
+    lon DOUBLE PRECISION,
+    duplicate_of INTEGER,
+    image_sha256 TEXT,
+    archived_at TIMESTAMP(0) NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
+);
+
+CREATE TABLE complaint_archive_search (
+    complaint_id INTEGER PRIMARY KEY REFERENCES complaints_archive(id) ON DELETE CASCADE,
+    document TSVECTOR NOT NULL
+);
+
+CREATE INDEX idx_complaint_archive_search_document ON complaint_archive_search USING GIN (document);
+
+CREATE FUNCTION complaint_archive_search_document() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO complaint_archive_search (complaint_id, document)
+    VALUES (
+        new.id,
+        setweight(to_tsvector('english', new.title), 'A') || setweight(to_tsvector('english', new.description), 'B')
+    );
+    RETURN NULL;
+END $$;
+
+CREATE TRIGGER complaints_archive_search_ai AFTER INSERT ON complaints_archive
+FOR EACH ROW EXECUTE FUNCTION complaint_archive_search_document();
+
+-- archived complaints still count in the stats: complaint_counts() adds
+-- back what moving the row out of complaints took away
+CREATE TRIGGER complaints_archive_counts_ai AFTER INSERT ON complaints_archive
+FOR EACH ROW EXECUTE FUNCTION complaint_counts();
+
+CREATE TRIGGER complaints_archive_counts_ad AFTER DELETE ON complaints_archive
+FOR EACH ROW EXECUTE FUNCTION complaint_counts();
+
+-- a merged duplicate may outlive (in complaints) the complaint it points
+-- at, once that one is archived
+ALTER TABLE complaints DROP CONSTRAINT IF EXISTS complaints_duplicate_of_fkey;
@@ -0,0 +1,38 @@
+-- Listing totals and status facets (SQLite migration 0011): complaints per
+-- user and status, user_id 0 counting every user's, for complaints still
+-- in complaints
+CREATE TABLE complaint_user_status_counts (
+    user_id INTEGER NOT NULL,
+    status_id INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, status_id)
+);
+
+INSERT INTO complaint_user_status_counts (user_id, status_id, count)
+SELECT user_id, status_id, COUNT(*) FROM complaints GROUP BY user_id, status_id
+UNION ALL
+SELECT 0, status_id, COUNT(*) FROM complaints GROUP BY status_id;
+
+CREATE FUNCTION complaint_user_counts() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF tg_op IN ('DELETE', 'UPDATE') THEN
+        UPDATE complaint_user_status_counts SET count = count - 1
+        WHERE user_id IN (old.user_id, 0) AND status_id = old.status_id;
+    END IF;
+    IF tg_op IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO complaint_user_status_counts AS counts (user_id, status_id, count)
+        VALUES (new.user_id, new.status_id, 1), (0, new.status_id, 1)
+        ON CONFLICT (user_id, status_id) DO UPDATE SET count = counts.count + 1;
+    END IF;
+    RETURN NULL;
+END $$;
+
+CREATE TRIGGER complaints_user_counts_ai AFTER INSERT ON complaints
+FOR EACH ROW EXECUTE FUNCTION complaint_user_counts();
+
+CREATE TRIGGER complaints_user_counts_ad AFTER DELETE ON complaints
+FOR EACH ROW EXECUTE FUNCTION complaint_user_counts();
+
+CREATE TRIGGER complaints_user_counts_au AFTER UPDATE OF user_id, status_id ON complaints
+FOR EACH ROW WHEN (old.user_id IS DISTINCT FROM new.user_id OR old.status_id IS DISTINCT FROM new.status_id)
+EXECUTE FUNCTION complaint_user_counts();
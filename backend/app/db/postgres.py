@@ -0,0 +1,434 @@
+"""PostgreSQL storage backend (DB_BACKEND = "postgres").
+
+Connections are wrapped so the query modules can use them like sqlite3
+connections: ``?`` and ``?NNN`` placeholders are translated, rows can be
+read by index or column name, timestamps and dates come back as the same
+``YYYY-MM-DD HH:MM:SS`` / ``YYYY-MM-DD`` strings SQLite stores, and writes
+run in explicit transactions through ``app.db.transaction()``. The schema
+lives in its own migrations (app/db/migrations/postgres), tracked in the
+schema_version table.
+"""
+
+import importlib
+import logging
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from app.db import ConnectionPool, migrations
+from app.utils import metrics
+
+try:
+    import psycopg
+    from psycopg.pq import TransactionStatus
+    from psycopg.rows import tuple_row
+    from psycopg.types.string import TextLoader
+except ImportError:  # optional: pip install "psycopg[binary]" (or `uv sync --extra postgres`)
+    psycopg = None
+
+logger = logging.getLogger("app.db.slow_query")
+
+MIGRATIONS_DIR = os.path.join(migrations.MIGRATIONS_DIR, "postgres")
+MIGRATIONS = migrations.discover(MIGRATIONS_DIR, f"{migrations.__name__}.postgres")
+LATEST_VERSION = MIGRATIONS[-1].version if MIGRATIONS else 0
+MIGRATION_LOCK = 0x63697669  # pg_advisory_xact_lock key serializing migrations
+
+# quoted literals are copied (with % escaped), placeholders translated
+_TOKENS = re.compile(r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|\?(\d+)?|%""")
+
+
+@lru_cache(maxsize=1024)
+def translate(sql):
+    """SQLite placeholders -> psycopg: ``?`` => ``%s``, ``?N`` => ``%(pN)s``.
+
+    Returns ``(sql, numbered)``; numbered queries take their parameters as
+    a dict (see ``_params``)."""
+    numbered = False
+
+    def replace(match):
+        nonlocal numbered
+        token = match.group(0)
+        if token == "%":
+            return "%%"
+        if token[0] == "?":
+            if match.group(1):
+                numbered = True
+                return f"%(p{match.group(1)})s"
+            return "%s"
+        return token.replace("%", "%%")
+
+    return _TOKENS.sub(replace, sql), numbered
+
+
+def _params(parameters, numbered):
+    if numbered:
+        return {f"p{i}": value for i, value in enumerate(parameters, start=1)}
+    return parameters
+
+
+class Row(tuple):
+    """Tuple whose values can also be read by column name, like sqlite3.Row."""
+
+    __slots__ = ()
+    _index = {}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def keys(self):
+        return list(self._index)
+
+
+@lru_cache(maxsize=512)
+def _row_class(names):
+    index = {}
+    for i, name in enumerate(names):
+        index.setdefault(name, i)  # the first of duplicate names wins, as in sqlite3.Row
+    return type("Row", (Row,), {"__slots__": (), "_index": index})
+
+
+def _row_factory(cursor):
+    if cursor.description is None:
+        return tuple
+    return _row_class(tuple(column.name for column in cursor.description))
+
+
+def _operation(sql):
+    words = sql.lstrip().split(None, 1)
+    return words[0].upper() if words else "UNKNOWN"
+
+
+class Cursor:
+    def __init__(self, connection):
+        self.connection = connection
+        factory = _row_factory if connection.row_factory is not None else tuple_row
+        self._cursor = connection.raw.cursor(row_factory=factory)
+        self.operation = "UNKNOWN"
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def _run(self, method, sql, parameters):
+        self.operation = _operation(sql)
+        start = time.perf_counter()
+        try:
+            return method()
+        finally:
+            if self.connection.instrument:
+                self.connection.record(self, sql, parameters, time.perf_counter() - start)
+
+    def execute(self, sql, parameters=()):
+        if parameters:
+            query, numbered = translate(sql)
+            self._run(lambda: self._cursor.execute(query, _params(parameters, numbered)), sql, parameters)
+        else:
+            self._run(lambda: self._cursor.execute(sql), sql, parameters)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        query, numbered = translate(sql)
+        params = [_params(p, numbered) for p in seq_of_parameters]
+        if params:
+            self._run(lambda: self._cursor.executemany(query, params), sql, None)
+        return self
+
+    def _count(self, rows):
+        if self.connection.instrument and rows:
+            metrics.STATEMENT_ROWS.inc(self.operation, amount=rows)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        self._count(row is not None)
+        return row
+
+    def fetchmany(self, size=100):
+        rows = self._cursor.fetchmany(size)
+        self._count(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._count(len(rows))
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self._cursor.close()
+
+
+class Connection:
+    """psycopg connection with the sqlite3 interface the query modules use.
+
+    The underlying connection is in autocommit mode, so pooled readers never
+    sit idle in a transaction; ``begin()`` opens one for writes.
+    """
+
+    def __init__(self, raw, instrument=False, slow_query_ms=None):
+        self.raw = raw
+        self.instrument = instrument
+        self.slow_query_ms = slow_query_ms
+        self.row_factory = Row  # None => plain tuples (exports)
+
+    def cursor(self):
+        return Cursor(self)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    @property
+    def in_transaction(self):
+        return self.raw.info.transaction_status != TransactionStatus.IDLE
+
+    def begin(self):
+        self.raw.execute("BEGIN")
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def close(self):
+        self.raw.close()
+
+    def stream(self, sql, parameters=(), batch_size=500):
+        """Yield lists of rows read through a server-side cursor, so a
+        result of any size is never held in memory at once."""
+        query, numbered = translate(sql)
+        factory = _row_factory if self.row_factory is not None else tuple_row
+        with self.raw.transaction():
+            with self.raw.cursor(name="stream", row_factory=factory) as cursor:
+                cursor.itersize = batch_size
+                cursor.execute(query, _params(parameters, numbered) if parameters else None)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        return
+                    yield rows
+
+    def record(self, cursor, sql, parameters, elapsed):
+        metrics.record_statement(cursor.operation, elapsed)
+        # rows returned are counted as they are fetched, rows written here
+        if cursor.description is None and cursor.rowcount > 0:
+            metrics.STATEMENT_ROWS.inc(cursor.operation, amount=cursor.rowcount)
+        if self.slow_query_ms is not None and elapsed * 1000 >= self.slow_query_ms:
+            metrics.SLOW_STATEMENTS.inc(cursor.operation)
+            plan = []
+            if parameters is not None:
+                try:
+                    query, numbered = translate("EXPLAIN " + sql)
+                    plan = [row[0] for row in self.raw.execute(query, _params(parameters, numbered) or None)]
+                except psycopg.Error:
+                    pass
+            logger.warning(
+                "slow query (%.1f ms): %s\n  plan: %s",
+                elapsed * 1000,
+                " ".join(sql.split()),
+                " | ".join(p.strip() for p in plan) or "n/a",
+            )
+
+
+def connect(url, instrument=False, slow_query_ms=None):
+    if psycopg is None:
+        raise RuntimeError("DB_BACKEND is 'postgres' but psycopg is not installed")
+    raw = psycopg.connect(url, autocommit=True)
+    # timestamps are stored as UTC without a time zone, as in SQLite, and
+    # read back as text in the same format; JSON rows stay encoded
+    raw.execute("SET TIME ZONE 'UTC'")
+    raw.execute("SET datestyle = 'ISO, YMD'")
+    for name in ("timestamp", "date", "json"):
+        raw.adapters.register_loader(name, TextLoader)
+    return Connection(raw, instrument, slow_query_ms)
+
+
+class PostgresPool(ConnectionPool):
+    """Per-process pool of Postgres connections with the same interface and
+    stats as the SQLite pool. Postgres handles concurrent writers itself, so
+    ``writer()`` hands out a pooled connection in a transaction instead of
+    one shared writer."""
+
+    def connect(self, isolation_level=None):
+        return connect(self.database, self.instrument, self.slow_query_ms)
+
+    @contextmanager
+    def writer(self):
+        start = time.perf_counter()
+        conn = self.acquire()
+        waited = time.perf_counter() - start
+        with self._lock:
+            self._writer_acquired += 1
+            self._writer_wait_time += waited
+            self._writer_max_wait = max(self._writer_max_wait, waited)
+        try:
+            conn.begin()
+            yield conn
+        finally:
+            self.release(conn)
+
+
+def schema_version(db):
+    if db.execute("SELECT to_regclass('schema_version')").fetchone()[0] is None:
+        return 0
+    row = db.execute("SELECT version FROM schema_version").fetchone()
+    return row[0] if row else 0
+
+
+def pending(db):
+    version = schema_version(db)
+    return [m for m in MIGRATIONS if m.version > version]
+
+
+def migrate(url, target=None):
+    """Apply pending migrations up to ``target``, each in its own transaction
+    under an advisory lock. Returns (migration, seconds) for each applied."""
+    target = LATEST_VERSION if target is None else target
+    applied = []
+    db = connect(url)
+    try:
+        for migration in MIGRATIONS:
+            if migration.version > target:
+                break
+            start = time.perf_counter()
+            with db.raw.transaction():
+                db.execute("SELECT pg_advisory_xact_lock(?)", (MIGRATION_LOCK,))
+                if schema_version(db) >= migration.version:
+                    continue
+                if migration.path.endswith(".sql"):
+                    with open(migration.path, encoding="utf-8") as f:
+                        db.raw.execute(f.read())  # plpgsql bodies: run the script whole
+                else:
+                    importlib.import_module(f"{migration.package}.{migration.version:04d}_{migration.name}").upgrade(db)
+                db.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)")
+                db.execute("DELETE FROM schema_version")
+                db.execute("INSERT INTO schema_version (version) VALUES (?)", (migration.version,))
+            applied.append((migration, time.perf_counter() - start))
+    finally:
+        db.close()
+    return applied
+
+
+# tables copied by copy_from_sqlite, parents first
+COPY_TABLES = (
+    "roles",
+    "users",
+    "categories",
+    "statuses",
+    "images",
+    "complaints",
+    "complaints_archive",
+    "complaint_minhash",
+    "complaint_lsh",
+    "complaint_status_history",
+)
+
+
+# derived tables, filled in bulk after the copy instead of row by row by
+# the triggers; the counters count archived complaints too
+ALL_COMPLAINTS = """(
+        SELECT created_at, category_id, status_id FROM complaints
+        UNION ALL
+        SELECT created_at, category_id, status_id FROM complaints_archive
+    ) AS complaints"""
+DERIVED = (
+    """
+    INSERT INTO complaint_search (complaint_id, document)
+    SELECT id, setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', description), 'B')
+    FROM complaints
+    """,
+    """
+    INSERT INTO complaint_archive_search (complaint_id, document)
+    SELECT id, setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', description), 'B')
+    FROM complaints_archive
+    """,
+    f"""
+    INSERT INTO complaint_status_counts (status_id, count)
+    SELECT status_id, COUNT(*) FROM {ALL_COMPLAINTS} GROUP BY status_id
+    """,
+    f"""
+    INSERT INTO complaint_daily_counts (day, category_id, status_id, count)
+    SELECT CAST(created_at AS date), category_id, status_id, COUNT(*) FROM {ALL_COMPLAINTS} GROUP BY 1, 2, 3
+    """,
+    """
+    INSERT INTO complaint_user_status_counts (user_id, status_id, count)
+    SELECT user_id, status_id, COUNT(*) FROM complaints GROUP BY user_id, status_id
+    UNION ALL
+    SELECT 0, status_id, COUNT(*) FROM complaints GROUP BY status_id
+    """,
+    """
+    INSERT INTO complaint_transition_counts (day, from_status_id, to_status_id, count, total_age_s)
+    SELECT CAST(changed_at AS date), COALESCE(from_status_id, 0), to_status_id, COUNT(*), SUM(COALESCE(age_s, 0))
+    FROM complaint_status_history GROUP BY 1, 2, 3
+    """,
+)
+
+
+def copy_from_sqlite(sqlite_path, url, batch_size=10000, progress=None):
+    """Copy the rows of a SQLite database into an empty Postgres one (after
+    migrating it), in one transaction. Returns {table: rows}."""
+    migrate(url)
+    source = sqlite3.connect(sqlite_path)
+    db = connect(url)
+    copied = {}
+    try:
+        if migrations.schema_version(source) != migrations.LATEST_VERSION:
+            raise RuntimeError(f"{sqlite_path} is not at the latest schema version; run `python manage.py migrate` first")
+        if db.execute("SELECT EXISTS (SELECT 1 FROM complaints) OR EXISTS (SELECT 1 FROM users)").fetchone()[0]:
+            raise RuntimeError("The Postgres database already has users or complaints")
+        with db.raw.transaction():
+            # the seeded reference rows are replaced by the source's
+            for table in ("statuses", "categories", "roles"):
+                db.execute(f"DELETE FROM {table}")
+            for table in ("complaints", "complaints_archive", "complaint_status_history"):
+                db.execute(f"ALTER TABLE {table} DISABLE TRIGGER USER")
+            for table in COPY_TABLES:
+                if source.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is None:
+                    continue
+                source_columns = [row[1] for row in source.execute(f"PRAGMA table_info({table})")]
+                target_columns = {
+                    row[0] for row in db.execute(
+                        "SELECT column_name FROM information_schema.columns WHERE table_name = ?", (table,)
+                    )
+                }
+                columns = [c for c in source_columns if c in target_columns]
+                names = ", ".join(columns)
+                rows = source.execute(f"SELECT {names} FROM {table}")
+                count = 0
+                with db.raw.cursor().copy(f"COPY {table} ({names}) FROM STDIN") as copy:
+                    while True:
+                        batch = rows.fetchmany(batch_size)
+                        if not batch:
+                            break
+                        for row in batch:
+                            copy.write_row(row)
+                        count += len(batch)
+                        if progress:
+                            progress(table, count)
+                copied[table] = count
+                if "id" in columns:
+                    db.execute(
+                        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {table}"
+                    )
+            for sql in DERIVED:
+                db.execute(sql)
+            db.execute("SET CONSTRAINTS ALL IMMEDIATE")  # check duplicate_of now, before altering complaints again
+            for table in ("complaints", "complaints_archive", "complaint_status_history"):
+                db.execute(f"ALTER TABLE {table} ENABLE TRIGGER USER")
+        db.execute("ANALYZE")
+    finally:
+        source.close()
+        db.close()
+    return copied
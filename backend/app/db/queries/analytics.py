@@ -0,0 +1,62 @@
+from app.db import get_db
+from app.db.dialect import fragment
+
+# Row sources for the analytics snapshots (app/utils/analytics.py): complaints
+# past an id watermark, archived ones included, and the complaints changed
+# since a complaint_events watermark. Status changes are the only updates the
+# snapshot columns see, and every one of them is in the change log; archiving
+# moves a complaint without changing it. They read a replica when there is a
+# fresh one: a refresh reads the watermarks and the rows from one snapshot.
+
+
+def snapshot_columns():
+    epoch = fragment("epoch")
+    return f"""
+        id,
+        category_id,
+        status_id,
+        {epoch.format("created_at")},
+        {epoch.format("COALESCE(updated_at, created_at)")},
+        lat,
+        lon
+    """
+
+
+def iter_complaints_after(after_id, batch_size=50000):
+    """Yield batches of snapshot rows past ``after_id``, in id order."""
+    db = get_db(replica=True)
+    columns = snapshot_columns()
+    sql = f"""
+        SELECT * FROM (SELECT {columns} FROM complaints WHERE id > ? ORDER BY id LIMIT ?) AS hot
+        UNION ALL
+        SELECT * FROM (SELECT {columns} FROM complaints_archive WHERE id > ? ORDER BY id LIMIT ?) AS archived
+        ORDER BY 1 LIMIT ?
+    """
+    while True:
+        rows = db.execute(sql, (after_id, batch_size, after_id, batch_size, batch_size)).fetchall()
+        if rows:
+            yield rows
+            after_id = rows[-1][0]
+        if len(rows) < batch_size:
+            return
+
+
+def get_changed_complaints(after_event_id, max_id):
+    """Snapshot rows of complaints up to ``max_id`` that changed status after
+    event ``after_event_id``, and the newest event id read."""
+    db = get_db(replica=True)
+    last_event_id = db.execute("SELECT MAX(id) FROM complaint_events").fetchone()[0] or 0
+    if last_event_id <= after_event_id:
+        return [], after_event_id
+    rows = db.execute(
+        f"""
+        SELECT {snapshot_columns()} FROM complaints
+        WHERE id IN (
+            SELECT complaint_id FROM complaint_events
+            WHERE id > ? AND id <= ? AND from_status_id IS NOT NULL AND complaint_id <= ?
+        )
+        ORDER BY id
+        """,
+        (after_event_id, last_event_id, max_id),
+    ).fetchall()
+    return rows, last_event_id
@@ -0,0 +1,103 @@
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from app.db import get_db, transaction
+from app.db.dialect import fragment
+from app.db.queries.other import get_status_id
+from app.utils.cache import invalidate
+
+# Hot/cold split of the complaints: closed complaints that have not changed
+# for a while are moved, a batch per transaction, from complaints to
+# complaints_archive, which has its own search index. Listings, search and
+# the map then only read the complaints still being worked on; lookups by id
+# and search fall through to the archive when asked (see complaints.py). The
+# stats counters still count archived complaints, and their status history
+# and events stay where they are.
+
+CLOSED_STATUSES = ("Resolved", "Rejected")
+COLUMNS = (
+    "id",
+    "user_id",
+    "category_id",
+    "status_id",
+    "title",
+    "description",
+    "image_url",
+    "location",
+    "created_at",
+    "updated_at",
+    "lat",
+    "lon",
+    "duplicate_of",
+    "image_sha256",
+)
+
+
+def cutoff(days):
+    """updated_at before which a closed complaint is archived."""
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def count_archivable(days):
+    db = get_db()
+    statuses = [get_status_id(s) for s in CLOSED_STATUSES]
+    placeholders = ", ".join("?" * len(statuses))
+    return db.execute(
+        f"SELECT COUNT(*) FROM complaints WHERE status_id IN ({placeholders}) AND updated_at < ?",
+        (*statuses, cutoff(days)),
+    ).fetchone()[0]
+
+
+def archive_batch(status_id, before, after_id=0, batch_size=500):
+    """Move up to ``batch_size`` complaints in ``status_id`` last changed
+    before ``before``, with ids past ``after_id``, in one transaction.
+    Returns ``(moved, last_id)``: how many were moved and the last id looked
+    at, None once there are no more.
+
+    The DELETE checks the conditions again, so a complaint reopened
+    meanwhile (on Postgres, by another transaction) stays; the deleted rows
+    are what gets archived."""
+    columns = ", ".join(COLUMNS)
+    with transaction() as db:
+        ids = [
+            row[0] for row in db.execute(
+                "SELECT id FROM complaints WHERE status_id = ? AND id > ? AND updated_at < ? ORDER BY id LIMIT ?",
+                (status_id, after_id, before, batch_size),
+            )
+        ]
+        if not ids:
+            return 0, None
+        rows = db.execute(
+            f"""
+            DELETE FROM complaints
+            WHERE id IN ({fragment('id_list')}) AND status_id = ? AND updated_at < ?
+            RETURNING {columns}
+            """,
+            (json.dumps(ids), status_id, before),
+        ).fetchall()
+        db.executemany(
+            f"INSERT INTO complaints_archive ({columns}) VALUES ({', '.join('?' * len(COLUMNS))})",
+            [tuple(row) for row in rows],
+        )
+    return len(rows), ids[-1]
+
+
+def archive_complaints(days, batch_size=500):
+    """Archive every closed complaint not changed for ``days`` days, batch
+    by batch so writers are held up for one batch at most. Safe to stop and
+    run again. Returns ``{"archived", "batches", "elapsed_s"}``."""
+    start = time.perf_counter()
+    before = cutoff(days)
+    archived = batches = 0
+    for status in CLOSED_STATUSES:
+        status_id = get_status_id(status)
+        after_id = 0
+        while True:
+            moved, after_id = archive_batch(status_id, before, after_id, batch_size)
+            if after_id is None:
+                break
+            # cached details of the moved complaints are stale now
+            invalidate("complaints")
+            archived += moved
+            batches += 1
+    return {"archived": archived, "batches": batches, "elapsed_s": round(time.perf_counter() - start, 2)}
@@ -1,48 +1,205 @@
-from app.db import get_db
-from app.db.queries.users import is_admin
+import json
+import re
+from contextlib import contextmanager
+from app.db import get_db, transaction
+from app.db.dialect import backend, fragment
+from app.db.queries import duplicates, events, history
+from app.db.queries.other import get_all_statuses, get_status_id
+from app.utils import sse
+from app.utils.cache import cached, invalidate
+from app.utils.geo import parse_location
+from app.utils.similarity import minhash
 
 
 def create_complaint(
-    user_id, category_id, title, description, image_url, location, status="Pending"
+    user_id, category_id, title, description, image_url, location, status="Pending", image_sha256=None
 ):
-    # get Pending status id
-    db = get_db()
-    # insert complaint
-    cursor = db.execute(
-        """
-        INSERT INTO complaints (
-            user_id,
-            category_id,
-            title,
-            description,
-            image_url,
-            location,
-            status_id
-        ) VALUES (
-            ?, ?, ?, ?, ?, ?, 
-            (SELECT id FROM statuses WHERE name = ? LIMIT 1)
+    # insert complaint with the Pending status id; coordinates in the
+    # location text are stored as lat/lon for the geo queries, and the text's
+    # signature goes into the duplicate index. An uploaded photo
+    # (image_sha256) becomes the complaint's image_url. Subscribers of the
+    # live feed hear about it once committed.
+    if image_sha256:
+        image_url = f"/api/images/{image_sha256}"
+    lat, lon = parse_location(location)
+    signature = minhash(title, description)
+    status_id = get_status_id(status)
+    with transaction() as db:
+        cursor = db.execute(
+            """
+            INSERT INTO complaints (
+                user_id,
+                category_id,
+                title,
+                description,
+                image_url,
+                location,
+                status_id,
+                lat,
+                lon,
+                image_sha256
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            RETURNING id, CAST(created_at AS TEXT)
+            """,
+            (
+                user_id,
+                category_id,
+                title,
+                description,
+                image_url,
+                location,
+                status_id,
+                lat,
+                lon,
+                image_sha256,
+            ),
         )
-        """,
-        (user_id, category_id, title, description, image_url, location, status),
-    )
-    db.commit()
-    return cursor.lastrowid
+        complaint_id, created_at = cursor.fetchone()
+        duplicates.index_complaint(db, complaint_id, category_id, created_at, signature)
+        events.record_created(db, complaint_id, user_id, status_id)
+    invalidate("stats")
+    sse.notify()
+    return complaint_id
+
+
+# insert a batch of already validated complaints in one transaction; rows are
+# (user_id, category_id, status_id, title, description, image_url, location, created_at, lat, lon)
+def bulk_insert_complaints(rows):
+    since = duplicates.window_start()
+    with transaction() as db:
+        first_id = db.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM complaints").fetchone()[0]
+        db.executemany(
+            """
+            INSERT INTO complaints (
+                user_id,
+                category_id,
+                status_id,
+                title,
+                description,
+                image_url,
+                location,
+                created_at,
+                updated_at,
+                lat,
+                lon
+            ) VALUES (
+                ?1, ?2, ?3, ?4, ?5, ?6, ?7,
+                COALESCE(?8, CURRENT_TIMESTAMP),
+                COALESCE(?8, CURRENT_TIMESTAMP),
+                ?9, ?10
+            )
+            """,
+            rows,
+        )
+        # only complaints recent enough to be offered as duplicates get
+        # signatures; historical dumps import at full speed
+        duplicates.index_complaints(db, db.execute(
+            """
+            SELECT id, category_id, created_at, title, description FROM complaints
+            WHERE id >= ? AND created_at >= ?
+            """,
+            (first_id, since),
+        ).fetchall())
+    invalidate("stats")
+
+
+@contextmanager
+def deferred_search_indexing():
+    """Skip the per-row FTS insert trigger for the block, then rebuild the index once.
+
+    Complaints created by other writers meanwhile are picked up by the rebuild.
+    On Postgres this is a no-op: new GIN entries go to the index's pending
+    list and are merged in bulk anyway.
+    """
+    if backend() == "postgres":
+        yield
+        return
+    with transaction() as db:
+        trigger = db.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'complaints_ai'"
+        ).fetchone()
+        db.execute("DROP TRIGGER IF EXISTS complaints_ai")
+    try:
+        yield
+    finally:
+        with transaction() as db:
+            if trigger:
+                db.execute(trigger[0])
+            db.execute("INSERT INTO complaint_search(complaint_search) VALUES ('rebuild')")
+
+
+# URL of a resized variant of an uploaded photo (see app/routes/images.py)
+def variant_url_sql(variant):
+    return f"CASE WHEN complaints.image_sha256 IS NOT NULL THEN '/api/images/' || complaints.image_sha256 || '/{variant}' END"
+
+
+# Listing projections: name -> SQL expression. Lists send the summary (what
+# a list row shows, with a short excerpt instead of the description, and a
+# thumbnail rather than the full-size photo), the detail view sends everything.
+SUMMARY_FIELDS = {
+    "id": "complaints.id",
+    "user_id": "complaints.user_id",
+    "user_name": "users.name",
+    "category_id": "complaints.category_id",
+    "category_name": "categories.name",
+    "status": "statuses.name",
+    "title": "complaints.title",
+    "excerpt": "substr(complaints.description, 1, 160)",
+    "thumbnail_url": variant_url_sql("thumbnail"),
+    "created_at": "CAST(complaints.created_at AS TEXT)",
+}
+DETAIL_FIELDS = {
+    "id": "complaints.id",
+    "user_id": "complaints.user_id",
+    "user_name": "users.name",
+    "category_id": "complaints.category_id",
+    "category_name": "categories.name",
+    "status_id": "complaints.status_id",
+    "status": "statuses.name",
+    "title": "complaints.title",
+    "description": "complaints.description",
+    "image_url": "complaints.image_url",
+    "thumbnail_url": variant_url_sql("thumbnail"),
+    "medium_url": variant_url_sql("medium"),
+    "location": "complaints.location",
+    "lat": "complaints.lat",
+    "lon": "complaints.lon",
+    "duplicate_of": "complaints.duplicate_of",
+    "created_at": "CAST(complaints.created_at AS TEXT)",
+    "updated_at": "CAST(complaints.updated_at AS TEXT)",
+}
+VIEWS = {"summary": SUMMARY_FIELDS, "detail": DETAIL_FIELDS}
+
+
+# one JSON object per row, encoded by the database instead of via a Python dict
+def json_object_sql(fields):
+    if backend() == "postgres":
+        # row_to_json writes compact JSON with the keys in order
+        columns = ", ".join(f'{expr} AS "{name}"' for name, expr in fields.items())
+        return f"(SELECT row_to_json(fields) FROM (SELECT {columns}) AS fields)"
+    return "json_object(" + ", ".join(f"'{name}', {expr}" for name, expr in fields.items()) + ")"
 
 
 # get complaints by user id and filter by status, view a specific complaint by user id and complaint id
 
 
-def get_complaints_by_user_id(user_id, page=1, per_page=10, status=None):
-    offset = (page - 1) * per_page
+def get_complaints_by_user_id(
+    user_id, role, per_page=10, status=None, after=None, fields=SUMMARY_FIELDS, counts=False
+):
+    """Newest-first page of complaints, seeking past ``after`` = (created_at, id).
+
+    Returns ``(rows, next_after)`` where rows are JSON object texts of
+    ``fields`` and ``next_after`` is the sort key of the last row when
+    another page may follow, else None. With ``counts``, returns
+    ``(rows, next_after, counts)`` with the listing's complaints per status
+    (as status_counts()), read by the same statement as the page.
+    """
     db = get_db()
-    is_user_admin = is_admin(user_id)
-
-    select_clause = """
-        SELECT 
-            complaints.*, 
-            statuses.name as status, 
-            categories.name as category_name, 
-            users.name as user_name
+
+    # the counters are read once per statement, not per row
+    counts_clause = f", {status_counts_sql()}" if counts else ""
+    select_clause = f"""
+        SELECT {json_object_sql(fields)}, complaints.created_at, complaints.id{counts_clause}
         FROM complaints
         JOIN statuses ON complaints.status_id = statuses.id
         JOIN categories ON complaints.category_id = categories.id
@@ -50,88 +207,388 @@ def get_complaints_by_user_id(user_id, page=1, per_page=10, status=None):
     """
 
     where_clauses = []
-    params = []
+    params = [user_id if role != "admin" else 0] if counts else []
 
-    if not is_user_admin:
+    if role != "admin":
         where_clauses.append("complaints.user_id = ?")
         params.append(user_id)
     if status:
-        where_clauses.append("statuses.name = ?")
-        params.append(status)
+        # filter on status_id so the (status_id, created_at, id) index is usable
+        where_clauses.append("complaints.status_id = ?")
+        params.append(get_status_id(status))
+    if after:
+        where_clauses.append("(complaints.created_at, complaints.id) < (?, ?)")
+        params.extend(after)
 
     if where_clauses:
         select_clause += " WHERE " + " AND ".join(where_clauses)
 
-    select_clause += " LIMIT ? OFFSET ?"
-    params.extend([per_page, offset])
+    select_clause += " ORDER BY complaints.created_at DESC, complaints.id DESC LIMIT ?"
+    params.append(per_page)
 
-    return db.execute(select_clause, tuple(params)).fetchall()
+    rows = db.execute(select_clause, tuple(params)).fetchall()
+    next_after = None
+    if len(rows) == per_page:
+        next_after = (rows[-1][1], rows[-1][2])
+    if counts:
+        named = _named_counts(rows[0][3]) if rows else status_counts(user_id if role != "admin" else None)
+        return [row[0] for row in rows], next_after, named
+    return [row[0] for row in rows], next_after
 
 
-def get_complaint_by_user_id_and_complaint_id(user_id, complaint_id):
-    db = get_db()
-    base_query = """
+# Listing counters (complaint_user_status_counts, kept by triggers): the
+# complaints of a user, or of everyone as user 0, per status id, as a JSON
+# object text
+def status_counts_sql():
+    return f"""(
+        SELECT {fragment("json_object_agg").format("status_id", "count")}
+        FROM complaint_user_status_counts WHERE user_id = ?
+    )"""
+
+
+def _named_counts(counts_json):
+    counts = json.loads(counts_json) if counts_json else {}
+    return {status["name"]: counts.get(str(status["id"]), 0) for status in get_all_statuses()}
+
+
+def status_counts(user_id=None):
+    """Complaints of ``user_id`` (None: everyone's) per status name, as the
+    listings see them (archived ones left out)."""
+    row = get_db().execute(f"SELECT {status_counts_sql()}", (user_id or 0,)).fetchone()
+    return _named_counts(row[0])
+
+
+def get_complaint(complaint_id):
+    """Complaint as a dict with its status, category and user names, or None.
+    Cached per id in the "complaints" namespace, which writes changing
+    complaints invalidate; the dict is shared, copy it before changing it."""
+    return cached("complaints", complaint_id, lambda: _get_complaint(complaint_id))
+
+
+def get_archived_complaint(complaint_id):
+    """The same for an archived complaint, which also has ``archived_at``."""
+    return cached("complaints", f"archived:{complaint_id}", lambda: _get_complaint(complaint_id, "complaints_archive"))
+
+
+def _get_complaint(complaint_id, table="complaints"):
+    row = get_db().execute(
+        f"""
         SELECT complaints.*, statuses.name as status, categories.name as category_name, users.name as user_name
-        FROM complaints
+        FROM {table} AS complaints
         JOIN statuses ON complaints.status_id = statuses.id
         JOIN categories ON complaints.category_id = categories.id
         JOIN users ON complaints.user_id = users.id
         WHERE complaints.id = ?
-    """
-    params = [complaint_id]
-    if not is_admin(user_id):
-        base_query += " AND complaints.user_id = ?"
-        params.append(user_id)
-    return db.execute(base_query, tuple(params)).fetchone()
+        """,
+        (complaint_id,),
+    ).fetchone()
+    return dict(row) if row else None
+
+
+def get_complaint_by_user_id_and_complaint_id(user_id, complaint_id, role, archived=False):
+    # users only see their own complaints; with archived, archived ones too
+    complaint = get_complaint(complaint_id)
+    if complaint is None and archived:
+        complaint = get_archived_complaint(complaint_id)
+    if complaint is None or (role != "admin" and complaint["user_id"] != user_id):
+        return None
+    return complaint
 
 
 def total_complaints(user_id=None, status=None):
-    db = get_db()
-    if user_id:
-        query = """
-            SELECT 
-                COUNT(*) 
-            FROM complaints 
-            WHERE user_id = ?
-        """
-        return db.execute(query, (user_id,)).fetchone()[0]
-    elif status:
-        query = """
-            SELECT 
-                COUNT(*) 
-            FROM complaints 
-            WHERE status_id = (SELECT id FROM statuses WHERE name = ? LIMIT 1)
-        """
-        return db.execute(query, (status,)).fetchone()[0]
-    else:
-        query = """
-            SELECT COUNT(*) FROM complaints
-        """
-        return db.execute(query).fetchone()[0]
+    """Complaints of ``user_id`` (None: everyone's), in ``status`` if given,
+    from the listing counters."""
+    counts = status_counts(user_id)
+    return counts.get(status, 0) if status else sum(counts.values())
 
 
-def update_complaint(complaint_id, status):
-    db = get_db()
-    db.execute(
-        "UPDATE complaints SET status_id = (SELECT id FROM statuses WHERE name = ? LIMIT 1) WHERE id = ?",
-        (status, complaint_id),
-    )
-    db.commit()
+def update_complaint(complaint_id, status, changed_by=None):
+    return update_statuses([complaint_id], status, changed_by)
 
 
-def search_complaints(query, user_id=None):
-    # add category name and user name to the query
-    db = get_db()
-    base_sql = """
-        SELECT complaints.*, statuses.name as status, categories.name as category_name, users.name as user_name FROM complaint_search
-        JOIN complaints ON complaint_search.rowid = complaints.id
+def update_statuses(complaint_ids, status, changed_by=None, from_status=None):
+    """Move complaints to ``status`` in one transaction, recording each change
+    in the status history and the live feed's change log. With ``from_status`` only complaints currently in
+    that status move. Merged duplicates follow the complaint they were merged
+    into.
+
+    Returns ``{"updated": [...], "unchanged": [...], "missing": [...],
+    "rows": n}`` where ``rows`` also counts the duplicates that followed.
+    """
+    status_id = get_status_id(status)
+    from_status_id = get_status_id(from_status) if from_status else None
+    complaint_ids = list(dict.fromkeys(complaint_ids))
+    with transaction() as db:
+        current = {
+            row["id"]: row["status_id"]
+            for row in db.execute(
+                f"SELECT id, status_id FROM complaints WHERE id IN ({fragment('id_list')})",
+                (json.dumps(complaint_ids),),
+            )
+        }
+        result = {"updated": [], "unchanged": [], "missing": [], "rows": 0}
+        for complaint_id in complaint_ids:
+            if complaint_id not in current:
+                result["missing"].append(complaint_id)
+            elif current[complaint_id] == status_id or from_status_id not in (None, current[complaint_id]):
+                result["unchanged"].append(complaint_id)
+            else:
+                result["updated"].append(complaint_id)
+
+        if result["updated"]:
+            moving = json.dumps(result["updated"])
+            where = f"id IN ({fragment('id_list')}) OR duplicate_of IN ({fragment('id_list')})"
+            history.record_transitions(db, where, (moving, moving), status_id, changed_by)
+            events.record_status_changes(db, where, (moving, moving), status_id)
+            cursor = db.execute(
+                f"""
+                UPDATE complaints SET status_id = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE ({where}) AND status_id <> ?
+                """,
+                (status_id, moving, moving, status_id),
+            )
+            result["rows"] = cursor.rowcount
+    if result["rows"]:
+        invalidate("stats", "complaints")
+        sse.notify()
+    return result
+
+
+# turn free text into an FTS5 query: every word must match, the last one as a
+# prefix (search-as-you-type); quoting keeps user input out of FTS syntax
+def build_match_query(text):
+    terms = re.findall(r"\w+(?:'\w+)*", text or "")
+    if not terms:
+        return None
+    quoted = ['"' + term + '"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+# the same for a Postgres tsquery: 'word' & 'last':*
+def build_tsquery(text):
+    terms = re.findall(r"\w+(?:'\w+)*", text or "")
+    if not terms:
+        return None
+    quoted = ["'" + term.replace("'", "''") + "'" for term in terms]
+    quoted[-1] += ":*"
+    return " & ".join(quoted)
+
+
+SEARCH_RANK = "bm25(complaint_search, 10.0, 1.0)"  # title matches weigh 10x
+SEARCH_FIELDS = {
+    **{name: expr for name, expr in SUMMARY_FIELDS.items() if name != "excerpt"},
+    "title_highlight": "highlight(complaint_search, 0, '<mark>', '</mark>')",
+    "snippet": "snippet(complaint_search, 1, '<mark>', '</mark>', '…', 24)",
+    "rank": SEARCH_RANK,
+}
+# Postgres: titles are weighted A, descriptions B; negated so that, as with
+# bm25(), lower is better. ts_rank() is a real, whose text form does not
+# read back as the same value, so cursors would never get past a tie: it is
+# widened to a double first.
+PG_SEARCH_RANK = "-CAST(ts_rank('{0.1, 0.2, 0.1, 1.0}', complaint_search.document, query) AS double precision)"
+PG_SEARCH_FIELDS = {
+    **SEARCH_FIELDS,
+    "title_highlight": "ts_headline('english', complaints.title, query, 'StartSel=<mark>, StopSel=</mark>, HighlightAll=true')",
+    "snippet": (
+        "ts_headline('english', complaints.description, query, "
+        "'StartSel=<mark>, StopSel=</mark>, MaxWords=24, MinWords=12, MaxFragments=1, FragmentDelimiter=…')"
+    ),
+    "rank": PG_SEARCH_RANK,
+}
+SEARCH = {
+    "sqlite": {
+        "match": build_match_query,
+        "rank": SEARCH_RANK,
+        "fields": SEARCH_FIELDS,
+        "source": "complaint_search JOIN complaints ON complaint_search.rowid = complaints.id",
+        "where": "complaint_search MATCH ?",
+    },
+    "postgres": {
+        "match": build_tsquery,
+        "rank": PG_SEARCH_RANK,
+        "fields": PG_SEARCH_FIELDS,
+        "source": (
+            "to_tsquery('english', ?) AS query, complaint_search"
+            " JOIN complaints ON complaints.id = complaint_search.complaint_id"
+        ),
+        "where": "complaint_search.document @@ query",
+    },
+}
+
+
+# the same over the archive: its own search index, complaints_archive
+# standing in for complaints, and when each row was archived
+def _archive_search(search):
+    def archived(sql):
+        return sql.replace("complaint_search", "complaint_archive_search")
+
+    return {
+        **search,
+        "rank": archived(search["rank"]),
+        "fields": {
+            **{name: archived(expr) for name, expr in search["fields"].items()},
+            "archived_at": "CAST(complaints.archived_at AS TEXT)",
+        },
+        "source": archived(search["source"]).replace("JOIN complaints ON", "JOIN complaints_archive AS complaints ON"),
+        "where": archived(search["where"]),
+    }
+
+
+ARCHIVE_SEARCH = {name: _archive_search(search) for name, search in SEARCH.items()}
+
+
+def _search_sql(search, match, user_id, role, after, status, category_id, created_from, created_to):
+    rank = search["rank"]
+    sql = f"""
+        SELECT {json_object_sql(search["fields"])}, {rank} as rank, complaints.id
+        FROM {search["source"]}
         JOIN statuses ON complaints.status_id = statuses.id
         JOIN categories ON complaints.category_id = categories.id
         JOIN users ON complaints.user_id = users.id
-        WHERE complaint_search MATCH ?
+        WHERE {search["where"]}
     """
-    params = [query]
-    if user_id is not None and not is_admin(user_id):
-        base_sql += " AND complaints.user_id = ?"
+    params = [match]
+    if user_id is not None and role != "admin":
+        sql += " AND complaints.user_id = ?"
         params.append(user_id)
-    return db.execute(base_sql, params).fetchall()
+    if status:
+        sql += " AND complaints.status_id = ?"
+        params.append(get_status_id(status))
+    if category_id:
+        sql += " AND complaints.category_id = ?"
+        params.append(category_id)
+    if created_from:
+        sql += " AND complaints.created_at >= ?"
+        params.append(created_from)
+    if created_to:
+        sql += f" AND complaints.created_at < {fragment('next_day')}"
+        params.append(created_to)
+    if after:
+        sql += f" AND ({rank} > ? OR ({rank} = ? AND complaints.id > ?))"
+        params.extend([after[0], after[0], after[1]])
+    return sql, params
+
+
+def search_complaints(
+    query,
+    user_id=None,
+    role=None,
+    limit=20,
+    after=None,
+    status=None,
+    category_id=None,
+    created_from=None,
+    created_to=None,
+    archived=False,
+):
+    """Best-first page of complaints matching ``query``, seeking past ``after`` = (rank, id).
+
+    Returns ``(rows, next_after)`` like get_complaints_by_user_id, rows being
+    JSON texts of SEARCH_FIELDS: a highlighted title and a description
+    snippet instead of the full text. With ``archived`` the archive is
+    searched too, each index ranking its own matches.
+    """
+    match = SEARCH[backend()]["match"](query)
+    if match is None:
+        return [], None
+
+    db = get_db()
+    filters = (match, user_id, role, after, status, category_id, created_from, created_to)
+    base_sql, params = _search_sql(SEARCH[backend()], *filters)
+    base_sql += " ORDER BY rank, complaints.id LIMIT ?"
+    params.append(limit)
+    if archived:
+        archive_sql, archive_params = _search_sql(ARCHIVE_SEARCH[backend()], *filters)
+        base_sql = f"""
+            SELECT * FROM ({base_sql}) AS hot
+            UNION ALL
+            SELECT * FROM ({archive_sql} ORDER BY rank, complaints.id LIMIT ?) AS archived
+            ORDER BY 2, 3 LIMIT ?
+        """
+        params += [*archive_params, limit, limit]
+
+    rows = db.execute(base_sql, params).fetchall()
+    next_after = None
+    if len(rows) == limit:
+        next_after = (rows[-1][1], rows[-1][2])
+    return [row[0] for row in rows], next_after
+
+
+# Export columns: name -> SQL expression. Category and status are exported
+# by name but selected as ids and resolved from the in-memory reference data,
+# so only the user columns need a join.
+EXPORT_COLUMNS = {
+    "id": "complaints.id",
+    "user_id": "complaints.user_id",
+    "user_name": "users.name",
+    "user_email": "users.email",
+    "category": "complaints.category_id",
+    "status": "complaints.status_id",
+    "title": "complaints.title",
+    "description": "complaints.description",
+    "image_url": "complaints.image_url",
+    "location": "complaints.location",
+    "lat": "complaints.lat",
+    "lon": "complaints.lon",
+    "created_at": "complaints.created_at",
+    "updated_at": "complaints.updated_at",
+}
+
+
+def iter_complaints_for_export(
+    db,
+    columns,
+    status=None,
+    category_id=None,
+    created_from=None,
+    created_to=None,
+    chunk_size=10000,
+    batch_size=500,
+):
+    """Yield lists of row tuples (id first, then ``columns``) in id order.
+
+    Rows are read ``chunk_size`` at a time by seeking past the last id, each
+    chunk fetched ``batch_size`` rows at a time, so neither the process nor
+    a long read snapshot grows with the size of the export. On Postgres the
+    query runs once through a server-side cursor instead, which already
+    sends rows as they are fetched.
+    """
+    select = ", ".join(EXPORT_COLUMNS[c] for c in columns)
+    sql = f"SELECT complaints.id, {select} FROM complaints"
+    if any(c.startswith("user_") and c != "user_id" for c in columns):
+        sql += " LEFT JOIN users ON complaints.user_id = users.id"
+    sql += " WHERE complaints.id > ?"
+
+    params = []
+    if status:
+        sql += " AND complaints.status_id = ?"
+        params.append(get_status_id(status))
+    if category_id:
+        sql += " AND complaints.category_id = ?"
+        params.append(category_id)
+    if created_from:
+        sql += " AND complaints.created_at >= ?"
+        params.append(created_from)
+    if created_to:
+        sql += f" AND complaints.created_at < {fragment('next_day')}"
+        params.append(created_to)
+    sql += " ORDER BY complaints.id"
+    if backend() == "postgres":
+        yield from db.stream(sql, (0, *params), batch_size)
+        return
+    sql += " LIMIT ?"
+
+    last_id = 0
+    while True:
+        cursor = db.execute(sql, (last_id, *params, chunk_size))
+        fetched = 0
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            fetched += len(rows)
+            last_id = rows[-1][0]
+            yield rows
+        if fetched < chunk_size:
+            return
@@ -0,0 +1,202 @@
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from app.db import get_db, transaction
+from app.db.queries import events, history
+from app.db.queries.other import get_status_id
+from app.utils import similarity, sse
+from app.utils.cache import invalidate
+from app.utils.geo import haversine_m
+
+# Near-duplicate lookup over complaint_minhash (one signature per complaint)
+# and complaint_lsh (one row per band bucket). Candidates come from shared
+# buckets; their signatures then give the estimated text similarity.
+
+OPEN_STATUSES = ("Pending", "In Progress")
+MAX_CANDIDATES = 200
+
+
+def window_start(days=None):
+    """created_at of the oldest complaint still offered as a duplicate."""
+    if days is None:
+        days = current_app.config["DUPLICATE_WINDOW_DAYS"]
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def index_complaint(db, complaint_id, category_id, created_at, signature):
+    db.execute(
+        """
+        INSERT INTO complaint_minhash (complaint_id, signature) VALUES (?, ?)
+        ON CONFLICT (complaint_id) DO UPDATE SET signature = excluded.signature
+        """,
+        (complaint_id, similarity.to_blob(signature)),
+    )
+    db.executemany(
+        "INSERT INTO complaint_lsh (bucket, created_at, complaint_id) VALUES (?, ?, ?) ON CONFLICT DO NOTHING",
+        [(bucket, created_at, complaint_id) for bucket in similarity.band_buckets(signature, category_id)],
+    )
+
+
+# rows are (id, category_id, created_at, title, description)
+def index_complaints(db, rows):
+    for complaint_id, category_id, created_at, title, description in rows:
+        index_complaint(db, complaint_id, category_id, created_at, similarity.minhash(title, description))
+
+
+def find_duplicates(
+    signature,
+    category_id,
+    lat=None,
+    lon=None,
+    exclude=None,
+    since=None,
+    radius_m=None,
+    threshold=None,
+    limit=None,
+):
+    """Open, unmerged complaints of the category created since ``since``
+    whose text is at least ``threshold`` similar, most similar first.
+
+    When both complaints have coordinates they must also lie within
+    ``radius_m`` of each other.
+    """
+    config = current_app.config
+    since = since or window_start()
+    radius_m = config["DUPLICATE_RADIUS_M"] if radius_m is None else radius_m
+    threshold = config["DUPLICATE_THRESHOLD"] if threshold is None else threshold
+    limit = limit or config["DUPLICATE_LIMIT"]
+
+    buckets = similarity.band_buckets(signature, category_id)
+    statuses = [get_status_id(s) for s in OPEN_STATUSES]
+    # rank candidates by shared buckets on the index alone (pairs that share
+    # more bands are more similar), then look up only the best of them
+    rows = get_db().execute(
+        f"""
+        WITH candidates AS MATERIALIZED (
+            SELECT complaint_id, COUNT(*) as bands
+            FROM complaint_lsh
+            WHERE bucket IN ({', '.join('?' * len(buckets))}) AND created_at >= ? AND complaint_id <> ?
+            GROUP BY complaint_id
+            ORDER BY bands DESC, complaint_id DESC
+            LIMIT ?
+        )
+        SELECT
+            complaints.id,
+            complaints.title,
+            complaints.created_at,
+            complaints.lat,
+            complaints.lon,
+            statuses.name as status,
+            complaint_minhash.signature
+        FROM candidates
+        JOIN complaints ON complaints.id = candidates.complaint_id
+        JOIN complaint_minhash ON complaint_minhash.complaint_id = complaints.id
+        JOIN statuses ON complaints.status_id = statuses.id
+        WHERE complaints.status_id IN ({', '.join('?' * len(statuses))})
+            AND complaints.duplicate_of IS NULL
+        """,
+        (*buckets, since, exclude or 0, MAX_CANDIDATES, *statuses),
+    ).fetchall()
+
+    matches = []
+    for row in rows:
+        score = similarity.similarity(signature, similarity.from_blob(row["signature"]))
+        if score < threshold:
+            continue
+        distance = haversine_m(lat, lon, row["lat"], row["lon"])
+        if distance is not None and distance > radius_m:
+            continue
+        matches.append({
+            "id": row["id"],
+            "title": row["title"],
+            "status": row["status"],
+            "created_at": row["created_at"],
+            "similarity": round(score, 2),
+            "distance_m": None if distance is None else round(distance),
+        })
+    matches.sort(key=lambda m: (-m["similarity"], m["distance_m"] is None, m["distance_m"] or 0))
+    return matches[:limit]
+
+
+def find_duplicates_of(complaint_id, **options):
+    """find_duplicates for a stored complaint; None if it has no signature."""
+    row = get_db().execute(
+        """
+        SELECT complaints.category_id, complaints.lat, complaints.lon, complaint_minhash.signature
+        FROM complaints
+        JOIN complaint_minhash ON complaint_minhash.complaint_id = complaints.id
+        WHERE complaints.id = ?
+        """,
+        (complaint_id,),
+    ).fetchone()
+    if row is None:
+        return None
+    return find_duplicates(
+        similarity.from_blob(row["signature"]),
+        row["category_id"],
+        row["lat"],
+        row["lon"],
+        exclude=complaint_id,
+        **options,
+    )
+
+
+def merge_duplicates(merges, changed_by=None):
+    """Merge complaints into others in one transaction.
+
+    ``merges`` maps a complaint id to the ids of its duplicates. Duplicates
+    take the target's status and follow its later status changes; ones that
+    had duplicates of their own hand them over to the target. Status
+    changes are recorded in the status history as made by ``changed_by``, and
+    in the live feed's change log. Raises
+    ValueError for unknown ids or merges that would form a cycle. Returns the
+    number of complaints merged.
+    """
+    targets = set(merges)
+    duplicates = [d for ids in merges.values() for d in ids]
+    if len(set(duplicates)) != len(duplicates):
+        raise ValueError("A complaint can only be merged once")
+    if targets & set(duplicates):
+        raise ValueError("A complaint cannot be both a merge target and a duplicate")
+
+    with transaction() as db:
+        ids = targets | set(duplicates)
+        placeholders = ", ".join("?" * len(ids))
+        found = {
+            row[0] for row in db.execute(f"SELECT id FROM complaints WHERE id IN ({placeholders})", tuple(ids))
+        }
+        missing = sorted(ids - found)
+        if missing:
+            raise ValueError(f"Unknown complaint ids: {', '.join(map(str, missing))}")
+
+        merged = 0
+        for target, group in merges.items():
+            # merging into a merged complaint means merging into its target;
+            # read it per group as earlier groups may have just merged it
+            root, status_id = db.execute(
+                """
+                SELECT COALESCE(target.id, complaints.id), COALESCE(target.status_id, complaints.status_id)
+                FROM complaints LEFT JOIN complaints AS target ON target.id = complaints.duplicate_of
+                WHERE complaints.id = ?
+                """,
+                (target,),
+            ).fetchone()
+            if root in group:
+                raise ValueError(f"Complaint {target} is already a duplicate of {root}")
+            placeholders = ", ".join("?" * len(group))
+            where = f"id IN ({placeholders}) OR duplicate_of IN ({placeholders})"
+            history.record_transitions(db, where, (*group, *group), status_id, changed_by)
+            events.record_status_changes(db, where, (*group, *group), status_id)
+            db.execute(
+                f"""
+                UPDATE complaints SET duplicate_of = ?, status_id = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE {where}
+                """,
+                (root, status_id, *group, *group),
+            )
+            # merged complaints are never offered as duplicates again
+            db.execute(f"DELETE FROM complaint_lsh WHERE complaint_id IN ({placeholders})", tuple(group))
+            db.execute(f"DELETE FROM complaint_minhash WHERE complaint_id IN ({placeholders})", tuple(group))
+            merged += len(group)
+    invalidate("stats", "complaints")
+    sse.notify()
+    return merged
@@ -0,0 +1,82 @@
+from app.db import get_db, transaction
+from app.db.dialect import fragment
+
+# complaint_events is the live feed's change log: the write paths append to
+# it in the transaction that makes the change, the event hub
+# (app/utils/sse.py) reads it back in id order.
+
+
+def record_created(db, complaint_id, user_id, status_id):
+    db.execute(
+        "INSERT INTO complaint_events (complaint_id, user_id, status_id) VALUES (?, ?, ?)",
+        (complaint_id, user_id, status_id),
+    )
+
+
+def record_status_changes(db, where, params, to_status_id):
+    """Log a status change for every complaint matching ``where`` whose
+    status is about to become ``to_status_id``. Call before the UPDATE."""
+    db.execute(
+        f"""
+        INSERT INTO complaint_events (complaint_id, user_id, from_status_id, status_id)
+        SELECT id, user_id, status_id, ?
+        FROM complaints
+        WHERE ({where}) AND status_id <> ?
+        """,
+        (to_status_id, *params, to_status_id),
+    )
+
+
+EVENT_FIELDS = """
+    complaint_events.id,
+    complaint_events.complaint_id,
+    complaint_events.user_id,
+    from_status.name as from_status,
+    status.name as status,
+    CAST(complaint_events.created_at AS TEXT) as created_at
+"""
+
+
+# events after `after_id` in id order, only those of `user_id`'s complaints
+# when given
+def get_events_after(after_id, user_id=None, limit=1000):
+    where = "complaint_events.id > ?"
+    params = [after_id]
+    if user_id is not None:
+        where += " AND complaint_events.user_id = ?"
+        params.append(user_id)
+    return get_db().execute(
+        f"""
+        SELECT {EVENT_FIELDS}
+        FROM complaint_events
+        LEFT JOIN statuses AS from_status ON from_status.id = complaint_events.from_status_id
+        JOIN statuses AS status ON status.id = complaint_events.status_id
+        WHERE {where}
+        ORDER BY complaint_events.id
+        LIMIT ?
+        """,
+        (*params, limit),
+    ).fetchall()
+
+
+# (oldest, newest) event id still in the log, 0 when empty
+def get_event_id_range(replica=False):
+    row = get_db(replica).execute("SELECT MIN(id), MAX(id) FROM complaint_events").fetchone()
+    return row[0] or 0, row[1] or 0
+
+
+def prune_events(days):
+    """Drop events older than ``days``. Ids grow with time, so everything
+    before the first recent event goes, or all of them when none is recent."""
+    with transaction() as db:
+        cursor = db.execute(
+            f"""
+            DELETE FROM complaint_events
+            WHERE id < COALESCE(
+                (SELECT MIN(id) FROM complaint_events WHERE created_at >= {fragment('days_ago')}),
+                (SELECT MAX(id) + 1 FROM complaint_events)
+            )
+            """,
+            (f"-{days} days",),
+        )
+        return cursor.rowcount
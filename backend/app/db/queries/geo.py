@@ -0,0 +1,170 @@
+from app.db import get_db
+from app.db.dialect import fragment
+from app.db.queries.other import get_status_id
+from app.utils.geo import bboxes_around
+
+# Map queries over complaint_geo, an R*Tree of complaint points. The tree
+# narrows the search to a box; exact lat/lon (and distance) checks run on the
+# few candidates it returns.
+
+GEO_SELECT = """
+    SELECT
+        complaints.id,
+        complaints.title,
+        complaints.category_id,
+        complaints.status_id,
+        complaints.lat,
+        complaints.lon,
+        complaints.created_at,
+        statuses.name as status,
+        categories.name as category_name
+"""
+GEO_FROM = """
+    FROM complaint_geo
+    JOIN complaints ON complaints.id = complaint_geo.id
+    JOIN statuses ON complaints.status_id = statuses.id
+    JOIN categories ON complaints.category_id = categories.id
+"""
+# the same rows without the tree, for scans narrowed by the other filters
+SCAN_FROM = """
+    FROM complaints
+    JOIN statuses ON complaints.status_id = statuses.id
+    JOIN categories ON complaints.category_id = categories.id
+"""
+BOX_FILTER = """
+    complaint_geo.max_lat >= ? AND complaint_geo.min_lat <= ?
+    AND complaint_geo.max_lon >= ? AND complaint_geo.min_lon <= ?
+    AND complaints.lat BETWEEN ? AND ? AND complaints.lon BETWEEN ? AND ?
+"""
+# nearest_complaints stops growing its circle here and ranks every match
+FULL_SCAN_RADIUS_M = 1_000_000
+# filters matching at most this many complaints are ranked in one scan
+SCAN_MAX_ROWS = 1000
+
+
+def _filters(box, user_id=None, role=None, statuses=None, category_id=None):
+    if box is None:
+        sql = " WHERE complaints.lat IS NOT NULL"
+        params = []
+    else:
+        min_lat, min_lon, max_lat, max_lon = box
+        sql = " WHERE " + BOX_FILTER
+        params = [min_lat, max_lat, min_lon, max_lon, min_lat, max_lat, min_lon, max_lon]
+    if user_id is not None and role != "admin":
+        sql += " AND complaints.user_id = ?"
+        params.append(user_id)
+    if statuses:
+        sql += f" AND complaints.status_id IN ({', '.join('?' * len(statuses))})"
+        params.extend(get_status_id(s) for s in statuses)
+    if category_id:
+        sql += " AND complaints.category_id = ?"
+        params.append(category_id)
+    return sql, params
+
+
+def complaints_in_bbox(box, limit=500, **filters):
+    """Complaints inside ``box`` = (min_lat, min_lon, max_lat, max_lon), newest first."""
+    where, params = _filters(box, **filters)
+    sql = GEO_SELECT + GEO_FROM + where + " ORDER BY complaints.created_at DESC, complaints.id DESC LIMIT ?"
+    return get_db().execute(sql, (*params, limit)).fetchall()
+
+
+def complaints_within_radius(lat, lon, radius_m, limit=500, **filters):
+    """Complaints within ``radius_m`` meters of (lat, lon), nearest first, with distance_m."""
+    # one box per side of the antimeridian; the tree is only used for plain
+    # box constraints, so they are separate selects rather than an OR
+    selects, params = [], []
+    for box in bboxes_around(lat, lon, radius_m):
+        where, box_params = _filters(box, **filters)
+        selects.append(GEO_SELECT + ", haversine(?, ?, complaints.lat, complaints.lon) as distance_m" + GEO_FROM + where)
+        params.extend([lat, lon, *box_params])
+    sql = (
+        "SELECT * FROM ("
+        + " UNION ALL ".join(selects)
+        + ") AS nearby WHERE distance_m <= ? ORDER BY distance_m, id LIMIT ?"
+    )
+    return get_db().execute(sql, (*params, radius_m, limit)).fetchall()
+
+
+def _count_matching(limit, **filters):
+    where, params = _filters(None, **filters)
+    sql = f"SELECT COUNT(*) FROM (SELECT 1 FROM complaints {where} LIMIT ?) AS matching"
+    return get_db().execute(sql, (*params, limit)).fetchone()[0]
+
+
+def _nearest_by_scan(lat, lon, k, **filters):
+    where, params = _filters(None, **filters)
+    sql = (
+        "SELECT * FROM ("
+        + GEO_SELECT + ", haversine(?, ?, complaints.lat, complaints.lon) as distance_m"
+        + SCAN_FROM + where
+        + ") AS nearby ORDER BY distance_m, id LIMIT ?"
+    )
+    return get_db().execute(sql, (lat, lon, *params, k)).fetchall()
+
+
+def nearest_complaints(lat, lon, k=10, start_radius_m=250, **filters):
+    """The ``k`` complaints nearest to (lat, lon), nearest first, with distance_m.
+
+    Searches circles of growing radius until one holds ``k`` complaints:
+    everything nearer than the k-th hit then lies inside that circle, so the
+    answer is exact while each step only touches a small part of the tree.
+    Filters that match few complaints (a citizen's own, a rare category)
+    would leave the circles short of ``k`` until they cover the map, each
+    step joining every complaint in its box: those complaints are ranked in
+    one scan instead, as they are when even a FULL_SCAN_RADIUS_M circle
+    holds fewer than ``k``.
+    """
+    scoped = filters.get("statuses") or filters.get("category_id") or (
+        filters.get("user_id") is not None and filters.get("role") != "admin"
+    )
+    if scoped and _count_matching(SCAN_MAX_ROWS + 1, **filters) <= SCAN_MAX_ROWS:
+        return _nearest_by_scan(lat, lon, k, **filters)
+    radius = start_radius_m
+    while radius < FULL_SCAN_RADIUS_M:
+        rows = complaints_within_radius(lat, lon, radius, limit=k, **filters)
+        if len(rows) >= k:
+            return rows
+        radius *= 4 if not rows else 2
+    return _nearest_by_scan(lat, lon, k, **filters)
+
+
+def complaint_clusters(box, grid=32, user_id=None, role=None, statuses=None, category_id=None):
+    """Counts per cell of a ``grid`` x ``grid`` division of ``box``, for map markers.
+
+    Each cell reports its complaint count, their mean position and, for a
+    single complaint, its id.
+    """
+    min_lat, min_lon, max_lat, max_lon = box
+    cell_lat = (max_lat - min_lat) / grid or 1e-9
+    cell_lon = (max_lon - min_lon) / grid or 1e-9
+    cells = (min_lat, cell_lat, grid - 1, min_lon, cell_lon, grid - 1)
+
+    if statuses or category_id or (user_id is not None and role != "admin"):
+        where, params = _filters(box, user_id, role, statuses, category_id)
+        source = "complaint_geo JOIN complaints ON complaints.id = complaint_geo.id"
+        lat, lon = "complaints.lat", "complaints.lon"
+    else:
+        # unfiltered (zoomed-out admin maps): aggregate the tree's own
+        # coordinates instead of looking up every complaint row
+        where = """ WHERE complaint_geo.max_lat >= ? AND complaint_geo.min_lat <= ?
+            AND complaint_geo.max_lon >= ? AND complaint_geo.min_lon <= ?"""
+        params = [min_lat, max_lat, min_lon, max_lon]
+        source = "complaint_geo"
+        lat, lon = "complaint_geo.min_lat", "complaint_geo.min_lon"
+
+    cell = fragment("cell")
+    sql = f"""
+        SELECT
+            {cell.format(lat)} as row,
+            {cell.format(lon)} as col,
+            COUNT(*) as count,
+            AVG({lat}) as lat,
+            AVG({lon}) as lon,
+            CASE WHEN COUNT(*) = 1 THEN MIN(complaint_geo.id) END as complaint_id
+        FROM {source}
+        {where}
+        GROUP BY row, col
+        ORDER BY row, col
+    """
+    return get_db().execute(sql, (*cells, *params)).fetchall()
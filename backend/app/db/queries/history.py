@@ -0,0 +1,81 @@
+from app.db import get_db
+from app.db.dialect import fragment
+from app.db.queries.other import bucket_sql
+from app.utils.cache import cached
+
+# Status changes are appended to complaint_status_history by the write paths
+# (single and bulk updates, merges); complaint_transition_counts rolls them
+# up per day for the dashboards.
+
+
+def record_transitions(db, where, params, to_status_id, changed_by=None):
+    """Append a history row for every complaint matching ``where`` whose
+    status is about to become ``to_status_id``. Call before the UPDATE."""
+    db.execute(
+        f"""
+        INSERT INTO complaint_status_history (complaint_id, from_status_id, to_status_id, changed_by, age_s)
+        SELECT id, status_id, ?, ?, {fragment('age_s')}
+        FROM complaints
+        WHERE ({where}) AND status_id <> ?
+        """,
+        (to_status_id, changed_by, *params, to_status_id),
+    )
+
+
+def get_status_history(complaint_id):
+    db = get_db()
+    return db.execute(
+        """
+        SELECT
+            complaint_status_history.id,
+            from_status.name as from_status,
+            to_status.name as to_status,
+            complaint_status_history.changed_by,
+            complaint_status_history.changed_at
+        FROM complaint_status_history
+        LEFT JOIN statuses AS from_status ON from_status.id = complaint_status_history.from_status_id
+        JOIN statuses AS to_status ON to_status.id = complaint_status_history.to_status_id
+        WHERE complaint_status_history.complaint_id = ?
+        ORDER BY complaint_status_history.id
+        """,
+        (complaint_id,),
+    ).fetchall()
+
+
+# status transitions per time bucket over the last `days` days, with the
+# mean complaint age at the transition (e.g. time to resolve)
+def get_transition_stats(bucket="day", days=30):
+    return cached("stats", f"transitions:{bucket}:{days}", lambda: _get_transition_stats(bucket, days))
+
+
+def _get_transition_stats(bucket, days):
+    db = get_db()
+    rows = db.execute(
+        f"""
+        SELECT
+            {bucket_sql(bucket)} as bucket,
+            from_status.name as from_status,
+            to_status.name as to_status,
+            SUM(count) as count,
+            CAST(SUM(total_age_s) AS BIGINT) as total_age_s
+        FROM complaint_transition_counts
+        LEFT JOIN statuses AS from_status ON from_status.id = complaint_transition_counts.from_status_id
+        JOIN statuses AS to_status ON to_status.id = complaint_transition_counts.to_status_id
+        WHERE day >= {fragment('days_ago')}
+        GROUP BY bucket, from_status_id, to_status_id, from_status.name, to_status.name
+        ORDER BY bucket, from_status_id, to_status_id
+        """,
+        (f"-{days} days",),
+    ).fetchall()
+
+    timeline = {}
+    for row in rows:
+        point = timeline.setdefault(row["bucket"], {"bucket": row["bucket"], "total": 0, "transitions": []})
+        point["total"] += row["count"]
+        point["transitions"].append({
+            "from": row["from_status"],
+            "to": row["to_status"],
+            "count": row["count"],
+            "mean_age_hours": round(row["total_age_s"] / row["count"] / 3600, 1),
+        })
+    return list(timeline.values())
@@ -0,0 +1,22 @@
+from app.db import get_db, transaction
+
+
+# Record an uploaded photo; returns False when the same content was already
+# stored (by anyone)
+def record_image(sha256, content_type, size, uploaded_by):
+    with transaction() as db:
+        cursor = db.execute(
+            """
+            INSERT INTO images (sha256, content_type, bytes, uploaded_by) VALUES (?, ?, ?, ?)
+            ON CONFLICT (sha256) DO NOTHING
+            """,
+            (sha256, content_type, size, uploaded_by),
+        )
+        return cursor.rowcount == 1
+
+
+def get_image(sha256):
+    return get_db().execute(
+        "SELECT sha256, content_type, bytes, CAST(created_at AS TEXT) AS created_at FROM images WHERE sha256 = ?",
+        (sha256,),
+    ).fetchone()
@@ -1,28 +1,221 @@
-from app.db import get_db
+import hashlib
+import json
+import time
+from flask import current_app
+from app.db import get_db, transaction
+from app.db.dialect import fragment
+from app.utils.cache import cached, invalidate
+
+
+# Categories and statuses only change through seeding/admin actions, so they
+# are loaded once per process and served from memory. Entries are reloaded
+# after REFERENCE_DATA_TTL seconds so every worker converges after a change.
+class ReferenceData:
+    def __init__(self, categories, statuses):
+        self.categories = [{"id": row["id"], "name": row["name"]} for row in categories]
+        self.statuses = [{"id": row["id"], "name": row["name"]} for row in statuses]
+        self.category_ids = {c["name"]: c["id"] for c in self.categories}
+        self.status_ids = {s["name"]: s["id"] for s in self.statuses}
+        payload = json.dumps([self.categories, self.statuses], sort_keys=True)
+        self.etag = hashlib.sha1(payload.encode()).hexdigest()
+        self.loaded_at = time.monotonic()
+
+
+def load_reference_data():
+    db = get_db()
+    data = ReferenceData(
+        db.execute("SELECT id, name FROM categories ORDER BY id").fetchall(),
+        db.execute("SELECT id, name FROM statuses ORDER BY id").fetchall(),
+    )
+    current_app.extensions["reference_data"] = data
+    return data
+
+
+def get_reference_data():
+    data = current_app.extensions.get("reference_data")
+    if (
+        data is None
+        or not data.statuses  # loaded before the database was seeded
+        or time.monotonic() - data.loaded_at > current_app.config["REFERENCE_DATA_TTL"]
+    ):
+        data = load_reference_data()
+    return data
+
+
+def invalidate_reference_data():
+    current_app.extensions.pop("reference_data", None)
+
 
 # get all categories and their ids
 def get_all_categories():
-    db = get_db()
-    return db.execute("SELECT id, name FROM categories").fetchall()
+    return get_reference_data().categories
 
 def get_all_statuses():
-    db = get_db()
-    return db.execute("SELECT id, name FROM statuses").fetchall()
+    return get_reference_data().statuses
+
+def get_status_id(name):
+    return get_reference_data().status_ids.get(name)
 
-# get stats: total reports, pending, resolved
+def get_category_id(name):
+    return get_reference_data().category_ids.get(name)
+
+# get stats: total reports, pending, resolved (from the materialized counters).
+# The stats are cached in the "stats" namespace, which complaint writes invalidate.
 def get_stats():
+    return cached("stats", "totals", _get_stats)
+
+
+def _get_stats():
     db = get_db()
-    # Get total, pending, and resolved report counts in a single query
-    query = """
-        SELECT
-            COUNT(*) as total_reports,
-            SUM(CASE WHEN status_id = (SELECT id FROM statuses WHERE name = 'Pending' LIMIT 1) THEN 1 ELSE 0 END) as pending_reports,
-            SUM(CASE WHEN status_id = (SELECT id FROM statuses WHERE name = 'Resolved' LIMIT 1) THEN 1 ELSE 0 END) as resolved_reports
-        FROM complaints
-    """
-    data = db.execute(query).fetchone()
+    rows = db.execute(
+        """
+        SELECT statuses.name, COALESCE(complaint_status_counts.count, 0) as count
+        FROM statuses
+        LEFT JOIN complaint_status_counts ON complaint_status_counts.status_id = statuses.id
+        """
+    ).fetchall()
+    by_status = {row["name"]: row["count"] for row in rows}
     return {
-        "total_reports": data["total_reports"],
-        "pending_reports": data["pending_reports"],
-        "resolved_reports": data["resolved_reports"],
+        "total_reports": sum(by_status.values()),
+        "pending_reports": by_status.get("Pending", 0),
+        "resolved_reports": by_status.get("Resolved", 0),
+        "by_status": by_status,
     }
+
+
+# per category totals, broken down by status
+def get_category_stats():
+    return cached("stats", "categories", _get_category_stats)
+
+
+def _get_category_stats():
+    db = get_db()
+    rows = db.execute(
+        """
+        SELECT categories.id, categories.name, statuses.name as status, SUM(complaint_daily_counts.count) as count
+        FROM complaint_daily_counts
+        JOIN categories ON complaint_daily_counts.category_id = categories.id
+        JOIN statuses ON complaint_daily_counts.status_id = statuses.id
+        GROUP BY categories.id, statuses.id
+        ORDER BY categories.id
+        """
+    ).fetchall()
+    categories = {}
+    for row in rows:
+        category = categories.setdefault(
+            row["id"], {"id": row["id"], "name": row["name"], "total": 0, "by_status": {}}
+        )
+        category["total"] += row["count"]
+        category["by_status"][row["status"]] = row["count"]
+    return list(categories.values())
+
+
+TIME_BUCKETS = ("day", "week", "month")  # weeks start on Monday
+
+
+# SQL for the first day of the bucket holding the counter row's day
+def bucket_sql(bucket):
+    return "day" if bucket == "day" else fragment(bucket)
+
+
+# complaint counts per time bucket over the last `days` days
+def get_stats_timeline(bucket="day", days=30, category_id=None):
+    return cached(
+        "stats",
+        f"timeline:{bucket}:{days}:{category_id}",
+        lambda: _get_stats_timeline(bucket, days, category_id),
+    )
+
+
+def _get_stats_timeline(bucket, days, category_id):
+    db = get_db()
+    query = f"""
+        SELECT {bucket_sql(bucket)} as bucket, statuses.name as status, SUM(complaint_daily_counts.count) as count
+        FROM complaint_daily_counts
+        JOIN statuses ON complaint_daily_counts.status_id = statuses.id
+        WHERE day >= {fragment('days_ago')}
+    """
+    params = [f"-{days} days"]
+    if category_id is not None:
+        query += " AND complaint_daily_counts.category_id = ?"
+        params.append(category_id)
+    query += " GROUP BY bucket, statuses.id ORDER BY bucket"
+
+    timeline = {}
+    for row in db.execute(query, params).fetchall():
+        point = timeline.setdefault(
+            row["bucket"], {"bucket": row["bucket"], "total": 0, "by_status": {}}
+        )
+        point["total"] += row["count"]
+        point["by_status"][row["status"]] = row["count"]
+    return list(timeline.values())
+
+
+# every complaint the counters cover, archived ones included
+ALL_COMPLAINTS = """(
+    SELECT created_at, category_id, status_id FROM complaints
+    UNION ALL
+    SELECT created_at, category_id, status_id FROM complaints_archive
+) AS complaints"""
+
+
+# listing counters: per user and status, user 0 for everyone, archive excluded
+USER_COUNTS = """
+    SELECT user_id, status_id, COUNT(*) AS count FROM complaints GROUP BY user_id, status_id
+    UNION ALL
+    SELECT 0, status_id, COUNT(*) FROM complaints GROUP BY status_id
+"""
+
+
+# recompute the counters from complaints; returns how many counter rows drifted
+def rebuild_stats():
+    day = fragment("day_of").format("created_at")
+    with transaction() as db:
+        drift = db.execute(
+            f"""
+            SELECT COUNT(*) FROM (
+                SELECT day, category_id, status_id
+                FROM (
+                    SELECT {day} as day, category_id, status_id, COUNT(*) as expected, 0 as actual
+                    FROM {ALL_COMPLAINTS} GROUP BY 1, 2, 3
+                    UNION ALL
+                    SELECT day, category_id, status_id, 0, count FROM complaint_daily_counts
+                ) AS counts
+                GROUP BY day, category_id, status_id
+                HAVING SUM(expected) != SUM(actual)
+            ) AS drifted
+            """
+        ).fetchone()[0]
+        drift += db.execute(
+            f"""
+            SELECT COUNT(*) FROM (
+                SELECT user_id, status_id
+                FROM (
+                    {USER_COUNTS}
+                    UNION ALL
+                    SELECT user_id, status_id, count FROM complaint_user_status_counts WHERE count != 0
+                ) AS counts
+                GROUP BY user_id, status_id
+                HAVING COUNT(*) != 2 OR MIN(count) != MAX(count)
+            ) AS drifted
+            """
+        ).fetchone()[0]
+        db.execute("DELETE FROM complaint_status_counts")
+        db.execute("DELETE FROM complaint_daily_counts")
+        db.execute("DELETE FROM complaint_user_status_counts")
+        db.execute(
+            f"""
+            INSERT INTO complaint_status_counts (status_id, count)
+            SELECT status_id, COUNT(*) FROM {ALL_COMPLAINTS} GROUP BY status_id
+            """
+        )
+        db.execute(
+            f"""
+            INSERT INTO complaint_daily_counts (day, category_id, status_id, count)
+            SELECT {day}, category_id, status_id, COUNT(*) FROM {ALL_COMPLAINTS}
+            GROUP BY 1, 2, 3
+            """
+        )
+        db.execute(f"INSERT INTO complaint_user_status_counts (user_id, status_id, count) {USER_COUNTS}")
+    invalidate("stats")
+    return drift
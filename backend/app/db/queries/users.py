@@ -1,4 +1,5 @@
-from app.db import get_db
+from flask import current_app
+from app.db import get_db, transaction
 
 # Get user by username (for login or duplicate check)
 def get_user_by_email(email):
@@ -9,13 +10,14 @@ def get_user_by_email(email):
 
 # Create new user (during registration)
 def create_user(name, email, password_hash, role='user'):
-    db = get_db()
     query = """
         INSERT INTO users (name, email, password_hash, role_id)
         VALUES (?, ?, ?, (SELECT id FROM roles WHERE name = ? LIMIT 1))
+        RETURNING id
     """
-    db.execute(query, (name, email, password_hash, role))
-    db.commit()
+    with transaction() as db:
+        user_id = db.execute(query, (name, email, password_hash, role)).fetchone()[0]
+    invalidate_principal(user_id)
 
 # Get user by ID (for protected routes)
 def get_user_by_id(user_id):
@@ -37,4 +39,46 @@ def is_admin(user_id):
         WHERE users.id = ? AND roles.name = 'admin'
         LIMIT 1
     """
-    return db.execute(query, (user_id,)).fetchone() is not None
\ No newline at end of file
+    return db.execute(query, (user_id,)).fetchone() is not None
+
+
+# Replace a stored password hash (rehash on login)
+def set_password_hash(user_id, password_hash):
+    with transaction() as db:
+        db.execute("UPDATE users SET password_hash = ? WHERE id = ?", (password_hash, user_id))
+
+
+# Change a user's role (promotion/demotion)
+def set_user_role(user_id, role):
+    query = """
+        UPDATE users
+        SET role_id = (SELECT id FROM roles WHERE name = ? LIMIT 1)
+        WHERE id = ?
+    """
+    with transaction() as db:
+        db.execute(query, (role, user_id))
+    invalidate_principal(user_id)
+
+
+# Cached principal (id, name, email, role) for authenticated requests.
+# Entries live for PRINCIPAL_CACHE_TTL seconds, which bounds how long a role
+# change made by another process (e.g. manage.py) takes to be seen here.
+def get_principal(user_id):
+    cache = current_app.extensions["principal_cache"]
+    principal = cache.get(user_id)
+    if principal is None:
+        user = get_user_by_id(user_id)
+        if user is None:
+            return None
+        principal = {
+            "id": user["id"],
+            "name": user["name"],
+            "email": user["email"],
+            "role": user["role"],
+        }
+        cache.set(user_id, principal)
+    return principal
+
+
+def invalidate_principal(user_id):
+    current_app.extensions["principal_cache"].delete(user_id)
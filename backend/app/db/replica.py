@@ -0,0 +1,158 @@
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from app.db import ConnectionPool
+from app.utils import metrics
+
+# Read-only replicas of the SQLite database (DB_REPLICAS), for heavy reads
+# that can lag it a little. `manage.py backup` makes each one with the online
+# backup API: copied next to its path, then renamed over it, so a replica
+# file never changes in place. Readers open it immutable (no locks, no WAL)
+# and each connection sees one frozen snapshot; connections opened after a
+# refresh get the new file while those on the old one finish on it. A
+# replica's mtime is when its data was read, which is what its lag is
+# measured from.
+
+# pragmas that make sense on a read-only file
+READ_PRAGMAS = ("cache_size", "mmap_size")
+
+REPLICA_READS = metrics.REGISTRY.register(metrics.Counter(
+    "civic_db_replica_reads_total",
+    "Reads that asked for a replica, by where they went (replica, primary: none fresh enough).",
+    ("target",),
+))
+
+
+class Snapshotter:
+    """Copies the database at ``database`` to other files while it is in
+    use. Keeps its connection between copies, so that a file is only copied
+    again after a commit; until then its mtime is just moved on."""
+
+    def __init__(self, database, timeout=5.0):
+        self.conn = sqlite3.connect(database, timeout=timeout, isolation_level=None)
+        self._copied = {}  # dest -> (data_version, (inode, mtime)) of the last copy
+
+    def _identity(self, path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def copy(self, dest, pages=-1):
+        """Snapshot the database to ``dest``, ``pages`` pages per backup
+        step (-1: all in one). In WAL mode a step reads one snapshot and
+        blocks no writer; between steps a commit from another connection
+        starts the copy over. Returns ``{"copied", "bytes", "elapsed_s",
+        "taken_at"}``."""
+        start = time.perf_counter()
+        taken_at = time.time()
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        last = self._copied.get(dest)
+        if last is not None and last == (data_version, self._identity(dest)):
+            os.utime(dest, (taken_at, taken_at))
+            self._copied[dest] = (data_version, self._identity(dest))
+            return {"copied": False, "bytes": 0, "elapsed_s": 0.0, "taken_at": taken_at}
+
+        tmp = f"{dest}.tmp{os.getpid()}"
+        for leftover in (tmp, f"{tmp}-journal", f"{tmp}-wal", f"{tmp}-shm"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        copy = sqlite3.connect(tmp)
+        try:
+            self.conn.backup(copy, pages=pages)
+            # a rollback journal file (the copy has the source's WAL flag),
+            # which readers can open immutable
+            copy.execute("PRAGMA journal_mode = DELETE")
+            size = copy.execute("PRAGMA page_count").fetchone()[0] * copy.execute("PRAGMA page_size").fetchone()[0]
+        finally:
+            copy.close()
+        os.utime(tmp, (taken_at, taken_at))
+        os.replace(tmp, dest)
+        self._copied[dest] = (data_version, self._identity(dest))
+        return {
+            "copied": True,
+            "bytes": size,
+            "elapsed_s": round(time.perf_counter() - start, 3),
+            "taken_at": taken_at,
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+class ReplicaManager:
+    """The replicas as seen by one process: a connection pool per replica
+    file, replaced along with the file, and the choice of a replica that is
+    at most ``max_lag`` seconds behind."""
+
+    def __init__(self, paths, max_lag=30.0, size=8, timeout=5.0, pragmas=None, instrument=False, slow_query_ms=None):
+        self.paths = list(paths)
+        self.max_lag = max_lag
+        self.pid = os.getpid()
+        self._options = {
+            "size": size,
+            "timeout": timeout,
+            "pragmas": {name: value for name, value in (pragmas or {}).items() if name in READ_PRAGMAS},
+            "instrument": instrument,
+            "slow_query_ms": slow_query_ms,
+        }
+        self._pools = {}  # path -> (inode, pool); a refresh makes a new inode
+        self._lock = threading.Lock()
+        self._next = itertools.count()
+
+    def lag(self, path):
+        """Seconds the replica at ``path`` is behind, None when it is missing."""
+        try:
+            return max(0.0, time.time() - os.stat(path).st_mtime)
+        except FileNotFoundError:
+            return None
+
+    def choose(self):
+        """The pool of a replica at most ``max_lag`` seconds behind (round
+        robin between them), None when there is none."""
+        now = time.time()
+        fresh = []
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime <= self.max_lag:
+                fresh.append((path, stat.st_ino))
+        if not fresh:
+            REPLICA_READS.inc("primary")
+            return None
+        path, inode = fresh[next(self._next) % len(fresh)]
+        with self._lock:
+            current = self._pools.get(path)
+            if current is None or current[0] != inode:
+                if current is not None:
+                    current[1].close_idle()
+                uri = Path(path).resolve().as_uri() + "?mode=ro&immutable=1"
+                current = self._pools[path] = (inode, ConnectionPool(uri, uri=True, **self._options))
+        REPLICA_READS.inc("replica")
+        return current[1]
+
+    def release(self, pool, conn):
+        pool.release(conn)
+        with self._lock:
+            retired = all(current is not pool for _, current in self._pools.values())
+        if retired:
+            pool.close_idle()
+
+    def stats(self):
+        replicas = []
+        for path in self.paths:
+            lag = self.lag(path)
+            replicas.append({
+                "path": path,
+                "lag_s": None if lag is None else round(lag, 3),
+                "bytes": os.path.getsize(path) if lag is not None else None,
+                "fresh": lag is not None and lag <= self.max_lag,
+            })
+        return replicas
+
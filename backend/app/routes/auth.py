@@ -1,14 +1,22 @@
 from flask import Blueprint, request, jsonify, current_app
-from werkzeug.security import generate_password_hash, check_password_hash
 import jwt
+import math
 import time
+from app.db import close_db
 from app.db.queries import users as auth_queries
 from app.utils.auth import login_required, admin_required
+from app.utils.passwords import HasherBusy, hash_password, verify_password
 
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/api/auth")
 
 
+def too_many_requests(message, retry_after=1):
+    response = jsonify({"error": message})
+    response.headers["Retry-After"] = str(math.ceil(retry_after))
+    return response, 429
+
+
 @auth_bp.route("/register", methods=["POST"])
 def register():
     data = request.get_json()
@@ -19,7 +27,12 @@ def register():
     if auth_queries.get_user_by_email(email):
         return jsonify({"error": "Email already exists"}), 400
 
-    hashed_pw = generate_password_hash(password)
+    # don't hold a pooled connection while waiting for the hash
+    close_db()
+    try:
+        hashed_pw = hash_password(password)
+    except HasherBusy:
+        return too_many_requests("Server busy, try again shortly")
     auth_queries.create_user(name, email, hashed_pw)
     return jsonify({"message": "User registered successfully"}), 201
 
@@ -31,10 +44,29 @@ def login():
     email = data.get("email")
     password = data.get("password")
 
+    # repeated failures for an email are refused before any hashing
+    limiter = current_app.extensions["login_limiter"]
+    retry_after = limiter.retry_after(email)
+    if retry_after:
+        return too_many_requests("Too many failed login attempts", retry_after)
+
     user = auth_queries.get_user_by_email(email)
-    if not user or not check_password_hash(user["password_hash"], password):
+    if not user:
+        limiter.failure(email)
+        return jsonify({"error": "Invalid credentials"}), 401
+    close_db()
+    try:
+        matches, new_hash = verify_password(user["password_hash"], password)
+    except HasherBusy:
+        return too_many_requests("Server busy, try again shortly")
+    if not matches:
+        limiter.failure(email)
         return jsonify({"error": "Invalid credentials"}), 401
 
+    limiter.reset(email)
+    if new_hash:
+        auth_queries.set_password_hash(user["id"], new_hash)
+
     token = jwt.encode(
         {
             "user_id": user["id"],
@@ -50,11 +82,8 @@ def login():
 @auth_bp.route("/profile", methods=["GET"])
 @login_required
 def profile():
-    user_id = request.user["id"]
-    user = auth_queries.get_user_by_id(user_id)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-
+    # request.user is the already-resolved principal
+    user = request.user
     user_dict = {
         "id": user["id"],
         "name": user["name"],
@@ -1,6 +1,16 @@
-from flask import Blueprint, request, jsonify
-from app.db.queries import complaints as complaints_queries, other as other_queries
+import re
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from app.db.queries import (
+    complaints as complaints_queries,
+    duplicates as duplicates_queries,
+    history as history_queries,
+    images as images_queries,
+    other as other_queries,
+)
 from app.utils.auth import login_required, admin_required
+from app.utils.pagination import LISTING_KEY, SEARCH_KEY, encode_cursor, decode_cursor, clamp_per_page
+from app.utils import exporter, importer, sse
+from app.utils.jsonprovider import rows_response
 
 
 complaints_bp = Blueprint("complaints", __name__, url_prefix="/api/complaints")
@@ -16,38 +26,160 @@ def create_complaint():
     description = data.get("description")
     image_url = data.get("image_url")
     location = data.get("location")
+    # id of a photo from POST /api/images/upload, instead of an image_url
+    image_id = data.get("image_id")
+    if image_id and (not isinstance(image_id, str) or images_queries.get_image(image_id) is None):
+        return jsonify({"error": "Unknown image_id"}), 400
+    if location is not None and not isinstance(location, str):
+        return jsonify({"error": "location must be a string"}), 400
 
     complaint_id = complaints_queries.create_complaint(
-        user_id, category_id, title, description, image_url, location
+        user_id, category_id, title, description, image_url, location, image_sha256=image_id or None
     )
     return jsonify({
         "message": "Complaint created successfully",
-        "complaint_id": complaint_id
+        "complaint_id": complaint_id,
+        "possible_duplicates": duplicates_queries.find_duplicates_of(complaint_id) or [],
     }), 201
 
 
+# bulk import from partner dumps: NDJSON or CSV body, streamed row by row
+@complaints_bp.route("/bulk", methods=["POST"])
+@login_required
+@admin_required
+def bulk_create_complaints():
+    fmt = request.args.get("format")
+    if not fmt:
+        fmt = "csv" if request.mimetype == "text/csv" else "ndjson"
+    if fmt not in importer.FORMATS:
+        return jsonify({"error": "format must be ndjson or csv"}), 400
+    chunk_size = max(1, min(request.args.get("chunk_size", 1000, type=int), 10000))
+    defer_fts = request.args.get("defer_fts", "false").lower() in ("1", "true", "yes")
+
+    report = importer.import_complaints(
+        importer.iter_records(importer.decode_lines(request.stream), fmt),
+        request.user["id"],
+        chunk_size=chunk_size,
+        defer_fts=defer_fts,
+    )
+    if report.stopped:
+        return jsonify({"error": report.stopped, "report": report.to_dict()}), 400
+    return jsonify({"report": report.to_dict()}), 200
+
+
+# streamed NDJSON/CSV export for spreadsheets and partner systems
+@complaints_bp.route("/export", methods=["GET"])
+@login_required
+@admin_required
+def export_complaints():
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in exporter.FORMATS:
+        return jsonify({"error": "format must be ndjson or csv"}), 400
+    status = request.args.get("status")
+    if status and other_queries.get_status_id(status) is None:
+        return jsonify({"error": "Invalid status"}), 400
+    try:
+        columns = exporter.parse_columns(request.args.get("columns"))
+        created_from = exporter.parse_date(request.args.get("from"))
+        created_to = exporter.parse_date(request.args.get("to"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    use_gzip = request.args.get("gzip", "false").lower() in ("1", "true", "yes")
+
+    chunks = exporter.export_complaints(
+        fmt,
+        columns,
+        status=status,
+        category_id=request.args.get("category_id", type=int),
+        created_from=created_from,
+        created_to=created_to,
+    )
+    filename = f"complaints.{fmt}"
+    mimetype = exporter.MIME_TYPES[fmt]
+    if use_gzip:
+        chunks = exporter.gzip_chunks(chunks)
+        filename += ".gz"
+        mimetype = "application/gzip"
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+# Server-Sent Events for complaints being created or changing status: all
+# of them for admins, a citizen's own otherwise. Browsers resume with the
+# Last-Event-ID header on reconnect (or ?last_event_id= on a new page).
+@complaints_bp.route("/events", methods=["GET"])
+@login_required
+def complaint_events():
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    # ASCII digits only (str.isdigit also takes "²"), and short enough to be
+    # an id
+    if last_event_id is not None and not re.fullmatch(r"[0-9]{1,18}", last_event_id):
+        return jsonify({"error": "Invalid Last-Event-ID"}), 400
+    hub = sse.get_hub()
+    if not hub.open(hub.max_streams()):
+        sse.STREAMS.inc("rejected")
+        return jsonify({"error": "Too many open event streams"}), 503, {"Retry-After": "30"}
+    sse.STREAMS.inc("opened")
+    user_id = None if request.user["role"] == "admin" else request.user["id"]
+    response = Response(
+        stream_with_context(sse.stream(hub, int(last_event_id) if last_event_id else None, user_id)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},  # no proxy buffering
+    )
+    response.call_on_close(hub.close)
+    return response
+
+
 @complaints_bp.route("/get", methods=["GET"])
 @login_required
 def get_complaints():
     user_id = request.user["id"]
-    page = request.args.get("page", 1, type=int)
-    per_page = request.args.get("per_page", 10, type=int)
+    per_page = clamp_per_page(request.args.get("per_page", 10, type=int))
     status = request.args.get("status")
+    cursor = request.args.get("cursor")
+    # ?view=detail for full rows; list views only need the summary
+    fields = complaints_queries.VIEWS.get(request.args.get("view", "summary"))
+    if fields is None:
+        return jsonify({"error": "view must be summary or detail"}), 400
+
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, LISTING_KEY)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
 
-    complaints = complaints_queries.get_complaints_by_user_id(
-        user_id, page, per_page, status
+    # the page, its total and the per-status counts for the pager and tabs,
+    # from one statement
+    complaints, next_after, counts = complaints_queries.get_complaints_by_user_id(
+        user_id, request.user["role"], per_page, status, after, fields, counts=True
+    )
+    next_cursor = encode_cursor(*next_after) if next_after else None
+    total = counts.get(status, 0) if status else sum(counts.values())
+    return rows_response(
+        "complaints",
+        complaints,
+        next_cursor=next_cursor,
+        total=total,
+        total_is_exact=True,  # the counters are kept in the same transactions as the rows
+        status_counts=counts,
     )
-    complaints = [dict(complaint) for complaint in complaints]
-    return jsonify({"complaints": complaints}), 200
 
 
 @complaints_bp.route("/get/<int:complaint_id>", methods=["GET"])
 @login_required
 def get_complaint(complaint_id):
     user_id = request.user["id"]
+    # ?archived=1 also looks in the archive of closed complaints
+    archived = request.args.get("archived", "false").lower() in ("1", "true", "yes")
     complaint = complaints_queries.get_complaint_by_user_id_and_complaint_id(
-        user_id, complaint_id
+        user_id, complaint_id, request.user["role"], archived
     )
+    if complaint is None:
+        return jsonify({"error": "Complaint not found"}), 404
     complaint = dict(complaint)
     return jsonify({"complaint": complaint}), 200
 
@@ -56,10 +188,82 @@ def get_complaint(complaint_id):
 @login_required
 def search_complaints():
     query = request.args.get("query")
+    if not query:
+        return jsonify({"error": "query is required"}), 400
     user_id = request.user["id"]
-    complaints = complaints_queries.search_complaints(query, user_id)
-    complaints = [dict(complaint) for complaint in complaints]
-    return jsonify({"complaints": complaints}), 200
+    limit = clamp_per_page(request.args.get("limit", 20, type=int), default=20)
+    cursor = request.args.get("cursor")
+
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, SEARCH_KEY)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+    try:
+        created_from = exporter.parse_date(request.args.get("from"))
+        created_to = exporter.parse_date(request.args.get("to"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    complaints, next_after = complaints_queries.search_complaints(
+        query,
+        user_id,
+        request.user["role"],
+        limit=limit,
+        after=after,
+        status=request.args.get("status"),
+        category_id=request.args.get("category_id", type=int),
+        created_from=created_from,
+        created_to=created_to,
+        archived=request.args.get("archived", "false").lower() in ("1", "true", "yes"),
+    )
+    next_cursor = encode_cursor(*next_after) if next_after else None
+    return rows_response("complaints", complaints, next_cursor=next_cursor)
+
+# open complaints that look like the same problem, for triage
+@complaints_bp.route("/duplicates/<int:complaint_id>", methods=["GET"])
+@login_required
+@admin_required
+def get_duplicates(complaint_id):
+    limit = clamp_per_page(request.args.get("limit", 20, type=int), default=20)
+    threshold = request.args.get("threshold", type=float)
+    if threshold is not None and not 0 < threshold <= 1:
+        return jsonify({"error": "threshold must be between 0 and 1"}), 400
+    duplicates = duplicates_queries.find_duplicates_of(complaint_id, threshold=threshold, limit=limit)
+    if duplicates is None:
+        return jsonify({"error": "Complaint not found or not indexed"}), 404
+    return jsonify({"duplicates": duplicates}), 200
+
+
+# merge duplicates into the complaint they repeat:
+# {"merges": [{"into": 12, "duplicates": [15, 18]}, ...]}
+@complaints_bp.route("/merge", methods=["POST"])
+@login_required
+@admin_required
+def merge_complaints():
+    data = request.get_json(silent=True) or {}
+    merges = {}
+    try:
+        for merge in data.get("merges") or []:
+            into = int(merge["into"])
+            ids = [int(d) for d in merge["duplicates"]]
+            if into in merges or not ids:
+                raise ValueError
+            merges[into] = ids
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "merges must be a list of {into, duplicates} with distinct targets"}), 400
+    if not merges:
+        return jsonify({"error": "merges is required"}), 400
+    try:
+        merged = duplicates_queries.merge_duplicates(merges, changed_by=request.user["id"])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"message": "Complaints merged successfully", "merged": merged}), 200
+
+
+MAX_BULK_UPDATE = 10000
+
 
 # update complaint
 @complaints_bp.route("/update/<int:complaint_id>", methods=["PUT"])
@@ -68,5 +272,46 @@ def search_complaints():
 def update_complaint(complaint_id):
     data = request.json
     status = data.get("status")
-    complaints_queries.update_complaint(complaint_id, status)
+    if other_queries.get_status_id(status) is None:
+        return jsonify({"error": "Invalid status"}), 400
+    result = complaints_queries.update_complaint(complaint_id, status, changed_by=request.user["id"])
+    if result["missing"]:
+        return jsonify({"error": "Complaint not found"}), 404
     return jsonify({"message": "Complaint updated successfully"}), 200
+
+
+# move many complaints to one status in a single transaction:
+# {"ids": [1, 2, 3], "status": "Resolved", "from_status": "In Progress"}
+@complaints_bp.route("/update", methods=["PUT"])
+@login_required
+@admin_required
+def bulk_update_complaints():
+    data = request.get_json(silent=True) or {}
+    status = data.get("status")
+    from_status = data.get("from_status")
+    if other_queries.get_status_id(status) is None:
+        return jsonify({"error": "Invalid status"}), 400
+    if from_status is not None and other_queries.get_status_id(from_status) is None:
+        return jsonify({"error": "Invalid from_status"}), 400
+    ids = data.get("ids")
+    if not isinstance(ids, list) or not ids or not all(
+        isinstance(i, int) and not isinstance(i, bool) and 0 < i < 2**63 for i in ids
+    ):
+        return jsonify({"error": "ids must be a non-empty list of complaint ids"}), 400
+    if len(ids) > MAX_BULK_UPDATE:
+        return jsonify({"error": f"At most {MAX_BULK_UPDATE} ids per request"}), 400
+
+    result = complaints_queries.update_statuses(ids, status, request.user["id"], from_status)
+    return jsonify({"message": "Complaints updated successfully", **result}), 200
+
+
+@complaints_bp.route("/history/<int:complaint_id>", methods=["GET"])
+@login_required
+def get_complaint_history(complaint_id):
+    complaint = complaints_queries.get_complaint_by_user_id_and_complaint_id(
+        request.user["id"], complaint_id, request.user["role"], archived=True
+    )
+    if complaint is None:
+        return jsonify({"error": "Complaint not found"}), 404
+    rows = history_queries.get_status_history(complaint_id)
+    return jsonify({"history": [dict(row) for row in rows]}), 200
@@ -0,0 +1,125 @@
+from functools import wraps
+from flask import Blueprint, request, jsonify
+from app.db.queries import complaints as complaints_queries, geo as geo_queries, other as other_queries
+from app.utils.auth import login_required
+from app.utils.pagination import clamp_per_page
+
+
+geo_bp = Blueprint("geo", __name__, url_prefix="/api/complaints/geo")
+
+MAX_RADIUS_M = 50_000
+MAX_K = 100
+MAX_GRID = 128
+
+
+class ComplaintNotFound(Exception):
+    pass
+
+
+def _coordinate(name, low, high):
+    value = request.args.get(name, type=float)
+    if value is None or not low <= value <= high:
+        raise ValueError(f"{name} must be a number between {low} and {high}")
+    return value
+
+
+def _box():
+    box = (
+        _coordinate("min_lat", -90, 90),
+        _coordinate("min_lon", -180, 180),
+        _coordinate("max_lat", -90, 90),
+        _coordinate("max_lon", -180, 180),
+    )
+    if box[0] > box[2] or box[1] > box[3]:
+        raise ValueError("min_lat/min_lon must not exceed max_lat/max_lon")
+    return box
+
+
+def _center():
+    """(lat, lon, near) from ?lat&lon, or the location of complaint ?near=<id>."""
+    near = request.args.get("near", type=int)
+    if near is None:
+        return _coordinate("lat", -90, 90), _coordinate("lon", -180, 180), None
+    complaint = complaints_queries.get_complaint_by_user_id_and_complaint_id(
+        request.user["id"], near, request.user["role"]
+    )
+    if complaint is None or complaint["lat"] is None:
+        raise ComplaintNotFound("Complaint not found or has no coordinates")
+    return complaint["lat"], complaint["lon"], near
+
+
+def _filters():
+    # status=Pending,In Progress for "open" complaints
+    statuses = [s.strip() for s in request.args.get("status", "").split(",") if s.strip()]
+    for status in statuses:
+        if other_queries.get_status_id(status) is None:
+            raise ValueError(f"Invalid status: {status}")
+    return {
+        "user_id": request.user["id"],
+        "role": request.user["role"],
+        "statuses": statuses,
+        "category_id": request.args.get("category_id", type=int),
+    }
+
+
+def _points(rows, exclude=None):
+    return [dict(row) for row in rows if row["id"] != exclude]
+
+
+# invalid parameters -> 400, unknown reference complaint -> 404
+def geo_endpoint(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            return view(*args, **kwargs)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except ComplaintNotFound as e:
+            return jsonify({"error": str(e)}), 404
+    return wrapper
+
+
+@geo_bp.route("/bbox", methods=["GET"])
+@login_required
+@geo_endpoint
+def bbox():
+    box = _box()
+    limit = clamp_per_page(request.args.get("limit", 500, type=int), default=500, maximum=5000)
+    rows = geo_queries.complaints_in_bbox(box, limit=limit, **_filters())
+    return jsonify({"complaints": _points(rows)}), 200
+
+
+@geo_bp.route("/nearby", methods=["GET"])
+@login_required
+@geo_endpoint
+def nearby():
+    lat, lon, near = _center()
+    radius = request.args.get("radius", 500, type=float)
+    if not 0 < radius <= MAX_RADIUS_M:
+        raise ValueError(f"radius must be between 0 and {MAX_RADIUS_M} meters")
+    limit = clamp_per_page(request.args.get("limit", 500, type=int), default=500, maximum=5000)
+    rows = geo_queries.complaints_within_radius(lat, lon, radius, limit=limit, **_filters())
+    return jsonify({"center": {"lat": lat, "lon": lon}, "complaints": _points(rows, exclude=near)}), 200
+
+
+@geo_bp.route("/nearest", methods=["GET"])
+@login_required
+@geo_endpoint
+def nearest():
+    lat, lon, near = _center()
+    k = clamp_per_page(request.args.get("k", 10, type=int), default=10, maximum=MAX_K)
+    # the reference complaint itself is the nearest hit; ask for one more
+    rows = geo_queries.nearest_complaints(lat, lon, k + (near is not None), **_filters())
+    return jsonify({"center": {"lat": lat, "lon": lon}, "complaints": _points(rows, exclude=near)[:k]}), 200
+
+
+@geo_bp.route("/clusters", methods=["GET"])
+@login_required
+@geo_endpoint
+def clusters():
+    box = _box()
+    grid = request.args.get("grid", 32, type=int)
+    if not 1 <= grid <= MAX_GRID:
+        raise ValueError(f"grid must be between 1 and {MAX_GRID}")
+    rows = geo_queries.complaint_clusters(box, grid=grid, **_filters())
+    return jsonify({"grid": grid, "clusters": [dict(row) for row in rows]}), 200
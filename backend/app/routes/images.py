@@ -0,0 +1,93 @@
+import os
+import re
+from flask import Blueprint, current_app, jsonify, redirect, request, send_file, url_for
+from app.db.queries import images as images_queries
+from app.utils.auth import login_required
+from app.utils.uploads import UPLOAD_BYTES, UPLOADS, UploadError, get_resizer, get_store, iter_multipart_file
+
+
+images_bp = Blueprint("images", __name__, url_prefix="/api/images")
+
+SHA256 = re.compile(r"[0-9a-f]{64}")
+
+
+def image_urls(sha256):
+    return {
+        "url": f"/api/images/{sha256}",
+        **{f"{name}_url": f"/api/images/{sha256}/{name}" for name in current_app.config["IMAGE_VARIANTS"]},
+    }
+
+
+# multipart/form-data with the photo in the "image" field; the body is
+# streamed to the store, never held in memory or parsed into request.files
+@images_bp.route("/upload", methods=["POST"])
+@login_required
+def upload_image():
+    boundary = request.mimetype_params.get("boundary")
+    if request.mimetype != "multipart/form-data" or not boundary:
+        return jsonify({"error": "multipart/form-data body required"}), 400
+    store = get_store()
+    if request.content_length and request.content_length > store.max_bytes + 64 * 1024:
+        UPLOADS.inc("rejected")
+        return jsonify({"error": f"Image exceeds {store.max_bytes} bytes"}), 413
+
+    try:
+        sha256, size, content_type = store.save(iter_multipart_file(request.stream, boundary, "image"))
+    except UploadError as e:
+        UPLOADS.inc("rejected")
+        return jsonify({"error": str(e)}), e.status
+    created = images_queries.record_image(sha256, content_type, size, request.user["id"])
+    UPLOADS.inc("stored" if created else "duplicate")
+    UPLOAD_BYTES.inc(amount=size)
+    get_resizer().submit(sha256)
+
+    return jsonify({
+        "image": {
+            "id": sha256,
+            "content_type": content_type,
+            "bytes": size,
+            "duplicate": not created,
+            **image_urls(sha256),
+        },
+    }), 201 if created else 200
+
+
+# public like any static asset: the URL is the content hash, so responses
+# never change and can be cached for good
+@images_bp.route("/<sha256>", methods=["GET"])
+def get_image(sha256):
+    image = images_queries.get_image(sha256) if SHA256.fullmatch(sha256) else None
+    if image is None:
+        return jsonify({"error": "Image not found"}), 404
+    return _send(get_store().path(sha256), image["content_type"], sha256)
+
+
+@images_bp.route("/<sha256>/<variant>", methods=["GET"])
+def get_image_variant(sha256, variant):
+    store = get_store()
+    if not SHA256.fullmatch(sha256) or variant not in store.variants:
+        return jsonify({"error": "Image not found"}), 404
+    path = store.path(sha256, variant)
+    if os.path.exists(path):
+        return _send(path, "image/jpeg", f"{sha256}.{variant}")
+    if images_queries.get_image(sha256) is None:
+        return jsonify({"error": "Image not found"}), 404
+    # not made yet (or lost with a restarted worker): queue it and send the
+    # original meanwhile, without letting the redirect be cached
+    get_resizer().submit(sha256)
+    response = redirect(url_for("images.get_image", sha256=sha256))
+    response.cache_control.no_store = True
+    return response
+
+
+def _send(path, mimetype, etag):
+    response = send_file(
+        path,
+        mimetype=mimetype,
+        etag=etag,
+        conditional=True,
+        max_age=current_app.config["IMAGE_MAX_AGE"],
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
@@ -1,4 +1,8 @@
-from flask import Blueprint, jsonify
+import hmac
+from flask import Blueprint, jsonify, request, current_app
+from app.db import get_replicas, pool_stats
+from app.utils import metrics
+from app.utils.auth import authenticate
 
 main_bp = Blueprint("main", __name__)
 
@@ -6,10 +10,77 @@ main_bp = Blueprint("main", __name__)
 def home():
     return jsonify({"message": "ok"})
 
+def _metrics_token_matches():
+    token = current_app.config["METRICS_TOKEN"]
+    header = request.headers.get("Authorization", "")
+    return bool(token) and hmac.compare_digest(header.encode(), f"Bearer {token}".encode())
+
+
+def _operator_error():
+    """None for the scrape token or an admin's login token, else the error
+    response. Pool and replica state is not for the public."""
+    if _metrics_token_matches():
+        return None
+    user, error = authenticate()
+    if error:
+        return error
+    if user["role"] != "admin":
+        return jsonify({"error": "Admin access required"}), 403
+    return None
+
+
 @main_bp.route("/api/health", methods=["GET"])
 def health():
-    return jsonify({
+    body = {
         "status": "healthy",
         "message": "Civic Report API is running",
-        "version": "1.0.0"
-    })
+        "version": "1.0.0",
+    }
+    # pool and replica detail for the same callers as /api/metrics
+    if request.headers.get("Authorization") and _operator_error() is None:
+        replicas = get_replicas()
+        body["db_pool"] = pool_stats()
+        body["db_replicas"] = replicas.stats() if replicas is not None else []
+    return jsonify(body)
+
+
+@main_bp.route("/api/metrics", methods=["GET"])
+def get_metrics():
+    error = _operator_error()
+    if error:
+        return error
+    return metrics.REGISTRY.render(), 200, {"Content-Type": "text/plain; version=0.0.4"}
+
+
+# connection pool gauges, read at scrape time
+def _pool_metrics():
+    stats = pool_stats()
+    return [
+        ("civic_db_pool_size", "gauge", "Maximum pooled connections.", stats["size"]),
+        ("civic_db_pool_open", "gauge", "Open pooled connections.", stats["open"]),
+        ("civic_db_pool_in_use", "gauge", "Connections checked out.", stats["in_use"]),
+        ("civic_db_pool_waits_total", "counter", "Acquisitions that had to wait.", stats["waits"]),
+        ("civic_db_pool_wait_seconds_total", "counter", "Time spent waiting for a connection.", stats["wait_time_ms"] / 1000),
+        ("civic_db_pool_timeouts_total", "counter", "Acquisitions that timed out.", stats["timeouts"]),
+        ("civic_db_writer_wait_seconds_total", "counter", "Time spent waiting for the writer connection.", stats["writer_wait_time_ms"] / 1000),
+    ]
+
+
+metrics.REGISTRY.add_collector(_pool_metrics)
+
+
+# age of the stalest replica, read at scrape time
+def _replica_metrics():
+    replicas = get_replicas()
+    if replicas is None:
+        return []
+    lags = [replicas.lag(path) for path in replicas.paths]
+    return [(
+        "civic_db_replica_lag_seconds",
+        "gauge",
+        "Seconds the stalest replica is behind the database (+Inf when one is missing).",
+        max(float("inf") if lag is None else lag for lag in lags),
+    )]
+
+
+metrics.REGISTRY.add_collector(_replica_metrics)
@@ -1,25 +1,143 @@
-from flask import Blueprint, jsonify
-from app.db.queries import other as other_queries
+from functools import wraps
+from flask import Blueprint, jsonify, request, current_app
+from app.db.queries import history as history_queries, other as other_queries
+from app.utils import analytics
+from app.utils.auth import login_required, admin_required
 
 
 other_bp = Blueprint("other", __name__, url_prefix="/api/other")
 
 
+def reference_response(payload):
+    # ETag + Cache-Control so browsers and the proxy can revalidate with a 304
+    response = jsonify(payload)
+    response.set_etag(other_queries.get_reference_data().etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config["REFERENCE_DATA_MAX_AGE"]
+    return response.make_conditional(request)
+
+
 @other_bp.route("/categories", methods=["GET"])
 def get_categories():
     categories = other_queries.get_all_categories()
-    categories = [{"id": category[0], "name": category[1]} for category in categories]
-    return jsonify({"categories": categories}), 200
+    return reference_response({"categories": categories})
 
 
 @other_bp.route("/statuses", methods=["GET"])
 def get_statuses():
     statuses = other_queries.get_all_statuses()
-    statuses = [{"id": status[0], "name": status[1]} for status in statuses]
-    return jsonify({"statuses": statuses}), 200
+    return reference_response({"statuses": statuses})
+
+
+# reload categories/statuses after an admin-side change
+@other_bp.route("/reference/invalidate", methods=["POST"])
+@login_required
+@admin_required
+def invalidate_reference_data():
+    other_queries.invalidate_reference_data()
+    etag = other_queries.get_reference_data().etag
+    return jsonify({"message": "Reference data reloaded", "etag": etag}), 200
 
 
 @other_bp.route("/stats", methods=["GET"])
 def get_stats():
     stats = other_queries.get_stats()
     return jsonify({"stats": stats}), 200
+
+
+@other_bp.route("/stats/categories", methods=["GET"])
+def get_category_stats():
+    categories = other_queries.get_category_stats()
+    return jsonify({"categories": categories}), 200
+
+
+@other_bp.route("/stats/timeline", methods=["GET"])
+def get_stats_timeline():
+    bucket = request.args.get("bucket", "day")
+    days = request.args.get("days", 30, type=int)
+    category_id = request.args.get("category_id", type=int)
+    if bucket not in other_queries.TIME_BUCKETS:
+        return jsonify({"error": "bucket must be one of day, week, month"}), 400
+    days = max(1, min(days, 3660))
+
+    timeline = other_queries.get_stats_timeline(bucket, days, category_id)
+    return jsonify({"bucket": bucket, "days": days, "timeline": timeline}), 200
+
+
+@other_bp.route("/stats/transitions", methods=["GET"])
+def get_transition_stats():
+    bucket = request.args.get("bucket", "day")
+    days = request.args.get("days", 30, type=int)
+    if bucket not in other_queries.TIME_BUCKETS:
+        return jsonify({"error": "bucket must be one of day, week, month"}), 400
+    days = max(1, min(days, 3660))
+
+    timeline = history_queries.get_transition_stats(bucket, days)
+    return jsonify({"bucket": bucket, "days": days, "timeline": timeline}), 200
+
+
+# Operations reports from the worker's analytics snapshot (admins only)
+def analytics_route(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not analytics.available():
+            return jsonify({"error": "Analytics need NumPy (install the analytics extra)"}), 503
+        return f(*args, **kwargs)
+    return decorated
+
+
+@other_bp.route("/analytics/resolution", methods=["GET"])
+@login_required
+@admin_required
+@analytics_route
+def get_resolution_analytics():
+    days = max(1, min(request.args.get("days", 90, type=int), 3660))
+    category_id = request.args.get("category_id", type=int)
+    return jsonify(analytics.resolution_times(analytics.get_snapshot(), days, category_id)), 200
+
+
+@other_bp.route("/analytics/backlog", methods=["GET"])
+@login_required
+@admin_required
+@analytics_route
+def get_backlog_analytics():
+    category_id = request.args.get("category_id", type=int)
+    return jsonify(analytics.backlog_aging(analytics.get_snapshot(), category_id)), 200
+
+
+@other_bp.route("/analytics/trends", methods=["GET"])
+@login_required
+@admin_required
+@analytics_route
+def get_trend_analytics():
+    weeks = max(1, min(request.args.get("weeks", 12, type=int), 520))
+    category_id = request.args.get("category_id", type=int)
+    return jsonify(analytics.weekly_trends(analytics.get_snapshot(), weeks, category_id)), 200
+
+
+@other_bp.route("/analytics/heatmap", methods=["GET"])
+@login_required
+@admin_required
+@analytics_route
+def get_heatmap_analytics():
+    # the box around the matching complaints unless all four bounds are given
+    box = None
+    bounds = ("min_lat", "min_lon", "max_lat", "max_lon")
+    if any(key in request.args for key in bounds):
+        box = tuple(request.args.get(key, type=float) for key in bounds)
+        if None in box or not (-90 <= box[0] <= box[2] <= 90 and -180 <= box[1] <= box[3] <= 180):
+            return jsonify({"error": "min_lat, min_lon, max_lat and max_lon must form a box"}), 400
+    grid = max(1, min(request.args.get("grid", 32, type=int), 256))
+    statuses = [s for s in request.args.get("status", "").split(",") if s]
+    if any(other_queries.get_status_id(s) is None for s in statuses):
+        return jsonify({"error": "Invalid status"}), 400
+    days = request.args.get("days", type=int)
+    heatmap = analytics.area_heatmap(
+        analytics.get_snapshot(),
+        box,
+        grid,
+        statuses=statuses,
+        category_id=request.args.get("category_id", type=int),
+        days=max(1, days) if days else None,
+    )
+    return jsonify(heatmap), 200
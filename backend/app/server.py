@@ -0,0 +1,41 @@
+import multiprocessing
+from gunicorn.app.base import BaseApplication
+
+
+class ProductionServer(BaseApplication):
+    """Gunicorn pre-fork server running create_app() with threaded (or gevent) workers."""
+
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app import create_app
+
+        return create_app()
+
+
+def server_options(config):
+    workers = config["SERVER_WORKERS"] or multiprocessing.cpu_count()
+    return {
+        "bind": f"{config['SERVER_HOST']}:{config['SERVER_PORT']}",
+        "workers": workers,
+        "worker_class": config["SERVER_WORKER_CLASS"],
+        "threads": config["SERVER_THREADS"],  # gthread
+        "worker_connections": config["SERVER_WORKER_CONNECTIONS"],  # gevent
+        "timeout": config["SERVER_TIMEOUT"],  # kill workers stuck on a request
+        "graceful_timeout": config["SERVER_GRACEFUL_TIMEOUT"],  # SIGHUP/SIGTERM drain time
+        "keepalive": config["SERVER_KEEPALIVE"],
+        "max_requests": config["SERVER_MAX_REQUESTS"],  # recycle workers after N requests
+        "max_requests_jitter": config["SERVER_MAX_REQUESTS_JITTER"],
+        "preload_app": config["SERVER_PRELOAD"],
+        "accesslog": config["SERVER_ACCESS_LOG"],
+    }
+
+
+def serve(config):
+    ProductionServer(server_options(config)).run()
@@ -1,51 +1,68 @@
-from flask import request, jsonify, current_app
+from flask import request, jsonify, current_app, g
 import jwt
 from functools import wraps
-from app.db.queries.users import get_user_by_id, is_admin
+from app.db.queries.users import get_principal
 import time
 
+
+def authenticate():
+    """Resolve the bearer token to a principal, at most once per request.
+
+    Returns ``(user, None)`` on success or ``(None, error_response)``.
+    """
+    if "principal" not in g:
+        g.principal = _authenticate()
+    return g.principal
+
+
+# EventSource cannot send headers: these endpoints also take the token as
+# ?access_token=
+QUERY_TOKEN_ENDPOINTS = {"complaints.complaint_events"}
+
+
+def _authenticate():
+    token = request.headers.get("Authorization")
+    if token:
+        # "Bearer <token>"; a header without the token part has none
+        token = token.partition(" ")[2]
+    elif request.endpoint in QUERY_TOKEN_ENDPOINTS:
+        token = request.args.get("access_token")
+    if not token:
+        return None, (jsonify({"error": "Token missing"}), 401)
+    try:
+        decoded = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=["HS256"])
+        exp = decoded.get("exp")
+
+        if exp and exp < time.time():
+            return None, (jsonify({"error": "Token expired"}), 401)
+        user = get_principal(decoded["user_id"])
+        if not user:
+            return None, (jsonify({"error": "Invalid user"}), 401)
+    except jwt.ExpiredSignatureError:
+        return None, (jsonify({"error": "Token expired"}), 401)
+    except jwt.InvalidTokenError:
+        return None, (jsonify({"error": "Invalid token"}), 401)
+    return user, None
+
+
 def login_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = request.headers.get("Authorization")
-        if not token:
-            return jsonify({"error": "Token missing"}), 401
-        token = token.split(" ")[1]
-        try:
-            decoded = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=["HS256"])
-            exp = decoded.get("exp")
-
-            if exp and exp < time.time():
-                return jsonify({"error": "Token expired"}), 401
-            user = get_user_by_id(decoded["user_id"])
-            if not user:
-                return jsonify({"error": "Invalid user"}), 401
-            request.user = user
-        except jwt.ExpiredSignatureError:
-            return jsonify({"error": "Token expired"}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({"error": "Invalid token"}), 401
-
+        user, error = authenticate()
+        if error:
+            return error
+        request.user = user
         return f(*args, **kwargs)
     return decorated
 
 def admin_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = request.headers.get("Authorization")
-        if not token:
-            return jsonify({"error": "Token missing"}), 401
-        token = token.split(" ")[1]
-        try:
-            decoded = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=["HS256"]) 
-            user = get_user_by_id(decoded["user_id"])
-            if not user:
-                return jsonify({"error": "Invalid user"}), 401
-            if not is_admin(user["id"]):
-                return jsonify({"error": "Admin access required"}), 403
-        except jwt.ExpiredSignatureError:
-            return jsonify({"error": "Token expired"}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({"error": "Invalid token"}), 401
+        user, error = authenticate()
+        if error:
+            return error
+        if user["role"] != "admin":
+            return jsonify({"error": "Admin access required"}), 403
+        request.user = user
         return f(*args, **kwargs)
-    return decorated
\ No newline at end of file
+    return decorated
@@ -0,0 +1,304 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from app.utils import metrics
+from app.utils.resp import RespClient, RespError
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize=1024, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[1] <= now:
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Shared cache for computed results (stats, complaint details). With several
+# worker processes/replicas it must live outside the workers (CACHE_BACKEND =
+# "redis": any server speaking the Redis protocol, e.g. Redis, Valkey or
+# `manage.py cache-server`); "local" keeps it per process.
+#
+# Keys are grouped in namespaces, each with a version counter kept in the
+# cache itself. Entries are stored tagged with the version they were computed
+# under and only served while it is current, so invalidating a namespace is
+# one INCR, seen by every worker at once. A value computed from data read
+# before an invalidation is tagged with the old version and never served.
+
+CACHE_REQUESTS = metrics.REGISTRY.register(metrics.Counter(
+    "civic_cache_requests_total",
+    "Cache lookups by namespace and result (hit, miss, coalesced, error).",
+    ("namespace", "result"),
+))
+CACHE_COMPUTE = metrics.REGISTRY.register(metrics.Histogram(
+    "civic_cache_compute_duration_seconds",
+    "Time spent computing values missing from the cache.",
+    ("namespace",),
+))
+CACHE_INVALIDATIONS = metrics.REGISTRY.register(metrics.Counter(
+    "civic_cache_invalidations_total",
+    "Namespace invalidations.",
+    ("namespace",),
+))
+
+logger = logging.getLogger(__name__)
+
+BACKEND_ERRORS = (OSError, ConnectionError, RespError, ValueError)
+
+
+class LocalBackend:
+    """Per-process backend; values are kept as the objects themselves."""
+
+    shared = False
+
+    def __init__(self, maxsize=10000):
+        self._entries = TTLCache(maxsize=maxsize)
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, version_key, key):
+        return self._versions.get(version_key, 0), self._entries.get(key)
+
+    def set(self, key, entry, ttl):
+        self._entries.set(key, entry, ttl)
+
+    def add(self, key, ttl):
+        return True  # concurrent computations are coalesced in process
+
+    def delete(self, key):
+        self._entries.delete(key)
+
+    def incr(self, key):
+        with self._lock:
+            version = self._versions[key] = self._versions.get(key, 0) + 1
+        return version
+
+
+class RespBackend:
+    """Redis protocol backend; entries are stored as JSON ``[version, value]``."""
+
+    shared = True
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, version_key, key):
+        version, data = self.client.execute("MGET", version_key, key)
+        return int(version or 0), json.loads(data) if data is not None else None
+
+    def set(self, key, entry, ttl):
+        self.client.execute("SET", key, json.dumps(entry, separators=(",", ":")), "PX", int(ttl * 1000))
+
+    def add(self, key, ttl):
+        return self.client.execute("SET", key, "1", "NX", "PX", int(ttl * 1000)) is not None
+
+    def delete(self, key):
+        self.client.execute("DEL", key)
+
+    def incr(self, key):
+        return self.client.execute("INCR", key)
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SharedCache:
+    """Versioned, single-flight cache over a backend.
+
+    Concurrent misses for the same key are computed once: other threads of
+    the process wait for the first one, and with a shared backend other
+    processes wait (up to ``lock_timeout`` seconds) for the process holding
+    the key's fill lock. When the backend is unreachable values are computed
+    directly and the backend is left alone for ``retry_after`` seconds.
+    Cached values are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, backend, prefix="civic", ttl=60.0, lock_timeout=5.0, retry_after=1.0):
+        self.backend = backend
+        self.prefix = prefix
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.retry_after = retry_after
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+
+    def _available(self):
+        return time.monotonic() >= self._down_until
+
+    def _failed(self, error):
+        if self._available():
+            logger.warning("cache backend unavailable: %s", error)
+        self._down_until = time.monotonic() + self.retry_after
+
+    def _compute(self, namespace, compute):
+        start = time.perf_counter()
+        try:
+            return compute()
+        finally:
+            CACHE_COMPUTE.observe(time.perf_counter() - start, namespace)
+
+    def get_or_compute(self, namespace, key, compute, ttl=None):
+        """Cached value of ``key`` in ``namespace``, calling ``compute()`` on
+        a miss. ``compute`` must return something JSON serializable; None
+        results are not cached."""
+        if not self._available():
+            CACHE_REQUESTS.inc(namespace, "error")
+            return self._compute(namespace, compute)
+        version_key = f"{self.prefix}:{namespace}:version"
+        full_key = f"{self.prefix}:{namespace}:{key}"
+        try:
+            version, entry = self.backend.get(version_key, full_key)
+        except BACKEND_ERRORS as e:
+            self._failed(e)
+            CACHE_REQUESTS.inc(namespace, "error")
+            return self._compute(namespace, compute)
+        if entry is not None and entry[0] == version:
+            CACHE_REQUESTS.inc(namespace, "hit")
+            return entry[1]
+
+        flight_key = (full_key, version)
+        with self._lock:
+            flight = self._flights.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[flight_key] = _Flight()
+        if not leader:
+            if flight.done.wait(self.lock_timeout):
+                CACHE_REQUESTS.inc(namespace, "coalesced")
+                if flight.error is not None:
+                    raise flight.error
+                return flight.value
+            CACHE_REQUESTS.inc(namespace, "miss")
+            return self._compute(namespace, compute)
+
+        try:
+            flight.value = self._fill(namespace, version_key, full_key, version, compute, ttl or self.ttl)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            flight.done.set()
+            with self._lock:
+                del self._flights[flight_key]
+
+    def _fill(self, namespace, version_key, full_key, version, compute, ttl):
+        lock_key = f"{full_key}:lock"
+        try:
+            locked = self.backend.add(lock_key, self.lock_timeout)
+            if not locked:
+                # another process is computing it: wait for its entry
+                deadline = time.monotonic() + self.lock_timeout
+                delay = 0.005
+                while time.monotonic() < deadline:
+                    time.sleep(delay)
+                    delay = min(delay * 2, 0.05)
+                    current, entry = self.backend.get(version_key, full_key)
+                    if entry is not None and entry[0] == current:
+                        CACHE_REQUESTS.inc(namespace, "coalesced")
+                        return entry[1]
+        except BACKEND_ERRORS as e:
+            self._failed(e)
+            CACHE_REQUESTS.inc(namespace, "error")
+            return self._compute(namespace, compute)
+
+        CACHE_REQUESTS.inc(namespace, "miss")
+        value = None
+        try:
+            value = self._compute(namespace, compute)
+        finally:
+            try:
+                if value is not None:
+                    self.backend.set(full_key, [version, value], ttl)
+                if locked:
+                    self.backend.delete(lock_key)
+            except BACKEND_ERRORS as e:
+                self._failed(e)
+        return value
+
+    def invalidate(self, *namespaces):
+        """Drop every entry of ``namespaces``, in all processes sharing the
+        backend."""
+        for namespace in namespaces:
+            CACHE_INVALIDATIONS.inc(namespace)
+            try:
+                self.backend.incr(f"{self.prefix}:{namespace}:version")
+            except BACKEND_ERRORS as e:
+                # entries already cached stay until they expire
+                logger.error("cache invalidation of %r failed: %s", namespace, e)
+                self._failed(e)
+
+
+def create_backend(config):
+    if config["CACHE_BACKEND"] == "local":
+        return LocalBackend(maxsize=config["CACHE_LOCAL_SIZE"])
+    if config["CACHE_BACKEND"] == "redis":
+        return RespBackend(RespClient(
+            config["CACHE_URL"],
+            pool_size=config["CACHE_POOL_SIZE"],
+            timeout=config["CACHE_SOCKET_TIMEOUT"],
+        ))
+    raise ValueError(f"unknown CACHE_BACKEND: {config['CACHE_BACKEND']!r}")
+
+
+def init_app(app):
+    backend = create_backend(app.config)
+    ttl = app.config["CACHE_TTL"]
+    if not backend.shared:
+        ttl = min(ttl, app.config["CACHE_LOCAL_TTL"])
+    app.extensions["cache"] = SharedCache(
+        backend,
+        prefix=app.config["CACHE_PREFIX"],
+        ttl=ttl,
+        lock_timeout=app.config["CACHE_LOCK_TIMEOUT"],
+    )
+
+
+def cached(namespace, key, compute, ttl=None):
+    return current_app.extensions["cache"].get_or_compute(namespace, key, compute, ttl)
+
+
+def invalidate(*namespaces):
+    current_app.extensions["cache"].invalidate(*namespaces)
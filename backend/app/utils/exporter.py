@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from app.db import dedicated_connection
+from app.db.dialect import backend
+from app.db.queries import complaints as complaints_queries
+from app.db.queries.other import get_reference_data
+
+FORMATS = ("ndjson", "csv")
+COLUMNS = tuple(complaints_queries.EXPORT_COLUMNS)
+# the columns import_complaints understands, plus ids and timestamps
+DEFAULT_COLUMNS = (
+    "id", "user_id", "category", "status", "title", "description",
+    "image_url", "location", "created_at", "updated_at",
+)
+MIME_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def parse_columns(value):
+    """Comma separated column names -> tuple, or raise ValueError."""
+    if not value:
+        return DEFAULT_COLUMNS
+    columns = tuple(c.strip() for c in value.split(",") if c.strip())
+    unknown = [c for c in columns if c not in complaints_queries.EXPORT_COLUMNS]
+    if unknown or not columns:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}; choose from {', '.join(COLUMNS)}")
+    return columns
+
+
+def parse_date(value):
+    """ISO 8601 date or datetime -> "YYYY-MM-DD[ HH:MM:SS]" as stored, or raise ValueError."""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    return parsed.strftime("%Y-%m-%d %H:%M:%S") if "T" in value or " " in value else parsed.strftime("%Y-%m-%d")
+
+
+def export_complaints(fmt, columns=DEFAULT_COLUMNS, batch_size=500, **filters):
+    """Yield the export as text chunks, one per fetched batch of rows.
+
+    Reads on a dedicated connection, so it can run for as long as the client
+    takes to download without holding a pooled one, to a replica if there
+    is a fresh one.
+    """
+    reference = get_reference_data()
+    names = {
+        "category": {c["id"]: c["name"] for c in reference.categories},
+        "status": {s["id"]: s["name"] for s in reference.statuses},
+    }
+    lookups = [(i, names[c]) for i, c in enumerate(columns) if c in names]
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if fmt == "csv":
+        writer.writerow(columns)
+        yield buffer.getvalue()
+
+    with dedicated_connection(replica=True) as db:
+        db.row_factory = None
+        if backend() == "sqlite":
+            # a one-pass scan gains nothing from mmap, and mapped pages would
+            # count against the worker's RSS for the length of the export
+            db.execute("PRAGMA mmap_size = 0")
+        for rows in complaints_queries.iter_complaints_for_export(db, columns, batch_size=batch_size, **filters):
+            buffer.seek(0)
+            buffer.truncate()
+            for row in rows:
+                values = list(row[1:])
+                for i, lookup in lookups:
+                    values[i] = lookup.get(values[i])
+                if fmt == "csv":
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(columns, values)), ensure_ascii=False))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+
+
+def gzip_chunks(chunks, level=6):
+    """Gzip a stream of text chunks incrementally."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 => gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
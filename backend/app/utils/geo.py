@@ -0,0 +1,54 @@
+import math
+import re
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_M / 180
+
+# "12.9716,77.5946", "12.9716 77.5946", "geo:12.9716,77.5946",
+# ".../@12.9716,77.5946,15z" or "...?q=12.9716,77.5946". Both numbers need a
+# decimal point so street addresses like "12, 5th Cross" are not mistaken
+# for coordinates.
+_COORDINATES = re.compile(r"(?<![\d.])(-?\d{1,2}\.\d+)\s*[,; ]\s*(-?\d{1,3}\.\d+)(?![\d.])")
+
+
+def parse_location(text):
+    """Extract (lat, lon) from a free-text location, or (None, None)."""
+    # non-text locations (from JSON) are stored as given, without coordinates
+    if not text or not isinstance(text, str):
+        return None, None
+    match = _COORDINATES.search(text)
+    if not match:
+        return None, None
+    lat, lon = float(match.group(1)), float(match.group(2))
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None, None
+    return lat, lon
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance in meters (registered as SQL haversine())."""
+    if lat1 is None or lon1 is None or lat2 is None or lon2 is None:
+        return None
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bboxes_around(lat, lon, radius_m):
+    """Boxes (min_lat, min_lon, max_lat, max_lon) that together contain the
+    circle: one, or two when it crosses the antimeridian."""
+    dlat = radius_m / METERS_PER_DEGREE_LAT
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90 or max_lat >= 90:
+        # the circle holds a pole, and with it every longitude
+        return [(max(-90.0, min_lat), -180.0, min(90.0, max_lat), 180.0)]
+    # the widest point is where a meridian touches the circle
+    dlon = math.degrees(math.asin(min(1.0, math.sin(math.radians(dlat)) / math.cos(math.radians(lat)))))
+    min_lon, max_lon = lon - dlon, lon + dlon
+    if min_lon < -180:
+        return [(min_lat, min_lon + 360, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lon)]
+    if max_lon > 180:
+        return [(min_lat, min_lon, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lon - 360)]
+    return [(min_lat, min_lon, max_lat, max_lon)]
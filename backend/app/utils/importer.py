@@ -0,0 +1,153 @@
+import csv
+import json
+import time
+from datetime import datetime, timezone
+from app.db.queries import complaints as complaints_queries
+from app.db.queries.other import get_category_id, get_status_id
+from app.utils.geo import parse_location
+
+FORMATS = ("ndjson", "csv")
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+        self.stopped = None  # why the input stopped being read, if it did
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def error(self, row, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    def to_dict(self):
+        return {
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "elapsed_s": round(self.elapsed, 3),
+            "rows_per_sec": round(self.inserted / self.elapsed, 1) if self.elapsed else 0,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "stopped": self.stopped,
+        }
+
+
+# Decode a binary stream line by line, so that bytes that are not UTF-8 stop
+# the import at their own line rather than at the start of a read buffer
+def decode_lines(stream):
+    for line in stream:
+        yield line.decode("utf-8")
+
+
+# Yield one dict per input record from a text stream, without reading it all
+def iter_records(stream, fmt):
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield ValueError("Invalid JSON")
+            continue
+        yield record if isinstance(record, dict) else ValueError("Expected a JSON object")
+
+
+# NDJSON values can be of any JSON type; every field read here is text
+def _text(record, field):
+    value = record.get(field)
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"{field} must be a string")
+    return value
+
+
+def parse_record(record, user_id):
+    """Turn one input record into a bulk_insert_complaints row, or raise ValueError."""
+    title = (_text(record, "title") or "").strip()
+    description = (_text(record, "description") or "").strip()
+    if not title or not description:
+        raise ValueError("title and description are required")
+
+    category = _text(record, "category") or _text(record, "category_name")
+    category_id = get_category_id(category)
+    if category_id is None:
+        raise ValueError(f"Unknown category: {category!r}")
+
+    status = _text(record, "status") or "Pending"
+    status_id = get_status_id(status)
+    if status_id is None:
+        raise ValueError(f"Unknown status: {status!r}")
+
+    created_at = _text(record, "created_at") or None
+    if created_at:
+        try:
+            parsed = datetime.fromisoformat(created_at)
+        except ValueError:
+            raise ValueError(f"Invalid created_at: {created_at!r}")
+        # stored as UTC, like CURRENT_TIMESTAMP
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc)
+        created_at = parsed.strftime("%Y-%m-%d %H:%M:%S")
+
+    location = _text(record, "location") or None
+    lat, lon = parse_location(location)
+
+    return (
+        user_id,
+        category_id,
+        status_id,
+        title,
+        description,
+        _text(record, "image_url") or None,
+        location,
+        created_at,
+        lat,
+        lon,
+    )
+
+
+def import_complaints(records, user_id, chunk_size=1000, defer_fts=False):
+    """Validate and insert records in chunked transactions, attributing them to ``user_id``."""
+    report = ImportReport()
+
+    def run():
+        chunk = []
+        try:
+            for row_number, record in enumerate(records, start=1):
+                report.rows += 1
+                try:
+                    if isinstance(record, Exception):
+                        raise record
+                    chunk.append(parse_record(record, user_id))
+                except ValueError as e:
+                    report.error(row_number, str(e))
+                    continue
+                if len(chunk) >= chunk_size:
+                    complaints_queries.bulk_insert_complaints(chunk)
+                    report.inserted += len(chunk)
+                    chunk = []
+        except UnicodeDecodeError:
+            # the rows read before it are still inserted
+            report.stopped = "Input is not valid UTF-8"
+        if chunk:
+            complaints_queries.bulk_insert_complaints(chunk)
+            report.inserted += len(chunk)
+
+    try:
+        if defer_fts:
+            with complaints_queries.deferred_search_indexing():
+                run()
+        else:
+            run()
+    finally:
+        report.elapsed = time.perf_counter() - report.started
+    return report
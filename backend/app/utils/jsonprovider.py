@@ -0,0 +1,80 @@
+import time
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+from app.utils import metrics
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson (or `uv sync --extra fast`)
+    orjson = None
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's standard library provider, with the time spent building JSON
+    responses reported in Server-Timing."""
+
+    def response(self, *args, **kwargs):
+        start = time.perf_counter()
+        response = super().response(*args, **kwargs)
+        metrics.record_serialization(time.perf_counter() - start)
+        return response
+
+
+class OrjsonProvider(TimedJSONProvider):
+    """orjson-backed provider producing the same documents as the default one:
+    dates still go through Flask's ``default`` (HTTP dates) and keys are
+    sorted when ``sort_keys`` is set."""
+
+    def _options(self, response=False):
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        # like the default provider, only responses are ever pretty-printed
+        if response and (self.compact is False or (self.compact is None and self._app.debug)):
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:  # options orjson has no equivalent for
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # encode straight to bytes, skipping the str round trip
+        start = time.perf_counter()
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self._options(response=True) | orjson.OPT_APPEND_NEWLINE)
+        response = self._app.response_class(body, mimetype=self.mimetype)
+        metrics.record_serialization(time.perf_counter() - start)
+        return response
+
+
+PROVIDERS = {"default": TimedJSONProvider, "orjson": OrjsonProvider}
+
+
+def init_app(app):
+    name = app.config["JSON_PROVIDER"]
+    if name == "auto":
+        name = "orjson" if orjson is not None else "default"
+    if name == "orjson" and orjson is None:
+        raise RuntimeError("JSON_PROVIDER is 'orjson' but orjson is not installed")
+    app.json = PROVIDERS[name](app)
+    app.json.compact = app.config["JSON_COMPACT"]
+
+
+def rows_response(key, rows, status=200, **fields):
+    """JSON response ``{key: [...rows], **fields}`` for rows that are already
+    JSON objects (encoded by SQLite's json_object()), so listings never build
+    a dict per row."""
+    start = time.perf_counter()
+    head = current_app.json.dumps(fields) if fields else "{}"
+    # splice the list in as the last member of the encoded fields
+    body = f'{head[:-1].rstrip()}{"," if fields else ""}"{key}":[{",".join(rows)}]}}\n'
+    response = current_app.response_class(body, status=status, mimetype=current_app.json.mimetype)
+    metrics.record_serialization(time.perf_counter() - start)
+    return response
@@ -0,0 +1,176 @@
+import threading
+import time
+from flask import g, request
+
+# Prometheus text-format metrics, kept in process memory. Each worker process
+# exposes its own numbers; scrape every worker (or sum in Prometheus).
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _labels(names, values, extra=""):
+    parts = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{name}="{value}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            values = {k: ([*v[0]], v[1], v[2]) for k, v in self._values.items()}
+        for labels, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {count}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """``collector()`` returns (name, kind, help, value) gauges computed at scrape time."""
+        self.collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        for collector in self.collectors:
+            for name, kind, help, value in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    "civic_http_request_duration_seconds",
+    "Request latency by route.",
+    ("method", "route", "status"),
+))
+REQUEST_QUERIES = REGISTRY.register(Histogram(
+    "civic_http_request_db_queries",
+    "Database statements executed per request.",
+    ("route",),
+    buckets=QUERY_COUNT_BUCKETS,
+))
+STATEMENT_LATENCY = REGISTRY.register(Histogram(
+    "civic_db_statement_duration_seconds",
+    "Database statement execution time by operation.",
+    ("operation",),
+))
+STATEMENT_ROWS = REGISTRY.register(Counter(
+    "civic_db_statement_rows_total",
+    "Rows fetched (reads) or affected (writes) by operation.",
+    ("operation",),
+))
+SLOW_STATEMENTS = REGISTRY.register(Counter(
+    "civic_db_slow_statements_total",
+    "Statements slower than SLOW_QUERY_MS.",
+    ("operation",),
+))
+
+
+def record_statement(operation, elapsed):
+    STATEMENT_LATENCY.observe(elapsed, operation)
+    if g:
+        g.query_count = g.get("query_count", 0) + 1
+        g.query_time = g.get("query_time", 0.0) + elapsed
+
+
+def record_serialization(elapsed):
+    if g:
+        g.json_time = g.get("json_time", 0.0) + elapsed
+
+
+def init_app(app):
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+        g.query_count = 0
+        g.query_time = 0.0
+        g.json_time = 0.0
+
+    @app.after_request
+    def record_request(response):
+        started = g.get("request_started")
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        REQUEST_LATENCY.observe(elapsed, request.method, route, response.status_code)
+        REQUEST_QUERIES.observe(g.query_count, route)
+        response.headers["Server-Timing"] = (
+            f'db;dur={g.query_time * 1000:.2f};desc="{g.query_count} queries", '
+            f"json;dur={g.json_time * 1000:.2f}, "
+            f"app;dur={elapsed * 1000:.2f}"
+        )
+        return response
@@ -0,0 +1,43 @@
+import base64
+import json
+import math
+
+
+# Opaque keyset cursors: the sort key of the last row on a page, so the next
+# page can seek straight to it instead of counting past OFFSET rows.
+def encode_cursor(*values):
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+# Sort key types: the key of a listing (created_at) or of search (its rank),
+# then the id
+LISTING_KEY = (str, int)
+SEARCH_KEY = ((int, float), int)
+
+
+def decode_cursor(cursor, types):
+    """The values of ``cursor``, one per type in ``types``, or raise ValueError."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Invalid cursor")
+    for value, expected in zip(values, types):
+        # bool is an int to isinstance, but never a sort key
+        if isinstance(value, bool) or not isinstance(value, expected):
+            raise ValueError("Invalid cursor")
+        # and numbers have to bind as a 64-bit integer or a finite double
+        if isinstance(value, int) and not -2**63 <= value < 2**63:
+            raise ValueError("Invalid cursor")
+        if isinstance(value, float) and not math.isfinite(value):
+            raise ValueError("Invalid cursor")
+    return values
+
+
+def clamp_per_page(per_page, default=10, maximum=100):
+    if not per_page or per_page < 1:
+        return default
+    return min(per_page, maximum)
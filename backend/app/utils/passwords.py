@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from functools import lru_cache
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+from app.utils import metrics
+
+# Password hashing runs on a small per-process pool of hashing processes, so
+# a burst of logins queues behind a bounded number of KDF computations
+# instead of taking every request thread (and core) on the worker. When
+# PASSWORD_HASH_MAX_PENDING operations are already in flight the caller gets
+# HasherBusy straight away and the route answers 429.
+
+HASH_OPERATIONS = metrics.REGISTRY.register(metrics.Counter(
+    "civic_password_hash_total",
+    "Password hash/verify operations by result (ok, busy, timeout).",
+    ("operation", "result"),
+))
+HASH_LATENCY = metrics.REGISTRY.register(metrics.Histogram(
+    "civic_password_hash_duration_seconds",
+    "Password hash/verify time including the wait for a hashing process.",
+    ("operation",),
+))
+
+
+class HasherBusy(Exception):
+    pass
+
+
+def _method_of(pwhash):
+    return pwhash.split("$", 1)[0]
+
+
+# run in the hashing processes
+
+def _lower_priority(nice):
+    # request handling wins the CPU over hashing when cores are contended
+    if nice and hasattr(os, "nice"):
+        os.nice(nice)
+
+
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+@lru_cache(maxsize=None)
+def _canonical_method(method):
+    # "scrypt" is stored as "scrypt:32768:8:1" etc.; ask werkzeug once
+    return _method_of(generate_password_hash("", method=method))
+
+
+def _verify(pwhash, password, method):
+    if not check_password_hash(pwhash, password):
+        return False, None
+    # hashed with older KDF parameters: hand back a replacement
+    if _method_of(pwhash) != _canonical_method(method):
+        return True, generate_password_hash(password, method=method)
+    return True, None
+
+
+class PasswordHasher:
+    def __init__(self, method, workers=2, max_pending=8, timeout=10.0, nice=10):
+        self.method = method
+        self.workers = workers
+        self.nice = nice
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # started lazily, and again after a fork, so each server worker owns
+        # its hashing processes
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, initializer=_lower_priority, initargs=(self.nice,)
+                    )
+                    self._pid = os.getpid()
+        return self._executor
+
+    def _run(self, operation, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            HASH_OPERATIONS.inc(operation, "busy")
+            raise HasherBusy("Too many password operations in progress")
+        start = time.perf_counter()
+        if self.workers <= 0:
+            try:
+                result = fn(*args)
+            finally:
+                self._slots.release()
+        else:
+            try:
+                future = self._get_executor().submit(fn, *args)
+            except Exception:
+                self._slots.release()
+                raise
+            # the slot is held until the process is done, even if we stop waiting
+            future.add_done_callback(lambda f: self._slots.release())
+            try:
+                result = future.result(timeout=self.timeout)
+            except FutureTimeout:
+                HASH_OPERATIONS.inc(operation, "timeout")
+                raise HasherBusy("Password operation timed out")
+        HASH_LATENCY.observe(time.perf_counter() - start, operation)
+        HASH_OPERATIONS.inc(operation, "ok")
+        return result
+
+    def hash(self, password):
+        return self._run("hash", _hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        """Return (matches, new_hash); new_hash is set when the stored hash
+        used other KDF parameters and should be replaced."""
+        return self._run("verify", _verify, pwhash, password, self.method)
+
+
+def init_app(app):
+    app.extensions["password_hasher"] = PasswordHasher(
+        app.config["PASSWORD_HASH_METHOD"],
+        workers=app.config["PASSWORD_HASH_WORKERS"],
+        max_pending=app.config["PASSWORD_HASH_MAX_PENDING"],
+        timeout=app.config["PASSWORD_HASH_TIMEOUT"],
+        nice=app.config["PASSWORD_HASH_NICE"],
+    )
+
+
+def hash_password(password):
+    return current_app.extensions["password_hasher"].hash(password)
+
+
+def verify_password(pwhash, password):
+    return current_app.extensions["password_hasher"].verify(pwhash, password)
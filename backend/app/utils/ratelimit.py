@@ -0,0 +1,48 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class FailureLimiter:
+    """Thread-safe per-key failure counter over a fixed window.
+
+    After ``limit`` failures within ``window`` seconds a key is blocked
+    until the window that started with its first failure runs out. At most
+    ``maxsize`` keys are tracked; the least recently failed are dropped.
+    """
+
+    def __init__(self, limit=5, window=300.0, maxsize=10000):
+        self.limit = limit
+        self.window = window
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # key -> [failures, window_start]
+        self._lock = threading.Lock()
+
+    def retry_after(self, key):
+        """Seconds until ``key`` may try again; 0 if it is not blocked."""
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return 0
+            if item[1] + self.window <= now:
+                del self._data[key]
+                return 0
+            if item[0] < self.limit:
+                return 0
+            return item[1] + self.window - now
+
+    def failure(self, key):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[1] + self.window <= now:
+                item = self._data[key] = [0, now]
+            item[0] += 1
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def reset(self, key):
+        with self._lock:
+            self._data.pop(key, None)
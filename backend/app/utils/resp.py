@@ -0,0 +1,290 @@
+import os
+import socket
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+from queue import Empty, LifoQueue
+from urllib.parse import unquote, urlsplit
+
+# Minimal client for the Redis serialization protocol (RESP2), enough for the
+# shared cache (GET/MGET/SET/DEL/INCR), and a small in-memory server speaking
+# the same subset, for development and tests where no Redis is running.
+
+
+class RespError(Exception):
+    """Error reply from the server."""
+
+
+def _encode(args):
+    out = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif isinstance(arg, (int, float)):
+            arg = str(arg).encode()
+        out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(out)
+
+
+def _read(stream):
+    line = stream.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("connection closed")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        return RespError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        data = stream.read(length + 2)
+        if len(data) != length + 2:
+            raise ConnectionError("connection closed")
+        return data[:-2]
+    if kind == b"*":
+        length = int(rest)
+        return None if length < 0 else [_read(stream) for _ in range(length)]
+    raise ConnectionError(f"unexpected reply {line[:20]!r}")
+
+
+class RespClient:
+    """Thread-safe client for ``redis://[:password@]host[:port][/db]`` URLs.
+
+    Keeps up to ``pool_size`` idle connections; a connection that fails is
+    dropped and the error (OSError/ConnectionError) raised to the caller.
+    """
+
+    def __init__(self, url, pool_size=8, timeout=0.5):
+        parts = urlsplit(url)
+        if parts.scheme != "redis":
+            raise ValueError(f"unsupported cache URL scheme: {parts.scheme!r}")
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 6379
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int(parts.path.strip("/") or 0)
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.pid = os.getpid()
+        self._idle = LifoQueue()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = (sock, sock.makefile("rb"))
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        if setup:
+            self._roundtrip(conn, setup)
+        return conn
+
+    def _acquire(self):
+        if self.pid != os.getpid():  # forked: never share the parent's sockets
+            self.pid = os.getpid()
+            self._idle = LifoQueue()
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            return self._connect()
+
+    def _release(self, conn):
+        if self._idle.qsize() < self.pool_size:
+            self._idle.put(conn)
+        else:
+            self._close(conn)
+
+    @staticmethod
+    def _close(conn):
+        for part in reversed(conn):
+            try:
+                part.close()
+            except OSError:
+                pass
+
+    @staticmethod
+    def _roundtrip(conn, commands):
+        sock, stream = conn
+        sock.sendall(b"".join(_encode(args) for args in commands))
+        replies = [_read(stream) for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    def pipeline(self, commands):
+        """Send ``commands`` (tuples of arguments) in one round trip and
+        return their replies."""
+        conn = self._acquire()
+        try:
+            replies = self._roundtrip(conn, commands)
+        except RespError:
+            self._release(conn)  # the connection is still in sync
+            raise
+        except BaseException:
+            self._close(conn)
+            raise
+        self._release(conn)
+        return replies
+
+    def execute(self, *args):
+        return self.pipeline([args])[0]
+
+    def close(self):
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except Empty:
+                return
+
+
+class _Store:
+    """Keys of the stand-in server: bytes values with optional expiry,
+    evicting the least recently used key beyond ``max_keys``."""
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self.data = OrderedDict()  # key -> (value, expires_at or None)
+        self.lock = threading.Lock()
+
+    def get(self, key, now):
+        item = self.data.get(key)
+        if item is None:
+            return None
+        if item[1] is not None and item[1] <= now:
+            del self.data[key]
+            return None
+        self.data.move_to_end(key)
+        return item[0]
+
+    def set(self, key, value, expires_at):
+        self.data[key] = (value, expires_at)
+        self.data.move_to_end(key)
+        while len(self.data) > self.max_keys:
+            self.data.popitem(last=False)
+
+
+def _set(store, now, key, value, *options):
+    expires_at, only_new, only_existing = None, False, False
+    options = [o.upper() for o in options]
+    i = 0
+    while i < len(options):
+        option = options[i]
+        if option in (b"EX", b"PX") and i + 1 < len(options):
+            amount = int(options[i + 1])
+            expires_at = now + (amount if option == b"EX" else amount / 1000)
+            i += 2
+            continue
+        if option == b"NX":
+            only_new = True
+        elif option == b"XX":
+            only_existing = True
+        else:
+            return RespError("ERR syntax error")
+        i += 1
+    exists = store.get(key, now) is not None
+    if (only_new and exists) or (only_existing and not exists):
+        return None
+    store.set(key, value, expires_at)
+    return "OK"
+
+
+def _incr(store, now, key):
+    item = store.data.get(key)
+    current = store.get(key, now)
+    try:
+        value = int(current or 0) + 1
+    except ValueError:
+        return RespError("ERR value is not an integer or out of range")
+    store.set(key, str(value).encode(), item[1] if item and current is not None else None)
+    return value
+
+
+def _delete(store, now, *keys):
+    return sum(store.data.pop(key, None) is not None for key in keys)
+
+
+def _flush(store, now, *options):
+    store.data.clear()
+    return "OK"
+
+
+COMMANDS = {
+    b"PING": lambda store, now, *args: args[0] if args else "PONG",
+    b"ECHO": lambda store, now, value: value,
+    b"GET": lambda store, now, key: store.get(key, now),
+    b"MGET": lambda store, now, *keys: [store.get(key, now) for key in keys],
+    b"SET": _set,
+    b"DEL": _delete,
+    b"EXISTS": lambda store, now, *keys: sum(store.get(key, now) is not None for key in keys),
+    b"INCR": _incr,
+    b"DBSIZE": lambda store, now: len(store.data),
+    b"FLUSHDB": _flush,
+    b"FLUSHALL": _flush,
+    # accepted for client compatibility; there is a single keyspace, no auth
+    b"SELECT": lambda store, now, db: "OK",
+    b"AUTH": lambda store, now, *args: "OK",
+    b"COMMAND": lambda store, now, *args: [],
+}
+
+
+def _reply(value):
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, RespError):
+        return b"-%s\r\n" % str(value).encode()
+    if isinstance(value, str):
+        return b"+%s\r\n" % value.encode()
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(_reply(v) for v in value)
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        store = self.server.store
+        while True:
+            try:
+                args = _read(self.rfile)
+            except (ConnectionError, OSError, ValueError):
+                return
+            if not isinstance(args, list) or not args:
+                return
+            name = args[0].upper()
+            if name == b"QUIT":
+                self.wfile.write(_reply("OK"))
+                return
+            command = COMMANDS.get(name)
+            if command is None:
+                reply = RespError(f"ERR unknown command '{name.decode(errors='replace')}'")
+            else:
+                with store.lock:
+                    try:
+                        reply = command(store, time.monotonic(), *args[1:])
+                    except (TypeError, ValueError):
+                        reply = RespError(f"ERR wrong arguments for '{name.decode()}' command")
+            self.wfile.write(_reply(reply))
+            self.wfile.flush()
+
+
+class CacheServer(socketserver.ThreadingTCPServer):
+    """In-memory stand-in for Redis covering the commands the cache uses
+    (``manage.py cache-server``). One thread per connection, one lock for
+    the keyspace; not persistent."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128  # every worker opens its connections at once after a restart
+
+    def __init__(self, address=("127.0.0.1", 6379), max_keys=100000):
+        self.store = _Store(max_keys)
+        super().__init__(address, _Handler)
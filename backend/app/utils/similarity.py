@@ -0,0 +1,84 @@
+import hashlib
+import re
+import zlib
+from array import array
+
+# MinHash signatures over the words of a complaint's title and description.
+# Two signatures agree in each position with probability equal to the Jaccard
+# similarity of the word sets, so comparing them estimates how much wording
+# two complaints share. For LSH the signature is cut into BANDS bands of ROWS
+# values; complaints sharing any band bucket are candidates, which catches
+# pairs above roughly (1 / BANDS) ** (1 / ROWS) = 0.37 similarity while
+# skipping nearly everything else.
+NUM_PERM = 60
+BANDS = 20
+ROWS = NUM_PERM // BANDS
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD = re.compile(r"[^\W_]+")
+# words that say nothing about the problem being reported
+STOPWORDS = frozenset("""
+    a an and are as at be been but by for from has have in is it its near of on
+    or our please the there this to was were with
+""".split())
+
+
+def _coefficient(name, i):
+    # fixed (a, b) pairs so signatures stay comparable across processes
+    digest = hashlib.blake2b(f"{name}{i}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % _MERSENNE_PRIME
+
+
+_PERMUTATIONS = [(_coefficient("a", i) | 1, _coefficient("b", i)) for i in range(NUM_PERM)]
+
+
+def tokens(text):
+    """Set of normalized words: lowercased, stopwords dropped, plural "s" cut."""
+    words = set()
+    for word in _WORD.findall((text or "").lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.add(word)
+    return words
+
+
+def minhash(title, description):
+    """NUM_PERM-value signature (array of uint32) of a complaint's text."""
+    hashes = [zlib.crc32(w.encode()) for w in tokens(f"{title or ''} {description or ''}")]
+    if not hashes:
+        return array("I", [_MAX_HASH] * NUM_PERM)
+    return array("I", [
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes) & _MAX_HASH
+        for a, b in _PERMUTATIONS
+    ])
+
+
+def to_blob(signature):
+    return signature.tobytes()
+
+
+def from_blob(blob):
+    signature = array("I")
+    signature.frombytes(blob)
+    return signature
+
+
+def similarity(sig1, sig2):
+    """Estimated Jaccard similarity of the texts behind two signatures."""
+    return sum(1 for x, y in zip(sig1, sig2) if x == y) / NUM_PERM
+
+
+def band_buckets(signature, category_id):
+    """One signed 64-bit bucket key per band. The category is part of the
+    key, so only complaints of the same category ever share a bucket."""
+    buckets = []
+    for band in range(BANDS):
+        values = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(
+            f"{category_id}:{band}:".encode() + values.tobytes(), digest_size=8
+        ).digest()
+        buckets.append(int.from_bytes(digest, "big", signed=True))
+    return buckets
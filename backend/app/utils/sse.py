@@ -0,0 +1,225 @@
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from flask import current_app
+from app.db import close_db
+from app.db.queries import events as events_queries
+from app.utils import metrics
+
+# Live feed of complaint changes over Server-Sent Events. Per worker, one hub
+# thread tails complaint_events and keeps the most recent events, already
+# formatted, in memory; every open stream waits on the hub's condition and
+# writes out what its user may see. Streams hold no database connection while
+# they wait, so on gevent workers a worker keeps thousands of them open; on
+# gthread workers each stream takes a thread and their number is capped.
+
+logger = logging.getLogger(__name__)
+
+STREAMS = metrics.REGISTRY.register(metrics.Counter(
+    "civic_sse_streams_total",
+    "Event streams by outcome (opened, rejected, reset, closed).",
+    ("result",),
+))
+EVENTS_READ = metrics.REGISTRY.register(metrics.Counter(
+    "civic_sse_events_total",
+    "Events the hub read from the change log.",
+))
+
+
+def format_event(row):
+    data = {
+        "complaint_id": row["complaint_id"],
+        "status": row["status"],
+        "from_status": row["from_status"],
+        "created_at": row["created_at"],
+    }
+    kind = "created" if row["from_status"] is None else "status"
+    return f"id: {row['id']}\nevent: {kind}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class EventHub:
+    def __init__(self, app, poll_interval=1.0, buffer=4096, retention_days=7):
+        self.app = app
+        self.poll_interval = poll_interval
+        self.buffer = buffer
+        self.retention_days = retention_days
+        self.streams = 0
+        self._lock = threading.Lock()
+        self._changed = threading.Condition()
+        self._wake = threading.Event()
+        self._pid = None
+        self._reset()
+
+    def _reset(self):
+        self.last_id = 0  # newest event read
+        self.floor = 0  # every event after this id is in the buffer
+        self._ids = []
+        self._events = []  # (user_id, formatted event), parallel to _ids
+
+    def start(self):
+        # started by the first stream, and again after a fork, so each
+        # server worker tails the log on its own thread
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._reset()
+            self.streams = 0
+            with self.app.app_context():
+                self.last_id = self.floor = events_queries.get_event_id_range()[1]
+            threading.Thread(target=self._run, name="sse-hub", daemon=True).start()
+            self._pid = os.getpid()
+
+    def notify(self):
+        """Read the log now rather than at the next poll (after a commit)."""
+        self._wake.set()
+
+    def _run(self):
+        pruned = 0.0
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                with self.app.app_context():
+                    while self._poll():
+                        pass
+                    if time.monotonic() - pruned > 3600:
+                        pruned = time.monotonic()
+                        events_queries.prune_events(self.retention_days)
+            except Exception:
+                logger.exception("reading complaint events failed")
+
+    def _poll(self):
+        """Buffer the events after last_id; True when there may be more."""
+        rows = events_queries.get_events_after(self.last_id, limit=self.buffer)
+        if not rows:
+            return False
+        formatted = [(row["id"], row["user_id"], format_event(row)) for row in rows]
+        with self._changed:
+            for event_id, user_id, event in formatted:
+                self._ids.append(event_id)
+                self._events.append((user_id, event))
+            self.last_id = self._ids[-1]
+            # trimmed in batches rather than on every append
+            if len(self._ids) > 2 * self.buffer:
+                cut = len(self._ids) - self.buffer
+                self.floor = self._ids[cut - 1]
+                del self._ids[:cut], self._events[:cut]
+            self._changed.notify_all()
+        EVENTS_READ.inc(amount=len(rows))
+        return len(rows) == self.buffer
+
+    def wait(self, after, user_id=None, timeout=15.0):
+        """Formatted events after id ``after`` for ``user_id`` (None: all
+        users), waiting up to ``timeout`` for one. Returns ``(events, after)``
+        with ``after`` advanced past everything looked at; ``events`` is None
+        when ``after`` is older than the buffer and has to be read from the
+        database."""
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while True:
+                if after < self.floor:
+                    return None, after
+                if self.last_id > after:
+                    start = bisect.bisect_right(self._ids, after)
+                    events = [
+                        event for owner, event in self._events[start:] if user_id is None or owner == user_id
+                    ]
+                    after = self.last_id
+                    if events:
+                        return events, after
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return [], after
+                self._changed.wait(remaining)
+
+    def open(self, limit):
+        """Count a new stream in; False when ``limit`` are already open."""
+        with self._lock:
+            if limit and self.streams >= limit:
+                return False
+            self.streams += 1
+            return True
+
+    def close(self):
+        with self._lock:
+            self.streams -= 1
+        STREAMS.inc("closed")
+
+    def max_streams(self):
+        config = current_app.config
+        if config["SSE_MAX_STREAMS"] or config["SERVER"] != "production" or config["SERVER_WORKER_CLASS"] != "gthread":
+            return config["SSE_MAX_STREAMS"]
+        # leave gthread workers half their threads for requests
+        return max(1, config["SERVER_THREADS"] // 2)
+
+
+def init_app(app):
+    app.extensions["event_hub"] = EventHub(
+        app,
+        poll_interval=app.config["SSE_POLL_INTERVAL"],
+        buffer=app.config["SSE_BUFFER"],
+        retention_days=app.config["EVENT_RETENTION_DAYS"],
+    )
+
+
+def get_hub():
+    hub = current_app.extensions["event_hub"]
+    hub.start()
+    return hub
+
+
+def stream(hub, after, user_id=None):
+    """The event stream from id ``after`` (None: from now on) for
+    ``user_id`` (None: everyone's complaints). Replays missed events from the
+    log, then follows the hub; a comment goes out every SSE_HEARTBEAT seconds
+    of quiet so proxies keep the connection and dead clients are noticed."""
+    config = current_app.config
+    yield f"retry: {config['SSE_RETRY']}\n\n"
+    oldest, newest = events_queries.get_event_id_range()
+    if after is None:
+        after = newest
+    elif after > newest or after < oldest - 1:
+        # pruned since, or an id from another database: the client reloads
+        # its listing and follows on from here
+        STREAMS.inc("reset")
+        yield f"id: {newest}\nevent: reset\ndata: {{}}\n\n"
+        after = newest
+    close_db()  # no connection is held while waiting
+    limit = config["SSE_BACKLOG_LIMIT"]
+    while True:
+        events, after = hub.wait(after, user_id, config["SSE_HEARTBEAT"])
+        if events is None:
+            floor = hub.floor
+            rows = events_queries.get_events_after(after, user_id, limit)
+            close_db()
+            if rows:
+                yield "".join(format_event(row) for row in rows)
+                after = rows[-1]["id"]
+            if len(rows) < limit:
+                # read up to the newest event, which the buffer has from floor on
+                after = max(after, floor)
+        elif events:
+            yield "".join(events)
+        else:
+            yield ": keepalive\n\n"
+
+
+def notify():
+    current_app.extensions["event_hub"].notify()
+
+
+# open streams on this worker, read at scrape time
+def _stream_metrics():
+    try:
+        hub = current_app.extensions["event_hub"]
+    except (RuntimeError, KeyError):
+        return []
+    return [("civic_sse_open_streams", "gauge", "Open event streams on this worker.", hub.streams)]
+
+
+metrics.REGISTRY.add_collector(_stream_metrics)
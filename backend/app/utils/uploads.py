@@ -0,0 +1,268 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+from app.utils import metrics
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional: without Pillow the originals are served
+    Image = None
+
+# Uploaded photos are streamed straight from the request body to a temporary
+# file next to the store while their SHA-256 is computed, then renamed to
+# <UPLOAD_FOLDER>/<first two hex digits>/<sha256>, so memory use does not
+# depend on the photo's size and identical photos are stored once. Resized
+# variants (<sha256>.<variant>.jpg) are made afterwards by a per-process
+# pool of Pillow processes; until one exists the original is served.
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+# leading bytes -> content type; anything else is refused
+SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+UPLOADS = metrics.REGISTRY.register(metrics.Counter(
+    "civic_image_uploads_total",
+    "Image uploads by result (stored, duplicate, rejected).",
+    ("result",),
+))
+UPLOAD_BYTES = metrics.REGISTRY.register(metrics.Counter(
+    "civic_image_upload_bytes_total",
+    "Bytes of accepted image uploads.",
+))
+RESIZES = metrics.REGISTRY.register(metrics.Counter(
+    "civic_image_resizes_total",
+    "Images resized into their variants, by result (ok, error).",
+    ("result",),
+))
+RESIZE_LATENCY = metrics.REGISTRY.register(metrics.Histogram(
+    "civic_image_resize_duration_seconds",
+    "Time from queueing an image to its variants being written.",
+))
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _content_type(head):
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    for signature, content_type in SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    return None
+
+
+class ImageStore:
+    def __init__(self, root, variants, max_bytes):
+        self.root = root
+        self.variants = variants  # name -> longest side in pixels
+        self.max_bytes = max_bytes
+
+    def path(self, sha256, variant=None):
+        name = sha256 if variant is None else f"{sha256}.{variant}.jpg"
+        return os.path.join(self.root, sha256[:2], name)
+
+    def missing_variants(self, sha256):
+        return [name for name in self.variants if not os.path.exists(self.path(sha256, name))]
+
+    def save(self, chunks):
+        """Write ``chunks`` (bytes) to the store; returns (sha256, size,
+        content_type). Raises UploadError for oversized or non-image data."""
+        os.makedirs(os.path.join(self.root, "tmp"), exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        head = b""
+        content_type = None
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.join(self.root, "tmp"))
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in chunks:
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise UploadError(f"Image exceeds {self.max_bytes} bytes", 413)
+                    if content_type is None:
+                        # refuse other files as soon as their first bytes are in
+                        head += chunk[:16]
+                        content_type = _content_type(head)
+                        if content_type is None and len(head) >= 16:
+                            break
+                    digest.update(chunk)
+                    out.write(chunk)
+            if content_type is None:
+                raise UploadError("Image must be JPEG, PNG, GIF or WebP")
+            sha256 = digest.hexdigest()
+            target = self.path(sha256)
+            if os.path.exists(target):
+                os.unlink(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(tmp_path, target)
+            return sha256, size, content_type
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+
+def iter_multipart_file(stream, boundary, field):
+    """Yield the content of file part ``field`` of a multipart body read
+    from ``stream`` in CHUNK_SIZE pieces; the rest of the body is skipped."""
+    # the decoder only holds what the last read left undecoded (and small
+    # form fields); anything bigger is refused with 413
+    decoder = MultipartDecoder(boundary.encode(), max_form_memory_size=4 * CHUNK_SIZE, max_parts=16)
+    found = False
+    current = None
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        decoder.receive_data(chunk or None)
+        event = decoder.next_event()
+        while not isinstance(event, (NeedData, Epilogue)):
+            if isinstance(event, (Field, File)):
+                current = isinstance(event, File) and event.name == field and not found
+                found = found or current
+            elif isinstance(event, Data) and current and event.data:
+                yield event.data
+            event = decoder.next_event()
+        if isinstance(event, Epilogue) or not chunk:
+            break
+    if not found:
+        raise UploadError(f"multipart field '{field}' with the image is required")
+
+
+# run in the resizing processes
+
+def _lower_priority(nice):
+    if nice and hasattr(os, "nice"):
+        os.nice(nice)
+
+
+def make_variants(source, targets, quality):
+    """Write ``targets`` (path -> longest side), largest first, each
+    downscaled from the previous one."""
+    with Image.open(source) as image:
+        largest = max(targets.values())
+        # JPEG decodes straight at a fraction of the size (DCT scaling)
+        image.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        for path, side in sorted(targets.items(), key=lambda item: -item[1]):
+            image.thumbnail((side, side), Image.Resampling.LANCZOS, reducing_gap=3.0)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".jpg")
+            with os.fdopen(fd, "wb") as out:
+                image.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+            os.replace(tmp_path, path)
+
+
+class Resizer:
+    """Makes an image's variants off the request path, once per image at a
+    time; ``workers=0`` resizes in the calling thread instead."""
+
+    def __init__(self, store, workers=2, quality=82, nice=10):
+        self.store = store
+        self.workers = workers
+        self.quality = quality
+        self.nice = nice
+        self._executor = None
+        self._pid = None
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # started lazily, and again after a fork, like the password hashers
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_lower_priority, initargs=(self.nice,)
+            )
+            self._pid = os.getpid()
+            self._pending = set()
+        return self._executor
+
+    def _done(self, sha256, start, error):
+        with self._lock:
+            self._pending.discard(sha256)
+        if error is None:
+            RESIZES.inc("ok")
+            RESIZE_LATENCY.observe(time.perf_counter() - start)
+        else:
+            RESIZES.inc("error")
+            logger.warning("resizing image %s failed: %s", sha256, error)
+
+    def submit(self, sha256):
+        """Queue the missing variants of ``sha256``; returns False when there
+        is nothing to do (no Pillow, all made, or already queued)."""
+        if Image is None:
+            return False
+        missing = self.store.missing_variants(sha256)
+        if not missing:
+            return False
+        targets = {self.store.path(sha256, name): self.store.variants[name] for name in missing}
+        args = (self.store.path(sha256), targets, self.quality)
+        start = time.perf_counter()
+        with self._lock:
+            if self.workers > 0:
+                executor = self._get_executor()
+            if sha256 in self._pending:
+                return False
+            self._pending.add(sha256)
+        if self.workers <= 0:
+            try:
+                make_variants(*args)
+            except Exception as e:
+                self._done(sha256, start, e)
+            else:
+                self._done(sha256, start, None)
+            return True
+        try:
+            future = executor.submit(make_variants, *args)
+        except Exception as e:
+            self._done(sha256, start, e)
+            return False
+        future.add_done_callback(lambda f: self._done(sha256, start, f.exception()))
+        return True
+
+    def wait(self):
+        """Block until everything queued so far is written (benchmarks)."""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+            time.sleep(0.01)
+
+
+def init_app(app):
+    store = ImageStore(
+        os.path.abspath(app.config["UPLOAD_FOLDER"]),  # relative to the working directory, like DATABASE
+        app.config["IMAGE_VARIANTS"],
+        app.config["UPLOAD_MAX_BYTES"],
+    )
+    app.extensions["image_store"] = store
+    app.extensions["image_resizer"] = Resizer(
+        store,
+        workers=app.config["IMAGE_WORKERS"],
+        quality=app.config["IMAGE_QUALITY"],
+        nice=app.config["IMAGE_WORKER_NICE"],
+    )
+
+
+def get_store():
+    return current_app.extensions["image_store"]
+
+
+def get_resizer():
+    return current_app.extensions["image_resizer"]
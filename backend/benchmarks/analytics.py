@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Time the operations reports (resolution percentiles, backlog aging, weekly
+trends, area heatmap): computed row by row in Python over the complaints,
+as a plain implementation would, against the vectorized reports over the
+worker's NumPy snapshot. Then the snapshot's top-up after --changes status
+changes and --inserts new complaints against loading it again from scratch.
+Works on a copy of the database; needs NumPy.
+
+    python seed_database.py --synthetic medium --db benchmarks/data/medium.db
+    python benchmarks/analytics.py --db benchmarks/data/medium.db
+"""
+
+import argparse
+import bisect
+import datetime
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND))
+
+from app import create_app  # noqa: E402
+from app.db import get_db  # noqa: E402
+from app.db.queries import complaints as complaints_queries  # noqa: E402
+from app.utils import analytics  # noqa: E402
+
+
+def row_by_row(db, resolved_id, open_ids, weeks_start, weeks):
+    """All four reports in one pass over the rows, the straightforward way."""
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    resolution = defaultdict(list)
+    backlog = Counter()
+    trends = Counter()
+    points = []
+    cursor = db.execute("SELECT category_id, status_id, created_at, updated_at, lat, lon FROM complaints")
+    for category_id, status_id, created_at, updated_at, lat, lon in cursor:
+        created = datetime.datetime.fromisoformat(str(created_at))
+        updated = datetime.datetime.fromisoformat(str(updated_at or created_at))
+        if status_id == resolved_id:
+            resolution[category_id].append(max((updated - created).total_seconds(), 0) / 3600)
+        elif status_id in open_ids:
+            age = (now - created).total_seconds() / 86400
+            backlog[category_id, bisect.bisect_right(analytics.AGE_BUCKETS, age)] += 1
+        week = (created - weeks_start).days // 7
+        if 0 <= week < weeks:
+            trends[category_id, week] += 1
+        if lat is not None:
+            points.append((lat, lon))
+    percentiles = {
+        category_id: statistics.quantiles(hours, n=100) for category_id, hours in resolution.items() if len(hours) > 1
+    }
+    cells = Counter()
+    if points:
+        min_lat, max_lat = min(p[0] for p in points), max(p[0] for p in points)
+        min_lon, max_lon = min(p[1] for p in points), max(p[1] for p in points)
+        cells = Counter(
+            (int((lat - min_lat) / ((max_lat - min_lat) / 32 or 1)), int((lon - min_lon) / ((max_lon - min_lon) / 32 or 1)))
+            for lat, lon in points
+        )
+    return percentiles, backlog, trends, cells
+
+
+def timed(fn, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", required=True)
+    parser.add_argument("--changes", type=int, default=1000, help="status changes before the top-up")
+    parser.add_argument("--inserts", type=int, default=100, help="new complaints before the top-up")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "complaints.db")
+        shutil.copy(args.db, path)
+        os.chdir(BACKEND)
+        app = create_app({"DATABASE": path, "DB_INSTRUMENTATION": False, "ANALYTICS_REFRESH_INTERVAL": 0})
+        with app.app_context():
+            db = get_db()
+            store = app.extensions["analytics"]
+            start = time.perf_counter()
+            snapshot = store.get()
+            load_s = time.perf_counter() - start
+            print(f"{len(snapshot)} complaints: snapshot loaded in {load_s:.2f} s, {snapshot.nbytes / 1e6:.1f} MB")
+
+            statuses = {s["name"]: s["id"] for s in analytics.get_all_statuses()}
+            open_ids = {statuses[name] for name in analytics.OPEN_STATUSES}
+            today = datetime.date.today()
+            weeks_start = datetime.datetime.combine(today - datetime.timedelta(days=today.weekday(), weeks=11), datetime.time())
+            plain_ms = timed(lambda: row_by_row(db, statuses["Resolved"], open_ids, weeks_start, 12), repeat=1)
+
+            reports = {
+                "resolution": lambda: analytics.resolution_times(snapshot, 3650),
+                "backlog": lambda: analytics.backlog_aging(snapshot),
+                "trends": lambda: analytics.weekly_trends(snapshot, 12),
+                "heatmap": lambda: analytics.area_heatmap(snapshot, grid=32),
+            }
+            print(f"\n{'report':>12} {'ms':>9}")
+            total = 0
+            for name, report in reports.items():
+                ms = timed(report)
+                total += ms
+                print(f"{name:>12} {ms:>9.1f}")
+            print(f"{'all four':>12} {total:>9.1f}   (row by row in Python: {plain_ms:.0f} ms, {plain_ms / total:.0f}x)")
+
+            rng = random.Random(args.seed)
+            user_id = db.execute("SELECT MIN(id) FROM users").fetchone()[0]
+            ids = rng.sample(range(1, snapshot.max_id + 1), args.changes)
+            complaints_queries.update_statuses(ids[: args.changes // 2], "Resolved")
+            complaints_queries.update_statuses(ids[args.changes // 2:], "In Progress")
+            for i in range(args.inserts):
+                complaints_queries.create_complaint(user_id, 1, f"New {i}", "benchmark", None, "12.97,77.59")
+
+            start = time.perf_counter()
+            topped_up = store.get()
+            incremental_s = time.perf_counter() - start
+            start = time.perf_counter()
+            store._snapshot = None
+            store.get()
+            full_s = time.perf_counter() - start
+            print(
+                f"\nafter {args.changes} status changes and {args.inserts} new complaints: "
+                f"top-up {incremental_s * 1000:.1f} ms ({len(topped_up) - len(snapshot)} rows appended), "
+                f"full reload {full_s * 1000:.0f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
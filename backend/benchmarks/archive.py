@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Time the hot read paths (listings, search, lookups by id, a full count)
+before and after `manage.py archive` moves the closed complaints out of the
+complaints table, and how fast the archiving itself goes. Also times search
+with ?archived=1, which reads both indexes. Works on a copy of the database.
+
+    python seed_database.py --synthetic medium --db benchmarks/data/medium.db
+    python benchmarks/archive.py --db benchmarks/data/medium.db --older-than 30
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND))
+
+from app import create_app  # noqa: E402
+from app.db import get_db  # noqa: E402
+from app.db.queries import archive as archive_queries, complaints as complaints_queries  # noqa: E402
+
+
+def timed(fn, repeat):
+    fn()  # warm the page cache
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def hot_paths(db, user_id, complaint_ids, word):
+    ids = iter(complaint_ids * 1000)
+    return {
+        "list (admin)": lambda: complaints_queries.get_complaints_by_user_id(user_id, "admin", 20),
+        "list (citizen)": lambda: complaints_queries.get_complaints_by_user_id(user_id, "user", 20),
+        "list Pending": lambda: complaints_queries.get_complaints_by_user_id(user_id, "admin", 20, "Pending"),
+        "search (admin)": lambda: complaints_queries.search_complaints(word, user_id, "admin"),
+        "search (citizen)": lambda: complaints_queries.search_complaints(word, user_id, "user"),
+        "get by id": lambda: complaints_queries._get_complaint(next(ids)),
+        "count(*)": lambda: db.execute("SELECT COUNT(*) FROM complaints").fetchone(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", required=True)
+    parser.add_argument("--older-than", type=int, default=30, help="days, as manage.py archive --older-than")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--word", default="road", help="search term")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "complaints.db")
+        shutil.copy(args.db, path)
+        os.chdir(BACKEND)
+        app = create_app({"DATABASE": path, "DB_INSTRUMENTATION": False})
+        with app.app_context():
+            db = get_db()
+            rng = random.Random(args.seed)
+            max_id = db.execute("SELECT MAX(id) FROM complaints").fetchone()[0]
+            complaint_ids = rng.sample(range(1, max_id + 1), 200)
+            user_id = db.execute("SELECT user_id FROM complaints WHERE id = ?", (complaint_ids[0],)).fetchone()[0]
+            paths = hot_paths(db, user_id, complaint_ids, args.word)
+            total = db.execute("SELECT COUNT(*) FROM complaints").fetchone()[0]
+            before = {name: timed(fn, args.repeat) for name, fn in paths.items()}
+
+            report = archive_queries.archive_complaints(args.older_than, args.batch_size)
+            hot = db.execute("SELECT COUNT(*) FROM complaints").fetchone()[0]
+            print(
+                f"archived {report['archived']} of {total} complaints in {report['elapsed_s']} s "
+                f"({report['archived'] / max(report['elapsed_s'], 0.001):.0f}/s, {report['batches']} batches "
+                f"of up to {args.batch_size}); {hot} left in complaints\n"
+            )
+            after = {name: timed(fn, args.repeat) for name, fn in paths.items()}
+            archived_search = timed(
+                lambda: complaints_queries.search_complaints(args.word, user_id, "admin", archived=True), args.repeat
+            )
+
+    print(f"{'ms (median)':>18} {'before':>9} {'after':>9}")
+    for name in paths:
+        print(f"{name:>18} {before[name]:>9.2f} {after[name]:>9.2f}")
+    print(f"{'search archived=1':>18} {'':>9} {archived_search:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Time cached reads against computing them: /api/other/stats, the per category
+stats and complaint details, served from the "local" backend and from the
+Redis protocol backend (an in-process `manage.py cache-server` stand-in, or
+--url for a real server). Then a cold-cache stampede: --workers simulated
+worker processes (one cache client each) x --threads threads ask for the
+stats at once, and the script counts how often they were computed.
+
+    python seed_database.py --synthetic medium --db benchmarks/data/medium.db
+    python benchmarks/cache.py --db benchmarks/data/medium.db
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND))
+
+from app import create_app  # noqa: E402
+from app.db import get_db  # noqa: E402
+from app.db.queries import complaints as complaints_queries, other as other_queries  # noqa: E402
+from app.utils.cache import LocalBackend, RespBackend, SharedCache  # noqa: E402
+from app.utils.resp import CacheServer, RespClient  # noqa: E402
+
+
+def p50_ms(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", required=True)
+    parser.add_argument("--url", help="Redis protocol server to use (default: start a stand-in)")
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=4, help="simulated worker processes in the stampede")
+    parser.add_argument("--threads", type=int, default=8, help="threads per simulated worker")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    url = args.url
+    if url is None:
+        server = CacheServer(("127.0.0.1", 0))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"redis://127.0.0.1:{server.server_address[1]}/0"
+
+    os.chdir(BACKEND)
+    app = create_app({"DATABASE": args.db, "DB_INSTRUMENTATION": False})
+    rng = random.Random(args.seed)
+    with app.app_context():
+        max_id = get_db().execute("SELECT MAX(id) FROM complaints").fetchone()[0]
+        ids = [rng.randint(1, max_id) for _ in range(args.runs)]
+        reads = {
+            "stats": (other_queries._get_stats, other_queries.get_stats),
+            "categories": (other_queries._get_category_stats, other_queries.get_category_stats),
+            "complaint": (
+                lambda: complaints_queries._get_complaint(rng.choice(ids)),
+                lambda: complaints_queries.get_complaint(rng.choice(ids)),
+            ),
+        }
+        backends = {
+            "local": SharedCache(LocalBackend()),
+            "redis": SharedCache(RespBackend(RespClient(url))),
+        }
+
+        print(f"{'read':>10} {'uncached':>9} " + " ".join(f"{name + ' hit':>10}" for name in backends) + "  (p50 ms)")
+        for name, (uncached, read) in reads.items():
+            row = [p50_ms(uncached, args.runs)]
+            for cache in backends.values():
+                app.extensions["cache"] = cache
+                for _ in range(len(ids) * 3):  # warm up
+                    read()
+                row.append(p50_ms(read, args.runs))
+            print(f"{name:>10} " + " ".join(f"{ms:>9}" if i == 0 else f"{ms:>10}" for i, ms in enumerate(row)))
+
+    computed = [0]
+    lock = threading.Lock()
+
+    def compute():
+        with lock:
+            computed[0] += 1
+        with app.app_context():
+            return other_queries._get_stats()
+
+    print(f"\nstampede: {args.workers} workers x {args.threads} threads on a cold key")
+    for name, make in (("none", None), ("local", LocalBackend), ("redis", lambda: RespBackend(RespClient(url)))):
+        computed[0] = 0
+        # one cache per simulated worker: "local" ones are not shared
+        caches = [SharedCache(make()) if make else None for _ in range(args.workers)]
+        if name == "redis":
+            caches[0].invalidate("stampede")
+        barrier = threading.Barrier(args.workers * args.threads)
+
+        def run(cache):
+            barrier.wait()
+            if cache is None:
+                compute()
+            else:
+                cache.get_or_compute("stampede", "stats", compute)
+
+        threads = [
+            threading.Thread(target=run, args=(caches[i % args.workers],))
+            for i in range(args.workers * args.threads)
+        ]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{name:>6}: computed {computed[0]:>3}x for {len(threads)} requests in {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Compare two benchmarks/run.py result files endpoint by endpoint.
+
+    python benchmarks/compare.py benchmarks/results/before.json benchmarks/results/after.json
+"""
+
+import argparse
+import json
+
+METRICS = ("throughput_rps", "p50_ms", "p99_ms", "mean_bytes", "json_mean_ms")
+
+
+def describe(meta):
+    dataset = meta.get("dataset", {})
+    return (
+        f"{meta.get('commit')}{'+' if meta.get('dirty') else ''} {meta.get('mode')} "
+        f"c={meta.get('concurrency')} complaints={dataset.get('complaints')} {meta.get('label') or ''}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    print(f"before: {describe(before['meta'])}")
+    print(f"after:  {describe(after['meta'])}")
+    print()
+    print(f"{'endpoint':>10} {'metric':>15} {'before':>10} {'after':>10} {'change':>8}")
+    for name in after["results"]:
+        if name not in before["results"]:
+            continue
+        for metric in METRICS:
+            old = before["results"][name].get(metric)
+            new = after["results"][name].get(metric)
+            if old is None or new is None:
+                continue
+            change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            print(f"{name:>10} {metric:>15} {old:>10} {new:>10} {change:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Time the duplicate lookup done for every new complaint: LSH candidates from
+complaint_lsh checked against their MinHash signatures, compared with scoring
+every complaint of the category in the window. Queries are reworded copies
+(one word dropped, one added) of random complaints in the window, so each
+has a known duplicate to find.
+
+    python seed_database.py --synthetic medium --db benchmarks/data/medium.db
+    python benchmarks/duplicates.py --db benchmarks/data/medium.db --window-days 3
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND))
+
+from app import create_app  # noqa: E402
+from app.db import get_db, transaction  # noqa: E402
+from app.db.queries import duplicates  # noqa: E402
+from app.utils import similarity  # noqa: E402
+
+
+def reword(text, rng):
+    words = text.split()
+    if len(words) > 3:
+        words.pop(rng.randrange(len(words)))
+    words.insert(rng.randrange(len(words) + 1), rng.choice(["urgent", "again", "still", "huge"]))
+    return " ".join(words)
+
+
+def scan(signature, category_id, since, threshold):
+    matches = []
+    for row in get_db().execute(
+        """
+        SELECT complaints.id, complaint_minhash.signature FROM complaints
+        JOIN complaint_minhash ON complaint_minhash.complaint_id = complaints.id
+        WHERE complaints.category_id = ? AND complaints.created_at >= ? AND complaints.duplicate_of IS NULL
+        """,
+        (category_id, since),
+    ):
+        if similarity.similarity(signature, similarity.from_blob(row["signature"])) >= threshold:
+            matches.append(row["id"])
+    return matches
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return (
+        round(statistics.median(samples), 2),
+        round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 2),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", required=True)
+    parser.add_argument("--window-days", type=float, default=3, help="window before the newest complaint")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--scan-queries", type=int, default=5, help="full-scan queries (slow)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    os.chdir(BACKEND)
+    app = create_app({"DATABASE": args.db, "DB_INSTRUMENTATION": False})
+    with app.app_context():
+        db = get_db()
+        newest = db.execute("SELECT MAX(created_at) FROM complaints").fetchone()[0]
+        since = db.execute("SELECT datetime(?, ?)", (newest, f"-{args.window_days * 86400:.0f} seconds")).fetchone()[0]
+        rows = db.execute(
+            """
+            SELECT id, category_id, created_at, title, description FROM complaints
+            WHERE created_at >= ? AND id NOT IN (SELECT complaint_id FROM complaint_minhash)
+            """,
+            (since,),
+        ).fetchall()
+        if rows:
+            start = time.perf_counter()
+            with transaction() as writer:
+                duplicates.index_complaints(writer, rows)
+            elapsed = time.perf_counter() - start
+            print(f"indexed {len(rows)} complaints in {elapsed:.1f}s ({len(rows) / elapsed:.0f}/s)")
+        window = db.execute(
+            "SELECT COUNT(*) FROM complaints WHERE created_at >= ?", (since,)
+        ).fetchone()[0]
+        print(f"{window} complaints since {since}")
+
+        rng = random.Random(args.seed)
+        sources = db.execute(
+            """
+            SELECT id, category_id, lat, lon, title, description FROM complaints
+            WHERE created_at >= ? AND status_id IN (SELECT id FROM statuses WHERE name IN ('Pending', 'In Progress'))
+            ORDER BY random() LIMIT ?
+            """,
+            (since, args.queries),
+        ).fetchall()
+        threshold = app.config["DUPLICATE_THRESHOLD"]
+
+        hashing, lookup, found, returned = [], [], 0, []
+        for row in sources:
+            start = time.perf_counter()
+            signature = similarity.minhash(reword(row["title"], rng), reword(row["description"], rng))
+            hashed = time.perf_counter()
+            matches = duplicates.find_duplicates(signature, row["category_id"], row["lat"], row["lon"], since=since)
+            done = time.perf_counter()
+            hashing.append((hashed - start) * 1000)
+            lookup.append((done - hashed) * 1000)
+            found += any(m["id"] == row["id"] for m in matches)
+            returned.append(len(matches))
+
+        scans = []
+        for row in sources[: args.scan_queries]:
+            start = time.perf_counter()
+            scan(similarity.minhash(row["title"], row["description"]), row["category_id"], since, threshold)
+            scans.append((time.perf_counter() - start) * 1000)
+
+        print(f"{'step':>12} {'runs':>5} {'p50 ms':>9} {'p99 ms':>9}")
+        for name, samples in (("minhash", hashing), ("lsh lookup", lookup), ("full scan", scans)):
+            if samples:
+                p50, p99 = percentiles(samples)
+                print(f"{name:>12} {len(samples):>5} {p50:>9} {p99:>9}")
+        print(f"source found for {found}/{len(sources)} reworded queries, "
+              f"{statistics.mean(returned):.1f} duplicates returned on average")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Hold --subscribers open event streams (GET /api/complaints/events, as the
+admin, so every stream gets every event) on ONE gunicorn worker, then make
+--updates status changes through the API and time how long each takes to
+reach every stream. Reports the worker's threads and memory with the
+streams open, and what the same clients polling /api/complaints/get every
+--poll-interval seconds would cost the worker instead. Works on a copy of a
+synthetic database (it has an admin); --worker-class gevent needs gevent.
+
+    python seed_database.py --synthetic small --db benchmarks/data/small.db
+    python benchmarks/events.py --db benchmarks/data/small.db --subscribers 2000
+    python benchmarks/events.py --db benchmarks/data/small.db --subscribers 2000 --worker-class gthread
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import jwt
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND))
+
+from app.config import Config  # noqa: E402
+
+SERVER = """
+import sys
+from app.config import Config
+from app.server import ProductionServer, server_options
+
+class Server(ProductionServer):
+    def load(self):
+        from app import create_app
+        return create_app({"DATABASE": sys.argv[1], "SERVER": "production", "SERVER_WORKER_CLASS": sys.argv[3]})
+
+config = {**vars(Config), "SERVER_HOST": "127.0.0.1", "SERVER_PORT": int(sys.argv[2]), "SERVER_WORKERS": 1}
+config["SERVER_WORKER_CLASS"] = sys.argv[3]
+Server(server_options(config)).run()
+"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def worker_stats(master_pid):
+    """(pid, threads, RSS in MB) of the server's only worker."""
+    with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+        pid = int(f.read().split()[0])
+    fields = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            fields[key] = value.split()
+    return pid, int(fields["Threads"][0]), int(fields["VmRSS"][0]) / 1024
+
+
+def cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def request(port, method, path, token, body=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    data = json.dumps(body).encode() if body is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: bench\r\nAuthorization: Bearer {token}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode()
+        + data
+    )
+    response = await reader.read()
+    writer.close()
+    status = int(response.split(b" ", 2)[1])
+    if status != 200:
+        raise SystemExit(f"{method} {path} failed with {status}")
+
+
+class Subscriber:
+    def __init__(self):
+        self.received = {}  # event id -> monotonic time
+        self.ready = asyncio.Event()
+
+    async def run(self, port, token):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(
+            f"GET /api/complaints/events HTTP/1.1\r\nHost: bench\r\nAuthorization: Bearer {token}\r\n"
+            "Accept: text/event-stream\r\n\r\n".encode()
+        )
+        status = await reader.readline()
+        if b" 200 " not in status:
+            raise SystemExit(f"event stream refused: {status.decode().strip()}")
+        # chunked transfer encoding around the events; the frames are all we need
+        async for line in reader:
+            if line.startswith(b"retry:"):
+                self.ready.set()
+            elif line.startswith(b"id:"):
+                self.received[int(line[3:])] = time.monotonic()
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def bench(args, port, token, complaint_id, master_pid):
+    started = time.monotonic()
+    subscribers = [Subscriber() for _ in range(args.subscribers)]
+    tasks = []
+    for i, subscriber in enumerate(subscribers):
+        tasks.append(asyncio.create_task(subscriber.run(port, token)))
+        if i % 100 == 99:
+            await asyncio.sleep(0.01)  # stay under the listen backlog
+    await asyncio.wait_for(asyncio.gather(*(s.ready.wait() for s in subscribers)), 120)
+    connected = time.monotonic() - started
+    pid, threads, rss = worker_stats(master_pid)
+    print(f"{args.subscribers} streams open in {connected:.1f} s: worker has {threads} threads, {rss:.0f} MB RSS")
+
+    await asyncio.sleep(2)
+    cpu_idle = cpu_seconds(pid)
+    await asyncio.sleep(5)
+    idle_cpu = (cpu_seconds(pid) - cpu_idle) / 5
+    print(f"idle: worker CPU {idle_cpu * 100:.1f}% of a core (hub polling, no heartbeats due)")
+
+    cpu_before = cpu_seconds(pid)
+    sent = []
+    for i in range(args.updates):
+        status = "In Progress" if i % 2 == 0 else "Pending"
+        sent.append(time.monotonic())
+        await request(port, "PUT", f"/api/complaints/update/{complaint_id}", token, {"status": status})
+        await asyncio.sleep(args.pause)
+    await asyncio.sleep(2)
+    cpu_updates = cpu_seconds(pid) - cpu_before
+
+    # events are numbered in order: match the n-th new id to the n-th update
+    ids = sorted({event_id for s in subscribers for event_id in s.received})[-args.updates:]
+    latencies = [
+        subscriber.received[event_id] - sent[n]
+        for subscriber in subscribers
+        for n, event_id in enumerate(ids)
+        if event_id in subscriber.received
+    ]
+    expected = args.subscribers * args.updates
+    print(
+        f"{args.updates} updates: {len(latencies)}/{expected} deliveries, latency from the PUT "
+        f"p50 {statistics.median(latencies) * 1000:.1f} ms, p99 {percentile(latencies, 99) * 1000:.1f} ms, "
+        f"max {max(latencies) * 1000:.1f} ms; worker CPU {cpu_updates / max(len(latencies), 1) * 1e6:.0f} us per delivery"
+    )
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    # what the same clients polling the listing would cost
+    start = time.monotonic()
+    cpu_before = cpu_seconds(pid)
+    for _ in range(args.poll_samples):
+        await request(port, "GET", "/api/complaints/get", token)
+    per_poll = (time.monotonic() - start) / args.poll_samples
+    cpu_per_poll = (cpu_seconds(pid) - cpu_before) / args.poll_samples
+    rate = args.subscribers / args.poll_interval
+    print(
+        f"polling instead: {rate:.0f} req/s of /api/complaints/get at {per_poll * 1000:.1f} ms "
+        f"({cpu_per_poll * 1000:.1f} ms CPU) each = {rate * cpu_per_poll:.1f} cores, "
+        f"and a change shows up {args.poll_interval / 2:.1f} s later on average"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", required=True, help="synthetic database (seed_database.py --synthetic)")
+    parser.add_argument("--subscribers", type=int, default=2000)
+    parser.add_argument("--updates", type=int, default=20)
+    parser.add_argument("--pause", type=float, default=0.25, help="seconds between updates")
+    parser.add_argument("--worker-class", default="gevent", choices=("gevent", "gthread"))
+    parser.add_argument("--poll-interval", type=float, default=5.0)
+    parser.add_argument("--poll-samples", type=int, default=200)
+    args = parser.parse_args()
+
+    # a socket per stream on both ends
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    if hard < 2 * args.subscribers + 100:
+        raise SystemExit(f"open file limit {hard} is too low for {args.subscribers} streams")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "complaints.db")
+        shutil.copy(args.db, path)
+        db = sqlite3.connect(path)
+        admin_id = db.execute(
+            "SELECT users.id FROM users JOIN roles ON roles.id = users.role_id WHERE roles.name = 'admin' LIMIT 1"
+        ).fetchone()[0]
+        complaint_id = db.execute("SELECT MIN(id) FROM complaints").fetchone()[0]
+        db.close()
+
+        port = free_port()
+        env = {
+            **os.environ,
+            "PYTHONPATH": str(BACKEND),
+            # gthread streams take a thread each: give them enough
+            "SERVER_THREADS": str(args.subscribers + 8),
+            "SSE_MAX_STREAMS": str(args.subscribers),
+            "SERVER_WORKER_CONNECTIONS": str(args.subscribers + 100),
+        }
+        server = subprocess.Popen(
+            [sys.executable, "-c", SERVER, path, str(port), args.worker_class],
+            cwd=BACKEND,
+            env=env,
+        )
+        try:
+            for _ in range(100):
+                if server.poll() is not None:
+                    raise SystemExit("the server did not start")
+                try:
+                    socket.create_connection(("127.0.0.1", port)).close()
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            token = jwt.encode(
+                {"user_id": admin_id, "exp": time.time() + 3600}, Config.SECRET_KEY, algorithm="HS256"
+            )
+            print(f"one {args.worker_class} worker on a copy of {args.db}")
+            asyncio.run(bench(args, port, token, complaint_id, server.pid))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Time the geo queries (bounding box, radius, k-nearest, grid clusters) against
+the old way of answering "what is near here": fetch every complaint and filter
+on the parsed location in Python.
+
+    python seed_database.py --synthetic medium --db benchmarks/data/medium.db
+    python benchmarks/geo.py --db benchmarks/data/medium.db --queries 200
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND))
+
+from app import create_app  # noqa: E402
+from app.db import get_db  # noqa: E402
+from app.db.queries import geo as geo_queries  # noqa: E402
+from app.utils.geo import bboxes_around, haversine_m, parse_location  # noqa: E402
+
+
+def scan_within_radius(lat, lon, radius_m):
+    hits = []
+    for row in get_db().execute("SELECT id, location FROM complaints"):
+        plat, plon = parse_location(row["location"])
+        if plat is not None and haversine_m(lat, lon, plat, plon) <= radius_m:
+            hits.append(row["id"])
+    return hits
+
+
+def per_box(query, lat, lon, radius_m, **kwargs):
+    # the boxes around a point, as the radius queries search them (two
+    # across the antimeridian)
+    return [row for box in bboxes_around(lat, lon, radius_m) for row in query(box, **kwargs)]
+
+
+def timed(fn, centers):
+    samples, sizes = [], []
+    for lat, lon in centers:
+        start = time.perf_counter()
+        result = fn(lat, lon)
+        samples.append((time.perf_counter() - start) * 1000)
+        sizes.append(len(result))
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 3),
+        "mean_rows": round(statistics.mean(sizes), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", required=True)
+    parser.add_argument("--queries", type=int, default=200, help="queries per kind")
+    parser.add_argument("--scan-queries", type=int, default=3, help="full-scan queries (slow)")
+    parser.add_argument("--radius", type=float, default=500, help="meters")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    os.chdir(BACKEND)
+    app = create_app({"DATABASE": args.db, "DB_INSTRUMENTATION": False})
+    with app.app_context():
+        db = get_db()
+        total, located, min_lat, max_lat, min_lon, max_lon = db.execute(
+            "SELECT COUNT(*), COUNT(lat), MIN(lat), MAX(lat), MIN(lon), MAX(lon) FROM complaints"
+        ).fetchone()
+        print(f"{total} complaints, {located} with coordinates in [{min_lat}, {max_lat}] x [{min_lon}, {max_lon}]")
+        rng = random.Random(args.seed)
+        centers = [(rng.uniform(min_lat, max_lat), rng.uniform(min_lon, max_lon)) for _ in range(args.queries)]
+        extent = (min_lat, min_lon, max_lat, max_lon)
+        admin = {"role": "admin"}
+
+        kinds = {
+            f"scan r={args.radius:g}m": (
+                lambda lat, lon: scan_within_radius(lat, lon, args.radius),
+                centers[: args.scan_queries],
+            ),
+            "bbox 1km": (
+                lambda lat, lon: per_box(geo_queries.complaints_in_bbox, lat, lon, 500, limit=5000, **admin),
+                centers,
+            ),
+            f"radius {args.radius:g}m": (
+                lambda lat, lon: geo_queries.complaints_within_radius(lat, lon, args.radius, limit=5000, **admin),
+                centers,
+            ),
+            "radius open": (
+                lambda lat, lon: geo_queries.complaints_within_radius(
+                    lat, lon, args.radius, limit=5000, statuses=["Pending", "In Progress"], category_id=2, **admin
+                ),
+                centers,
+            ),
+            "nearest k=10": (lambda lat, lon: geo_queries.nearest_complaints(lat, lon, 10, **admin), centers),
+            "clusters 2km": (
+                lambda lat, lon: per_box(geo_queries.complaint_clusters, lat, lon, 1000, grid=32, **admin),
+                centers,
+            ),
+            "clusters all": (
+                lambda lat, lon: geo_queries.complaint_clusters(extent, grid=32, **admin),
+                centers[:10],
+            ),
+        }
+
+        print(f"{'query':>14} {'runs':>5} {'p50 ms':>10} {'p99 ms':>10} {'rows':>8}")
+        for name, (fn, points) in kinds.items():
+            r = timed(fn, points)
+            print(f"{name:>14} {len(points):>5} {r['p50_ms']:>10} {r['p99_ms']:>10} {r['mean_rows']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Time photo uploads of --megabytes each over a local WSGI server: the
+streaming POST /api/images/upload against reading the file from
+request.files into memory first (what a plain Flask upload handler does),
+with the upload throughput and the server's peak Python memory per mode.
+Then the time until the resizing pool has written every variant. Works on a
+copy of the database and a temporary upload folder; needs Pillow.
+
+    python seed_database.py --synthetic small --db benchmarks/data/small.db
+    python benchmarks/images.py --db benchmarks/data/small.db --megabytes 10 --count 20
+"""
+
+import argparse
+import hashlib
+import http.client
+import io
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+import jwt
+from PIL import Image
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND))
+
+from app import create_app  # noqa: E402
+from app.db import get_db  # noqa: E402
+from app.utils.uploads import make_variants  # noqa: E402
+
+BOUNDARY = "----civic-benchmark-boundary"
+
+
+def make_photo(rng, megabytes):
+    """A noisy JPEG of roughly ``megabytes`` (noise does not compress, like
+    the sensor noise of a real photo)."""
+    width, height = 4000, 3000
+    while True:
+        pixels = rng.randbytes(width * height * 3)
+        buf = io.BytesIO()
+        Image.frombytes("RGB", (width, height), pixels).save(buf, "JPEG", quality=92)
+        size = buf.tell()
+        if abs(size - megabytes * 1e6) < megabytes * 1e5:
+            return buf.getvalue()
+        scale = (megabytes * 1e6 / size) ** 0.5
+        width, height = int(width * scale), int(height * scale)
+
+
+def start_server(app):
+    # wsgiref rather than Werkzeug's development server, which reads up to
+    # 10 MB of whatever is left on the socket after each response and would
+    # show up in the memory figures
+    from socketserver import ThreadingMixIn
+    from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+    class ThreadingServer(ThreadingMixIn, WSGIServer):
+        daemon_threads = True
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    server = make_server("127.0.0.1", 0, app, server_class=ThreadingServer, handler_class=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"127.0.0.1:{server.server_port}"
+
+
+def post(host, path, token, photo):
+    """Send ``photo`` as a multipart upload in 64 KiB writes."""
+    head = (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="image"; filename="photo.jpg"\r\n'
+        "Content-Type: image/jpeg\r\n\r\n"
+    ).encode()
+    tail = f"\r\n--{BOUNDARY}--\r\n".encode()
+    conn = http.client.HTTPConnection(host)
+    conn.putrequest("POST", path)
+    conn.putheader("Authorization", f"Bearer {token}")
+    conn.putheader("Content-Type", f"multipart/form-data; boundary={BOUNDARY}")
+    conn.putheader("Content-Length", str(len(head) + len(photo) + len(tail)))
+    conn.endheaders()
+    conn.send(head)
+    view = memoryview(photo)
+    for offset in range(0, len(photo), 64 * 1024):
+        conn.send(view[offset:offset + 64 * 1024])
+    conn.send(tail)
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    if response.status not in (200, 201):
+        raise SystemExit(f"upload to {path} failed with {response.status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", required=True)
+    parser.add_argument("--megabytes", type=float, default=10)
+    parser.add_argument("--count", type=int, default=20, help="uploads per mode")
+    parser.add_argument("--workers", type=int, default=2, help="resizing processes (IMAGE_WORKERS)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    photos = [make_photo(rng, args.megabytes) for _ in range(min(args.count, 4))]
+    # distinct content per upload so none is deduplicated
+    uploads = [photos[i % len(photos)] + i.to_bytes(4, "big") for i in range(args.count)]
+    size_mb = len(uploads[0]) / 1e6
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "complaints.db")
+        shutil.copy(args.db, path)
+        os.chdir(BACKEND)
+        app = create_app({
+            "DATABASE": path,
+            "DB_INSTRUMENTATION": False,
+            "UPLOAD_FOLDER": os.path.join(tmp, "uploads"),
+            "IMAGE_WORKERS": args.workers,
+        })
+
+        # the naive handler, for comparison: the body parsed into
+        # request.files, then read whole to hash and store it
+        @app.route("/bench/buffered", methods=["POST"])
+        def buffered():
+            from flask import request
+
+            data = request.files["image"].read()
+            sha256 = hashlib.sha256(data).hexdigest()
+            with open(os.path.join(tmp, sha256), "wb") as out:
+                out.write(data)
+            return {"id": sha256}, 201
+
+        with app.app_context():
+            user_id = get_db().execute("SELECT MIN(id) FROM users").fetchone()[0]
+        token = jwt.encode({"user_id": user_id, "exp": time.time() + 3600}, app.config["SECRET_KEY"], algorithm="HS256")
+        server, host = start_server(app)
+        resizer = app.extensions["image_resizer"]
+
+        print(f"{args.count} uploads of {size_mb:.1f} MB each")
+        print(f"{'mode':>9} {'p50 ms':>8} {'MB/s':>7} {'peak MB':>8}")
+        for name, route in (("buffered", "/bench/buffered"), ("streamed", "/api/images/upload")):
+            post(host, route, token, uploads[0][:-4] + b"warm")  # warm up
+            resizer.wait()
+            samples = []
+            tracemalloc.start()  # the photos were allocated before: this is the server's memory
+            started = time.perf_counter()
+            for photo in uploads:
+                start = time.perf_counter()
+                post(host, route, token, photo)
+                samples.append(time.perf_counter() - start)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(
+                f"{name:>9} {statistics.median(samples) * 1000:>8.1f} "
+                f"{size_mb * len(samples) / sum(samples):>7.1f} {peak / 1e6:>8.1f}"
+            )
+
+        # variants are made while the uploads go on; time until the last is written
+        uploaded = time.perf_counter()
+        resizer.wait()
+        done = time.perf_counter()
+        print(
+            f"\nresizing on {args.workers} processes ({', '.join(app.config['IMAGE_VARIANTS'])}): "
+            f"{args.count / (done - started):.1f} images/s, "
+            f"last done {(done - uploaded) * 1000:.0f} ms after the last upload returned"
+        )
+
+        store = app.extensions["image_store"]
+        source = store.path(hashlib.sha256(uploads[0]).hexdigest())
+        targets = {os.path.join(tmp, f"variant.{name}.jpg"): side for name, side in store.variants.items()}
+        start = time.perf_counter()
+        make_variants(source, targets, app.config["IMAGE_QUALITY"])
+        print(f"one image resized in {(time.perf_counter() - start) * 1000:.0f} ms")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
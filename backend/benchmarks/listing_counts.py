@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Time a dashboard listing view (a page, its total and the per-status counts)
+as three queries, with the total and the counts from COUNT(*) over
+complaints, against the one statement of GET /api/complaints/get, which
+reads them from the listing counters. Works on a copy of the database.
+
+    python seed_database.py --synthetic medium --db benchmarks/data/medium.db
+    python benchmarks/listing_counts.py --db benchmarks/data/medium.db
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND))
+
+from app import create_app  # noqa: E402
+from app.db import get_db  # noqa: E402
+from app.db.queries import complaints as complaints_queries  # noqa: E402
+from app.db.queries.other import get_all_statuses, get_status_id  # noqa: E402
+
+
+def timed(fn, repeat):
+    fn()  # warm the page cache
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def counted(db, user_id, role, per_page, status):
+    """The view as it was built before: the page, then COUNT(*) queries."""
+    rows, _ = complaints_queries.get_complaints_by_user_id(user_id, role, per_page, status)
+    where, params = ("WHERE user_id = ?", (user_id,)) if role != "admin" else ("", ())
+    names = {s["id"]: s["name"] for s in get_all_statuses()}
+    counts = {
+        names[status_id]: count
+        for status_id, count in db.execute(f"SELECT status_id, COUNT(*) FROM complaints {where} GROUP BY status_id", params)
+    }
+    if status:
+        total = db.execute(
+            f"SELECT COUNT(*) FROM complaints {where or 'WHERE 1'} AND status_id = ?", (*params, get_status_id(status))
+        ).fetchone()[0]
+    else:
+        total = db.execute(f"SELECT COUNT(*) FROM complaints {where}", params).fetchone()[0]
+    return rows, total, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", required=True)
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "complaints.db")
+        shutil.copy(args.db, path)
+        os.chdir(BACKEND)
+        start = time.perf_counter()
+        app = create_app({"DATABASE": path, "DB_INSTRUMENTATION": False})
+        print(f"create_app (migrating the copy if needed): {time.perf_counter() - start:.1f} s\n")
+        with app.app_context():
+            db = get_db()
+            admin_id = db.execute(
+                "SELECT users.id FROM users JOIN roles ON users.role_id = roles.id WHERE roles.name = 'admin' LIMIT 1"
+            ).fetchone()[0]
+            # the citizen with the most complaints
+            citizen_id = db.execute(
+                "SELECT user_id FROM complaint_user_status_counts WHERE user_id != 0 GROUP BY user_id "
+                "ORDER BY SUM(count) DESC LIMIT 1"
+            ).fetchone()[0]
+            views = {
+                "admin": (admin_id, "admin", None),
+                "admin Pending": (admin_id, "admin", "Pending"),
+                "citizen": (citizen_id, "user", None),
+                "citizen Pending": (citizen_id, "user", "Pending"),
+            }
+            print(f"{'ms (median)':>16} {'COUNT(*)':>9} {'counters':>9}")
+            for name, (user_id, role, status) in views.items():
+                rows, total, _ = counted(db, user_id, role, args.per_page, status)
+                new_rows, _, counts = complaints_queries.get_complaints_by_user_id(
+                    user_id, role, args.per_page, status, counts=True
+                )
+                assert new_rows == rows and total == (counts.get(status, 0) if status else sum(counts.values()))
+                before = timed(lambda: counted(db, user_id, role, args.per_page, status), args.repeat)
+                after = timed(
+                    lambda: complaints_queries.get_complaints_by_user_id(
+                        user_id, role, args.per_page, status, counts=True
+                    ),
+                    args.repeat,
+                )
+                print(f"{name:>16} {before:>9.2f} {after:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
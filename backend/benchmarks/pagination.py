@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Compare LIMIT/OFFSET and keyset pagination of the complaints listing as the
+table grows. Builds throwaway databases with the app's migrations, so it
+does not touch the instance database.
+
+    python benchmarks/pagination.py --sizes 10000 100000 1000000 --pages 1 50 500
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.db.migrations import migrate  # noqa: E402
+
+SELECT = """
+    SELECT complaints.*, statuses.name as status, categories.name as category_name, users.name as user_name
+    FROM complaints
+    JOIN statuses ON complaints.status_id = statuses.id
+    JOIN categories ON complaints.category_id = categories.id
+    JOIN users ON complaints.user_id = users.id
+"""
+
+
+def build(path, rows, users=50):
+    migrate(path)
+    db = sqlite3.connect(path)
+    # the FTS trigger is irrelevant to listing cost and dominates fill time
+    db.execute("DROP TRIGGER IF EXISTS complaints_ai")
+    db.executescript("""
+        INSERT INTO roles (name) VALUES ('user'), ('admin');
+        INSERT INTO statuses (name) VALUES ('Pending'), ('In Progress'), ('Resolved'), ('Rejected');
+        INSERT INTO categories (name) VALUES ('Roads'), ('Garbage'), ('Water'), ('Electricity');
+    """)
+    db.execute(
+        """
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+        INSERT INTO users (email, name, password_hash) SELECT 'u' || i || '@x', 'User ' || i, '-' FROM n
+        """,
+        (users,),
+    )
+    db.execute(
+        """
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+        INSERT INTO complaints (user_id, category_id, status_id, title, description, created_at, updated_at)
+        SELECT 1 + i % ?, 1 + i % 4, 1 + (i / 7) % 4, 'Complaint ' || i, 'Description of complaint ' || i,
+               datetime(1700000000 + i * 30, 'unixepoch'), datetime(1700000000 + i * 30, 'unixepoch')
+        FROM n
+        """,
+        (rows, users),
+    )
+    db.commit()
+    db.execute("ANALYZE")
+    return db
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def offset_page(db, page, per_page, where="", params=()):
+    sql = SELECT + where + " ORDER BY complaints.created_at DESC, complaints.id DESC LIMIT ? OFFSET ?"
+    return db.execute(sql, (*params, per_page, (page - 1) * per_page)).fetchall()
+
+
+def keyset_page(db, after, per_page, where="", params=()):
+    clauses = [where.replace(" WHERE ", "", 1)] if where else []
+    args = list(params)
+    if after:
+        clauses.append("(complaints.created_at, complaints.id) < (?, ?)")
+        args.extend(after)
+    sql = SELECT + (" WHERE " + " AND ".join(clauses) if clauses else "")
+    sql += " ORDER BY complaints.created_at DESC, complaints.id DESC LIMIT ?"
+    return db.execute(sql, (*args, per_page)).fetchall()
+
+
+def cursor_for_page(db, page, per_page, where, params):
+    if page == 1:
+        return None
+    # sort key of the last row on the previous page, i.e. what the client sends
+    rows = offset_page(db, page - 1, per_page, where, params)
+    if not rows:
+        raise LookupError(page)
+    return (rows[-1]["created_at"], rows[-1]["id"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--per-page", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    paths = {
+        "admin": ("", ()),
+        "user": (" WHERE complaints.user_id = ?", (7,)),
+        "status": (" WHERE complaints.status_id = ?", (1,)),
+    }
+
+    print(f"{'rows':>10} {'path':>7} {'page':>6} {'offset ms':>10} {'keyset ms':>10}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = build(os.path.join(tmp, "bench.db"), size)
+            db.row_factory = sqlite3.Row
+            for name, (where, params) in paths.items():
+                for page in args.pages:
+                    try:
+                        after = cursor_for_page(db, page, args.per_page, where, params)
+                    except LookupError:
+                        continue  # fewer rows than pages on this path
+                    off = timed(lambda: offset_page(db, page, args.per_page, where, params), args.repeat)
+                    key = timed(lambda: keyset_page(db, after, args.per_page, where, params), args.repeat)
+                    print(f"{size:>10} {name:>7} {page:>6} {off:>10.3f} {key:>10.3f}")
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
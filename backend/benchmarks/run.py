@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Latency/throughput benchmark for the backend API.
+
+Drives the real app either in process through Flask's test client
+(``--mode client``), through a local threaded WSGI server over HTTP
+(``--mode wsgi``), or against an already running server (``--url``).
+Reports p50/p90/p99 latency, throughput, response size and the server-side
+JSON encoding time (from the Server-Timing header) per endpoint and
+writes the run to benchmarks/results/<timestamp>-<commit>.json so runs can be
+compared across commits with benchmarks/compare.py.
+
+    python benchmarks/run.py --size small
+    python benchmarks/run.py --size medium --mode wsgi --concurrency 16
+    python benchmarks/run.py --db /tmp/bench.db --url http://127.0.0.1:5000 --concurrency 32
+    python benchmarks/run.py --size small --database-url postgresql://localhost/civic_bench
+
+``--database-url`` runs the same benchmark on the Postgres backend: the
+SQLite dataset is copied into that (empty) database first, so both backends
+serve the same rows.
+
+``--background login:16`` keeps 16 threads logging in for as long as the
+measured endpoints run, to see how a login burst affects everything else and
+how many logins per second get through (or are turned away with 429).
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import re
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlsplit
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND))
+
+from seed_database import SYNTHETIC_PASSWORD, SYNTHETIC_SIZES, WORDS, seed_synthetic  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+# name -> (method, path(rng, ctx), body(rng, ctx), token kind)
+ENDPOINTS = {
+    "get": ("GET", lambda rng, ctx: "/api/complaints/get?per_page=10", None, "admin"),
+    "get_100": ("GET", lambda rng, ctx: "/api/complaints/get?per_page=100", None, "admin"),
+    "get_detail": ("GET", lambda rng, ctx: "/api/complaints/get?per_page=100&view=detail", None, "admin"),
+    "get_user": ("GET", lambda rng, ctx: "/api/complaints/get?per_page=10", None, "user"),
+    "get_one": ("GET", lambda rng, ctx: f"/api/complaints/get/{rng.choice(ctx['ids'])}", None, "admin"),
+    "search": ("GET", lambda rng, ctx: f"/api/complaints/search?query={rng.choice(WORDS)}", None, "admin"),
+    "stats": ("GET", lambda rng, ctx: "/api/other/stats", None, None),
+    "login": (
+        "POST",
+        lambda rng, ctx: "/api/auth/login",
+        lambda rng, ctx: {"email": rng.choice(ctx["emails"]), "password": SYNTHETIC_PASSWORD},
+        None,
+    ),
+}
+# password hashing makes logins orders of magnitude slower than reads
+DEFAULT_REQUESTS = {"login": 50}
+
+
+class TestClientTransport:
+    def __init__(self, app):
+        self.client = app.test_client()
+        self.lock = threading.Lock()
+
+    def request(self, method, path, body=None, headers=None):
+        # the test client is not meant to be shared between threads
+        with self.lock:
+            response = self.client.open(path, method=method, json=body, headers=headers)
+            return response.status_code, response.get_data(), response.headers.get("Server-Timing")
+
+
+class HTTPTransport:
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.local = threading.local()
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        conn = getattr(self.local, "conn", None)
+        # a kept-alive connection may have been closed by the server while idle
+        for attempt in range(2 if conn is not None else 1):
+            if conn is None:
+                conn = self.local.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+                break
+            except (http.client.HTTPException, OSError) as e:
+                conn.close()
+                conn = self.local.conn = None
+                if attempt or not isinstance(e, (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)):
+                    raise
+        if response.getheader("Connection", "").lower() == "close":
+            conn.close()
+            self.local.conn = None
+        return response.status, data, response.getheader("Server-Timing")
+
+
+def start_wsgi_server(app):
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class KeepAliveHandler(WSGIRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+SERVER_TIMING_JSON = re.compile(r"\bjson;dur=([\d.]+)")
+
+
+def json_ms(server_timing):
+    match = SERVER_TIMING_JSON.search(server_timing or "")
+    return float(match.group(1)) if match else None
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_endpoint(transport, name, ctx, requests, concurrency, warmup, seed):
+    method, path_fn, body_fn, token_kind = ENDPOINTS[name]
+    headers = {"Authorization": f"Bearer {ctx['tokens'][token_kind]}"} if token_kind else {}
+    rng = random.Random(seed)
+    plan = [
+        (path_fn(rng, ctx), body_fn(rng, ctx) if body_fn else None)
+        for _ in range(warmup + requests)
+    ]
+
+    for path, body in plan[:warmup]:
+        transport.request(method, path, body, headers)
+
+    def one(item):
+        path, body = item
+        start = time.perf_counter()
+        try:
+            status, data, timing = transport.request(method, path, body, headers)
+        except Exception:
+            return time.perf_counter() - start, 0, 0, None
+        return time.perf_counter() - start, status, len(data), json_ms(timing)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(one, plan[warmup:]))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(s[0] * 1000 for s in samples)
+    errors = sum(1 for s in samples if not 200 <= s[1] < 400)
+    encoding = sorted(s[3] for s in samples if s[3] is not None)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / wall, 1),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p90_ms": round(percentile(latencies, 90), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3),
+        "mean_bytes": round(sum(s[2] for s in samples) / len(samples)),
+        # server-side JSON encoding, None when the server does not report it
+        "json_mean_ms": round(sum(encoding) / len(encoding), 3) if encoding else None,
+        "json_p99_ms": round(percentile(encoding, 99), 3) if encoding else None,
+    }
+
+
+def start_background(transport, name, ctx, threads, seed):
+    """Hit ``name`` from ``threads`` threads until the returned stop() is called."""
+    method, path_fn, body_fn, token_kind = ENDPOINTS[name]
+    headers = {"Authorization": f"Bearer {ctx['tokens'][token_kind]}"} if token_kind else {}
+    statuses = Counter()
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def loop(i):
+        rng = random.Random(seed + i)
+        while not done.is_set():
+            try:
+                status, _, _ = transport.request(method, path_fn(rng, ctx), body_fn(rng, ctx) if body_fn else None, headers)
+            except Exception:
+                status = 0
+            with lock:
+                statuses[status] += 1
+
+    workers = [threading.Thread(target=loop, args=(i,), daemon=True) for i in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+
+    def stop():
+        done.set()
+        for worker in workers:
+            worker.join()
+        wall = time.perf_counter() - started
+        total = sum(statuses.values())
+        return {
+            "endpoint": name,
+            "threads": threads,
+            "requests": total,
+            "throughput_rps": round(total / wall, 1),
+            "ok_rps": round(sum(n for s, n in statuses.items() if 200 <= s < 400) / wall, 1),
+            "statuses": {str(s): n for s, n in sorted(statuses.items())},
+        }
+
+    return stop
+
+
+def login(transport, email):
+    status, data, _ = transport.request(
+        "POST", "/api/auth/login", {"email": email, "password": SYNTHETIC_PASSWORD}
+    )
+    if status != 200:
+        raise SystemExit(f"Could not log in as {email} ({status}); is this a synthetic database?")
+    return json.loads(data)["token"]
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--", "."], cwd=BACKEND, capture_output=True, text=True
+        ).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", help="database to benchmark (default: benchmarks/data/<size>.db)")
+    parser.add_argument("--size", default="small", help=f"synthetic size to create if --db is missing: {', '.join(SYNTHETIC_SIZES)} or a count")
+    parser.add_argument("--mode", choices=("client", "wsgi"), default="client")
+    parser.add_argument("--url", help="benchmark an already running server instead (it must use --db)")
+    parser.add_argument("--database-url", help="benchmark the Postgres backend with this database, filled from --db when empty")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="comma separated subset of: " + ", ".join(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=str(RESULTS_DIR))
+    parser.add_argument("--label", help="free-form note stored with the results")
+    parser.add_argument("--background", metavar="ENDPOINT:THREADS", help="load ENDPOINT from THREADS threads meanwhile, e.g. login:16")
+    args = parser.parse_args()
+    if args.background and args.mode == "client" and not args.url:
+        parser.error("--background needs --mode wsgi or --url (the test client runs one request at a time)")
+
+    db_path = Path(args.db or Path(__file__).resolve().parent / "data" / f"{args.size}.db")
+    if not db_path.exists():
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        count = SYNTHETIC_SIZES.get(args.size) or int(args.size)
+        print(f"Creating synthetic database {db_path} ({count} complaints)")
+        seed_synthetic(str(db_path), count)
+
+    db = sqlite3.connect(db_path)
+    ctx = {
+        "ids": [r[0] for r in db.execute("SELECT id FROM complaints ORDER BY random() LIMIT 10000")],
+        "emails": [r[0] for r in db.execute("SELECT email FROM users WHERE email LIKE '%@bench.local' LIMIT 1000")],
+    }
+    dataset = {
+        "path": str(db_path),
+        "complaints": db.execute("SELECT COUNT(*) FROM complaints").fetchone()[0],
+        "users": db.execute("SELECT COUNT(*) FROM users").fetchone()[0],
+    }
+    db.close()
+
+    backend = "sqlite"
+    if args.database_url:
+        from app.db import migrations, postgres
+
+        backend = "postgres"
+        dataset["database_url"] = args.database_url
+        migrations.migrate(str(db_path))
+        postgres.migrate(args.database_url)
+        conn = postgres.connect(args.database_url)
+        empty = conn.execute("SELECT NOT EXISTS (SELECT 1 FROM complaints)").fetchone()[0]
+        conn.close()
+        if empty:
+            print(f"Copying {db_path} to {args.database_url}")
+            postgres.copy_from_sqlite(str(db_path), args.database_url)
+
+    server = None
+    if args.url:
+        mode = "url"
+        transport = HTTPTransport(args.url)
+    else:
+        os.chdir(BACKEND)
+        from app import create_app
+
+        app = create_app({
+            "DATABASE": str(db_path),
+            "DB_BACKEND": backend,
+            "DATABASE_URL": args.database_url,
+            "DEBUG": False,
+        })
+        mode = args.mode
+        if args.mode == "wsgi":
+            server, url = start_wsgi_server(app)
+            transport = HTTPTransport(url)
+        else:
+            transport = TestClientTransport(app)
+
+    user_email = next(e for e in ctx["emails"] if e != "admin@bench.local")
+    ctx["tokens"] = {"admin": login(transport, "admin@bench.local"), "user": login(transport, user_email)}
+
+    stop_background = None
+    if args.background:
+        name, _, threads = args.background.partition(":")
+        stop_background = start_background(transport, name, ctx, int(threads or 1), args.seed)
+
+    results = {}
+    print(f"{'endpoint':>10} {'rps':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'bytes':>8} {'json ms':>8} {'errors':>6}")
+    for name in args.endpoints.split(","):
+        requests = min(args.requests, DEFAULT_REQUESTS.get(name, args.requests))
+        r = results[name] = run_endpoint(
+            transport, name, ctx, requests, args.concurrency, min(args.warmup, requests), args.seed
+        )
+        print(
+            f"{name:>10} {r['throughput_rps']:>9} {r['p50_ms']:>9} {r['p90_ms']:>9} {r['p99_ms']:>9} "
+            f"{r['mean_bytes']:>8} {r['json_mean_ms'] if r['json_mean_ms'] is not None else '-':>8} {r['errors']:>6}"
+        )
+
+    background = stop_background() if stop_background else None
+    if background:
+        print(
+            f"background {background['endpoint']} x{background['threads']}: {background['throughput_rps']} rps, "
+            f"{background['ok_rps']} ok rps, statuses {background['statuses']}"
+        )
+
+    if server:
+        server.shutdown()
+
+    commit, dirty = git_commit()
+    now = datetime.now(timezone.utc)
+    report = {
+        "meta": {
+            "timestamp": now.isoformat(timespec="seconds"),
+            "commit": commit,
+            "dirty": dirty,
+            "label": args.label,
+            "mode": mode,
+            "url": args.url,
+            "concurrency": args.concurrency,
+            "backend": backend,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "dataset": dataset,
+            "background": background,
+        },
+        "results": results,
+    }
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    path = out / f"{now:%Y%m%dT%H%M%S}-{commit or 'nogit'}-{mode}.json"
+    path.write_text(json.dumps(report, indent=2))
+    print(f"Saved {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Measure application startup: import time and create_app() time in a fresh
+process, the way every CLI command and every server worker pays for it.
+
+With --locked the runs are repeated while another connection holds the
+database write lock, as a busy production writer would. Point --backend at
+another checkout to measure it against the same database:
+
+    python benchmarks/startup.py --runs 20 --locked
+    git worktree add /tmp/before <commit> && python benchmarks/startup.py --backend /tmp/before/backend --locked
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+try:
+    create_app({"DATABASE": sys.argv[1]})
+    error = None
+except Exception as e:
+    error = f"{type(e).__name__}: {e}"
+done = time.perf_counter()
+print(json.dumps({"import_ms": (imported - start) * 1000, "create_app_ms": (done - imported) * 1000, "error": error}))
+"""
+
+
+def start_once(backend, db_path):
+    result = subprocess.run(
+        [sys.executable, "-c", SNIPPET, str(db_path)],
+        cwd=backend,
+        env={**os.environ, "PYTHONPATH": str(backend)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples, key):
+    values = sorted(s[key] for s in samples)
+    return statistics.median(values), values[-1]
+
+
+def run(backend, db_path, runs, label):
+    samples = [start_once(backend, db_path) for _ in range(runs)]
+    errors = [s["error"] for s in samples if s["error"]]
+    import_p50, _ = summarize(samples, "import_ms")
+    create_p50, create_max = summarize(samples, "create_app_ms")
+    print(
+        f"{label:>10} import p50 {import_p50:8.1f} ms   create_app p50 {create_p50:8.1f} ms"
+        f"   max {create_max:8.1f} ms   errors {len(errors)}"
+    )
+    if errors:
+        print(f"{'':>10} {errors[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backend", default=str(BACKEND), help="backend checkout to measure")
+    parser.add_argument("--db", default=str(BACKEND / "instance" / "complaints.db"), help="database to copy and start against")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--locked", action="store_true", help="also measure while the write lock is held")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "startup.db"
+        shutil.copy(args.db, db_path)
+        # the first start may migrate; measure steady state
+        start_once(args.backend, db_path)
+
+        print(f"{args.backend} against a copy of {args.db}, {args.runs} runs")
+        run(args.backend, db_path, args.runs, "idle")
+        if args.locked:
+            writer = sqlite3.connect(db_path, isolation_level=None)
+            writer.execute("BEGIN IMMEDIATE")
+            try:
+                run(args.backend, db_path, args.runs, "locked")
+            finally:
+                writer.execute("ROLLBACK")
+                writer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Time admin status changes: one update_complaint() transaction per complaint
+(what PUT /api/complaints/update/<id> does) against a single bulk
+update_statuses() transaction for the same number of complaints. Works on a
+copy of the database, since it changes statuses.
+
+    python seed_database.py --synthetic medium --db benchmarks/data/medium.db
+    python benchmarks/status_updates.py --db benchmarks/data/medium.db --count 1000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND))
+
+from app import create_app  # noqa: E402
+from app.db import get_db  # noqa: E402
+from app.db.queries import complaints as complaints_queries  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", required=True)
+    parser.add_argument("--count", type=int, default=1000, help="complaints per run")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "complaints.db")
+        shutil.copy(args.db, path)
+        os.chdir(BACKEND)
+        app = create_app({"DATABASE": path, "DB_INSTRUMENTATION": False})
+        with app.app_context():
+            db = get_db()
+            max_id = db.execute("SELECT MAX(id) FROM complaints").fetchone()[0]
+            rng = random.Random(args.seed)
+            ids = rng.sample(range(1, max_id + 1), 2 * args.count)
+            single, bulk = ids[: args.count], ids[args.count:]
+
+            start = time.perf_counter()
+            for complaint_id in single:
+                complaints_queries.update_complaint(complaint_id, "In Progress")
+            single_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            result = complaints_queries.update_statuses(bulk, "In Progress")
+            bulk_s = time.perf_counter() - start
+
+            history = db.execute("SELECT COUNT(*) FROM complaint_status_history").fetchone()[0]
+
+    print(f"{'mode':>8} {'complaints':>10} {'total ms':>10} {'ms each':>9}")
+    print(f"{'single':>8} {len(single):>10} {single_s * 1000:>10.1f} {single_s * 1000 / len(single):>9.3f}")
+    print(f"{'bulk':>8} {len(bulk):>10} {bulk_s * 1000:>10.1f} {bulk_s * 1000 / len(bulk):>9.3f}")
+    print(f"bulk moved {len(result['updated'])}, {len(result['unchanged'])} already in status; {history} history rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,17 +7,55 @@ Provides commands for administrative tasks like creating superusers.
 import os
 import sys
 import getpass
+import sqlite3
+import time
 import click
 from werkzeug.security import generate_password_hash
 from app import create_app
-from app.db import get_db
-from app.db.queries.users import get_user_by_email, create_user
+from app.config import Config
+from app.db import get_db, migrations
+from app.db.queries import archive as archive_queries
+from app.db.queries.users import get_user_by_email, create_user, set_user_role
+from app.db.queries.other import get_category_id, get_status_id, rebuild_stats as rebuild_complaint_stats
+from app.utils import exporter, importer
+from app.utils.resp import CacheServer
 
 @click.group()
 def cli():
     """Civic Report Management Commands"""
     pass
 
+@cli.command()
+@click.option('--target', type=int, default=None, help='Migrate up to this version (default: latest)')
+@click.option('--status', 'show_status', is_flag=True, help='Show the schema version and pending migrations without applying them')
+def migrate(target, show_status):
+    """Apply pending database migrations."""
+    if Config.DB_BACKEND == 'postgres':
+        from app.db import postgres as schema
+        database = Config.DATABASE_URL
+        db = schema.connect(database)
+    else:
+        schema = migrations
+        database = Config.DATABASE
+        db = sqlite3.connect(database)
+    try:
+        version = schema.schema_version(db)
+        pending = schema.pending(db)
+    finally:
+        db.close()
+
+    click.echo(f"Schema version {version} (latest {schema.LATEST_VERSION}) for {database}")
+    if show_status:
+        for migration in pending:
+            click.echo(f"  pending: {migration.version:04d}_{migration.name}")
+        return
+
+    applied = schema.migrate(database, target=target)
+    for migration, elapsed in applied:
+        click.echo(f"Applied {migration.version:04d}_{migration.name} in {elapsed:.2f}s")
+    if not applied:
+        click.echo("Nothing to migrate.")
+
 @cli.command()
 @click.option('--name', prompt='Superuser name', help='Name of the superuser')
 @click.option('--email', prompt='Superuser email', help='Email of the superuser')
@@ -34,7 +72,7 @@ def createsuperuser(name, email, password):
             sys.exit(1)
         
         # Hash the password
-        password_hash = generate_password_hash(password)
+        password_hash = generate_password_hash(password, method=app.config['PASSWORD_HASH_METHOD'])
         
         try:
             # Create the superuser with admin role
@@ -50,7 +88,7 @@ def list_users():
     app = create_app()
     
     with app.app_context():
-        db = get_db()
+        db = get_db(replica=True)
         users = db.execute("""
             SELECT users.id, users.name, users.email, roles.name as role
             FROM users 
@@ -95,16 +133,214 @@ def promote_to_admin(email):
         
         try:
             # Update user role to admin
-            db.execute("""
-                UPDATE users 
-                SET role_id = (SELECT id FROM roles WHERE name = 'admin' LIMIT 1)
-                WHERE id = ?
-            """, (user['id'],))
-            db.commit()
+            set_user_role(user['id'], 'admin')
             click.echo(f"User '{email}' promoted to admin successfully!")
         except Exception as e:
             click.echo(f"Error promoting user: {e}")
             sys.exit(1)
 
+@cli.command()
+def rebuild_stats():
+    """Recompute the materialized complaint counters from the complaints table."""
+    app = create_app()
+
+    with app.app_context():
+        drift = rebuild_complaint_stats()
+        if drift:
+            click.echo(f"Rebuilt complaint stats ({drift} counter rows had drifted).")
+        else:
+            click.echo("Rebuilt complaint stats (no drift found).")
+
+@cli.command()
+@click.option('--older-than', type=int, default=None, help=f'Archive closed complaints not changed for this many days (default: ARCHIVE_AFTER_DAYS, {Config.ARCHIVE_AFTER_DAYS})')
+@click.option('--batch-size', type=int, default=None, help=f'Complaints moved per transaction (default: {Config.ARCHIVE_BATCH_SIZE})')
+@click.option('--dry-run', is_flag=True, help='Only count the complaints that would be archived')
+@click.option('--every', type=float, default=None, help='Keep running, archiving again every this many seconds')
+def archive(older_than, batch_size, dry_run, every):
+    """Move old Resolved/Rejected complaints to the archive tables."""
+    app = create_app()
+    older_than = app.config['ARCHIVE_AFTER_DAYS'] if older_than is None else older_than
+    batch_size = batch_size or app.config['ARCHIVE_BATCH_SIZE']
+    if older_than < 0 or batch_size < 1:
+        click.echo("Error: --older-than must be >= 0 and --batch-size >= 1.", err=True)
+        sys.exit(1)
+
+    while True:
+        with app.app_context():
+            if dry_run:
+                count = archive_queries.count_archivable(older_than)
+                click.echo(f"{count} closed complaints not changed for {older_than} days would be archived.")
+                return
+            report = archive_queries.archive_complaints(older_than, batch_size)
+        click.echo(
+            f"Archived {report['archived']} complaints not changed for {older_than} days "
+            f"in {report['batches']} batches ({report['elapsed_s']}s)."
+        )
+        if every is None:
+            return
+        time.sleep(every)
+
+@cli.command()
+@click.argument('source', type=click.File('rb'))
+@click.option('--format', 'fmt', type=click.Choice(importer.FORMATS), default=None, help='Input format (default: from file extension)')
+@click.option('--user-email', required=True, help='Account the imported complaints are filed under')
+@click.option('--chunk-size', default=1000, show_default=True, help='Rows per transaction')
+@click.option('--defer-fts', is_flag=True, help='Skip per-row search indexing and rebuild the index once at the end')
+def import_complaints(source, fmt, user_email, chunk_size, defer_fts):
+    """Stream complaints from an NDJSON or CSV file (use - for stdin)."""
+    if fmt is None:
+        fmt = 'csv' if source.name.endswith('.csv') else 'ndjson'
+
+    app = create_app()
+
+    with app.app_context():
+        user = get_user_by_email(user_email)
+        if not user:
+            click.echo(f"Error: User with email '{user_email}' not found.")
+            sys.exit(1)
+
+        report = importer.import_complaints(
+            importer.iter_records(importer.decode_lines(source), fmt),
+            user['id'],
+            chunk_size=chunk_size,
+            defer_fts=defer_fts,
+        ).to_dict()
+
+        click.echo(
+            f"Imported {report['inserted']}/{report['rows']} rows in {report['elapsed_s']}s "
+            f"({report['rows_per_sec']} rows/sec), {report['failed']} failed."
+        )
+        for error in report['errors']:
+            click.echo(f"  row {error['row']}: {error['error']}")
+        if report['errors_truncated']:
+            click.echo(f"  ... {report['failed'] - len(report['errors'])} more errors not shown")
+        if report['stopped']:
+            click.echo(f"Error: {report['stopped']}, stopped reading after row {report['rows']}.")
+            sys.exit(1)
+
+@cli.command()
+@click.argument('output', type=click.File('wb'))
+@click.option('--format', 'fmt', type=click.Choice(exporter.FORMATS), default=None, help='Output format (default: from file extension)')
+@click.option('--columns', default=None, help=f"Comma separated columns (default: {','.join(exporter.DEFAULT_COLUMNS)})")
+@click.option('--status', default=None, help='Only complaints with this status')
+@click.option('--category', default=None, help='Only complaints in this category')
+@click.option('--from', 'created_from', default=None, help='Created on or after this date (ISO 8601)')
+@click.option('--to', 'created_to', default=None, help='Created on or before this date (ISO 8601)')
+@click.option('--gzip', 'use_gzip', is_flag=True, help='Gzip the output (default for names ending in .gz)')
+def export(output, fmt, columns, status, category, created_from, created_to, use_gzip):
+    """Stream complaints to an NDJSON or CSV file (use - for stdout)."""
+    name = output.name if isinstance(output.name, str) else ''
+    if name.endswith('.gz'):
+        use_gzip = True
+        name = name[:-3]
+    if fmt is None:
+        fmt = 'csv' if name.endswith('.csv') else 'ndjson'
+
+    app = create_app()
+
+    with app.app_context():
+        try:
+            columns = exporter.parse_columns(columns)
+            created_from = exporter.parse_date(created_from)
+            created_to = exporter.parse_date(created_to)
+        except ValueError as e:
+            click.echo(f"Error: {e}", err=True)
+            sys.exit(1)
+        if status and get_status_id(status) is None:
+            click.echo(f"Error: Unknown status '{status}'.", err=True)
+            sys.exit(1)
+        category_id = None
+        if category:
+            category_id = get_category_id(category)
+            if category_id is None:
+                click.echo(f"Error: Unknown category '{category}'.", err=True)
+                sys.exit(1)
+
+        chunks = exporter.export_complaints(
+            fmt,
+            columns,
+            status=status,
+            category_id=category_id,
+            created_from=created_from,
+            created_to=created_to,
+        )
+        if use_gzip:
+            chunks = exporter.gzip_chunks(chunks)
+        for chunk in chunks:
+            output.write(chunk if use_gzip else chunk.encode('utf-8'))
+
+@cli.command()
+@click.option('--host', default='127.0.0.1', show_default=True, help='Address to listen on')
+@click.option('--port', default=6379, show_default=True, help='Port to listen on')
+@click.option('--max-keys', default=100000, show_default=True, help='Keys kept before the least recently used are evicted')
+def cache_server(host, port, max_keys):
+    """Run an in-memory Redis protocol server for CACHE_BACKEND=redis (development stand-in)."""
+    server = CacheServer((host, port), max_keys=max_keys)
+    click.echo(f"Cache server listening on redis://{host}:{port}/0 (max {max_keys} keys)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+@cli.command()
+@click.argument('dest', required=False)
+@click.option('--pages', type=int, default=None, help=f'Pages copied per step, -1 for all in one (default: DB_BACKUP_PAGES, {Config.DB_BACKUP_PAGES})')
+@click.option('--every', type=float, default=None, help='Keep running, copying again every this many seconds (after a commit)')
+def backup(dest, pages, every):
+    """Snapshot the SQLite database while it is in use, to DEST or the DB_REPLICAS replicas."""
+    from app.db.replica import Snapshotter
+
+    app = create_app()
+    if app.config['DB_BACKEND'] != 'sqlite':
+        click.echo("Error: backup copies the SQLite database; use pg_dump or a streaming replica for Postgres.", err=True)
+        sys.exit(1)
+    targets = [dest] if dest else app.config['DB_REPLICAS']
+    if not targets:
+        click.echo("Error: give a destination file or set DB_REPLICAS.", err=True)
+        sys.exit(1)
+    pages = app.config['DB_BACKUP_PAGES'] if pages is None else pages
+    if pages == 0:
+        click.echo("Error: --pages must be positive or -1.", err=True)
+        sys.exit(1)
+
+    busy_timeout = app.config['DB_PRAGMAS'].get('busy_timeout', 5000) / 1000
+    snapshotter = Snapshotter(app.config['DATABASE'], timeout=busy_timeout)
+    try:
+        while True:
+            for target in targets:
+                report = snapshotter.copy(target, pages)
+                if report['copied']:
+                    megabytes = report['bytes'] / 1e6
+                    rate = megabytes / max(report['elapsed_s'], 0.001)
+                    click.echo(f"Copied {megabytes:.1f} MB to {target} in {report['elapsed_s']}s ({rate:.0f} MB/s).")
+                elif every is None:
+                    click.echo(f"{target} is up to date.")
+            if every is None:
+                return
+            time.sleep(every)
+    finally:
+        snapshotter.close()
+
+@cli.command()
+@click.option('--source', default=Config.DATABASE, show_default=True, help='SQLite database to copy')
+@click.option('--url', default=Config.DATABASE_URL, show_default=True, help='Empty Postgres database to copy into')
+def copy_to_postgres(source, url):
+    """Copy a SQLite database into Postgres (for DB_BACKEND=postgres)."""
+    from app.db import postgres
+
+    if not os.path.exists(source):
+        click.echo(f"Error: {source} not found.", err=True)
+        sys.exit(1)
+    try:
+        copied = postgres.copy_from_sqlite(source, url)
+    except RuntimeError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+    for table, rows in copied.items():
+        click.echo(f"  {table}: {rows} rows")
+    click.echo(f"Copied {source} to {url}.")
+
 if __name__ == '__main__':
     cli() 
\ No newline at end of file
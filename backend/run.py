@@ -1,6 +1,13 @@
 from app import create_app
-
-app = create_app()
+from app.config import Config
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    if Config.SERVER == 'production':
+        from app.server import serve
+
+        serve(vars(Config))
+    else:
+        create_app().run(host=Config.SERVER_HOST, port=Config.SERVER_PORT, debug=True)
+else:
+    # imported as an app module, e.g. `flask --app run` or `gunicorn run:app`
+    app = create_app()
@@ -1,9 +1,26 @@
 
+import argparse
 import sqlite3
 import os
+import time
 from pathlib import Path
 
 
+# Synthetic dataset sizes used by the benchmarks
+SYNTHETIC_SIZES = {
+    "small": 10_000,
+    "medium": 1_000_000,
+    "large": 10_000_000,
+}
+SYNTHETIC_PASSWORD = "password"
+
+WORDS = [
+    "pothole", "road", "garbage", "overflowing", "bin", "water", "leak", "pipe",
+    "streetlight", "broken", "pole", "drain", "blocked", "sewage", "power", "outage",
+    "footpath", "damaged", "traffic", "signal", "tree", "fallen", "wire", "park",
+]
+
+
 def seed_database():
     """Execute the seed.sql file against the SQLite database."""
     
@@ -54,7 +71,113 @@ def seed_database():
         return False
 
 
+def seed_synthetic(db_file, complaints, users=None, defer_fts=True, batch=100_000):
+    """Fill a database with deterministic synthetic users and complaints.
+
+    Every synthetic user has the password "password"; user 1
+    (admin@bench.local) is an admin, the rest are user<N>@bench.local.
+    """
+    from werkzeug.security import generate_password_hash
+    from app.db.migrations import migrate
+
+    script_dir = Path(__file__).parent
+    seed_file = script_dir / "app" / "db" / "seed.sql"
+    users = users or max(10, complaints // 100)
+
+    migrate(db_file)
+    conn = sqlite3.connect(db_file)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    if not conn.execute("SELECT 1 FROM statuses LIMIT 1").fetchone():
+        conn.executescript(seed_file.read_text(encoding="utf-8"))
+
+    start = time.perf_counter()
+    password_hash = generate_password_hash(SYNTHETIC_PASSWORD)
+    first_user = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM users").fetchone()[0]
+    conn.execute(
+        """
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+        INSERT OR IGNORE INTO users (email, name, password_hash, role_id)
+        SELECT CASE WHEN i = 1 THEN 'admin@bench.local' ELSE 'user' || i || '@bench.local' END,
+               'Bench User ' || i, ?,
+               (SELECT id FROM roles WHERE name = CASE WHEN i = 1 THEN 'admin' ELSE 'user' END)
+        FROM n
+        """,
+        (users, password_hash),
+    )
+    user_ids = [row[0] for row in conn.execute("SELECT id FROM users WHERE email LIKE '%@bench.local'")]
+    conn.execute("CREATE TEMP TABLE bench_users (n INTEGER PRIMARY KEY, id INTEGER)")
+    conn.executemany("INSERT INTO bench_users VALUES (?, ?)", enumerate(user_ids))
+    conn.execute("CREATE TEMP TABLE words (n INTEGER PRIMARY KEY, word TEXT)")
+    conn.executemany("INSERT INTO words VALUES (?, ?)", enumerate(WORDS))
+    categories = conn.execute("SELECT COUNT(*) FROM categories").fetchone()[0]
+    statuses = conn.execute("SELECT COUNT(*) FROM statuses").fetchone()[0]
+
+    trigger = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'complaints_ai'"
+    ).fetchone()
+    if defer_fts and trigger:
+        conn.execute("DROP TRIGGER complaints_ai")
+
+    # Multiplicative hashing of the row number gives a stable, well spread
+    # choice of user, category, status, words and timestamp for each row.
+    offset = conn.execute("SELECT COALESCE(MAX(id), 0) FROM complaints").fetchone()[0]
+    done = 0
+    while done < complaints:
+        size = min(batch, complaints - done)
+        conn.execute(
+            """
+            WITH RECURSIVE n(i) AS (SELECT ? UNION ALL SELECT i + 1 FROM n WHERE i < ?),
+            h(i, x) AS (SELECT i, (i * 2654435761) % 4294967296 FROM n)
+            INSERT INTO complaints (user_id, category_id, status_id, title, description, location, created_at, updated_at, lat, lon)
+            SELECT
+                (SELECT id FROM bench_users WHERE n = h.x % ?),
+                1 + (h.x / 7) % ?,
+                1 + (h.x / 13) % ?,
+                (SELECT word FROM words WHERE n = h.x % 24) || ' ' || (SELECT word FROM words WHERE n = (h.x / 24) % 24) || ' ' || i,
+                'Reported ' || (SELECT word FROM words WHERE n = (h.x / 576) % 24) || ' near block ' || (h.x % 5000)
+                    || ', ' || (SELECT word FROM words WHERE n = (h.x / 13824) % 24) || ' since last week',
+                printf('%.5f,%.5f', 12.8 + (h.x % 40000) / 100000.0, 77.5 + ((h.x / 40000) % 40000) / 100000.0),
+                datetime(1704067200 + i * 3, 'unixepoch'),
+                datetime(1704067200 + i * 3 + (h.x % 864000), 'unixepoch'),
+                round(12.8 + (h.x % 40000) / 100000.0, 5),
+                round(77.5 + ((h.x / 40000) % 40000) / 100000.0, 5)
+            FROM h
+            """,
+            (offset + done + 1, offset + done + size, len(user_ids), categories, statuses),
+        )
+        conn.commit()
+        done += size
+        print(f"  {done}/{complaints} complaints", end="\r", flush=True)
+    print()
+
+    if defer_fts and trigger:
+        conn.execute(trigger[0])
+        conn.execute("INSERT INTO complaint_search(complaint_search) VALUES ('rebuild')")
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Seeded {complaints} synthetic complaints for {len(user_ids)} users in {elapsed:.1f}s")
+    return True
+
+
 if __name__ == "__main__":
-    success = seed_database()
+    parser = argparse.ArgumentParser(description="Seed the database.")
+    parser.add_argument(
+        "--synthetic",
+        metavar="SIZE",
+        help=f"add synthetic data: {', '.join(SYNTHETIC_SIZES)} or a complaint count",
+    )
+    parser.add_argument("--users", type=int, help="synthetic user count (default: complaints / 100)")
+    parser.add_argument("--db", default=str(Path(__file__).parent / "instance" / "complaints.db"))
+    args = parser.parse_args()
+
+    if args.synthetic:
+        count = SYNTHETIC_SIZES.get(args.synthetic) or int(args.synthetic)
+        success = seed_synthetic(args.db, count, args.users)
+    else:
+        success = seed_database()
     if not success:
         exit(1) 
\ No newline at end of file
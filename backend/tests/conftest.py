@@ -0,0 +1,103 @@
+import os
+import time
+import jwt
+import pytest
+from app import create_app
+from app.db import transaction
+
+# Every test that takes `app` runs on SQLite and, when DATABASE_URL points
+# at a Postgres server, on a scratch database created next to it (the
+# database in the URL itself is left alone).
+
+
+@pytest.fixture(scope="session")
+def postgres_url():
+    url = os.environ.get("DATABASE_URL")
+    if not url:
+        pytest.skip("DATABASE_URL is not set")
+    psycopg = pytest.importorskip("psycopg")
+    from psycopg.conninfo import conninfo_to_dict, make_conninfo
+
+    name = f"{conninfo_to_dict(url).get('dbname') or 'civic'}_pytest"
+    with psycopg.connect(url, autocommit=True) as admin:
+        admin.execute(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)')
+        admin.execute(f'CREATE DATABASE "{name}"')
+    yield make_conninfo(url, dbname=name)
+    with psycopg.connect(url, autocommit=True) as admin:
+        admin.execute(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)')
+
+
+def _empty_postgres(db):
+    # the migrations are applied once per session; the rows go between tests
+    tables = [
+        row[0]
+        for row in db.execute(
+            "SELECT tablename FROM pg_tables WHERE schemaname = current_schema() AND tablename <> 'schema_version'"
+        )
+    ]
+    db.execute(f"TRUNCATE {', '.join(tables)} RESTART IDENTITY CASCADE")
+
+
+def _seed(db):
+    db.execute("INSERT INTO roles (name) VALUES ('user'), ('admin')")
+    db.execute("INSERT INTO statuses (name) VALUES ('Pending'), ('In Progress'), ('Resolved'), ('Rejected')")
+    db.execute("INSERT INTO categories (name) VALUES ('Roads'), ('Garbage'), ('Water'), ('Electricity')")
+    db.execute(
+        "INSERT INTO users (name, email, password_hash, role_id) VALUES "
+        "('Admin', 'admin@example.com', '-', 2), ('Citizen', 'citizen@example.com', '-', 1)"
+    )
+
+
+@pytest.fixture
+def make_app(request, tmp_path):
+    """make_app(backend, seed=True): an app on an empty database of that
+    backend, with the reference rows and users 1 (admin) and 2 (citizen)
+    when seeded."""
+    apps = []
+
+    def make(backend, seed=True):
+        config = {"DB_INSTRUMENTATION": False, "TESTING": True}
+        if backend == "postgres":
+            config.update(DB_BACKEND="postgres", DATABASE_URL=request.getfixturevalue("postgres_url"))
+        else:
+            config.update(DB_BACKEND="sqlite", DATABASE=str(tmp_path / f"complaints{len(apps)}.db"))
+        app = create_app(config)
+        apps.append(app)
+        with app.app_context():
+            with transaction() as db:
+                if backend == "postgres":
+                    _empty_postgres(db)
+                if seed:
+                    _seed(db)
+        return app
+
+    yield make
+    for app in apps:
+        pool = app.extensions.get("db_pool")
+        if pool is not None:
+            pool.close_idle()
+
+
+@pytest.fixture(params=["sqlite", "postgres"])
+def app(request, make_app):
+    return make_app(request.param)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def bearer(app, user_id):
+    token = jwt.encode({"user_id": user_id, "exp": time.time() + 3600}, app.config["SECRET_KEY"], algorithm="HS256")
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def admin_headers(app):
+    return bearer(app, 1)
+
+
+@pytest.fixture
+def citizen_headers(app):
+    return bearer(app, 2)
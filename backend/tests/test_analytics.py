@@ -0,0 +1,35 @@
+import time
+import pytest
+from app.utils import analytics
+
+np = pytest.importorskip("numpy")
+
+
+def snapshot(lat, lon):
+    now = int(time.time())
+    columns = {
+        "id": np.arange(1, len(lat) + 1, dtype="int64"),
+        "category_id": np.ones(len(lat), dtype="int16"),
+        "status_id": np.ones(len(lat), dtype="int8"),
+        "created": np.full(len(lat), now, dtype="uint32"),
+        "updated": np.full(len(lat), now, dtype="uint32"),
+        "lat": np.array(lat, dtype="float32"),
+        "lon": np.array(lon, dtype="float32"),
+    }
+    return analytics.Snapshot(columns, 0)
+
+
+def test_heatmap_single_point_cell_is_on_the_point(app):
+    with app.app_context():
+        report = analytics.area_heatmap(snapshot([12.97, 12.97], [77.59, 77.59]))
+    [cell] = report["cells"]
+    assert cell["count"] == 2 and cell["open"] == 2
+    assert cell["lat"] == pytest.approx(12.97, abs=1e-5)
+    assert cell["lon"] == pytest.approx(77.59, abs=1e-5)
+
+
+def test_heatmap_shared_latitude_keeps_longitude_cells(app):
+    with app.app_context():
+        report = analytics.area_heatmap(snapshot([12.97, 12.97], [77.0, 78.0]), grid=4)
+    assert [cell["lat"] for cell in report["cells"]] == pytest.approx([12.97, 12.97], abs=1e-5)
+    assert [cell["col"] for cell in report["cells"]] == [0, 3]
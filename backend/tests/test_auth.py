@@ -0,0 +1,50 @@
+from app.db import transaction
+from app.db.queries import complaints as complaints_queries, users as users_queries
+from conftest import bearer
+
+
+def other_citizen():
+    users_queries.create_user("Other", "other@example.com", "-")
+    return users_queries.get_user_by_email("other@example.com")["id"]
+
+
+def test_citizens_only_read_their_own_complaints(app, client, citizen_headers, admin_headers):
+    with app.app_context():
+        other = other_citizen()
+        theirs = complaints_queries.create_complaint(other, 1, "Pothole on Main Street", "Deep", None, None)
+        mine = complaints_queries.create_complaint(2, 1, "Pothole on Side Street", "Shallow", None, None)
+
+    assert client.get(f"/api/complaints/get/{theirs}", headers=citizen_headers).status_code == 404
+    assert client.get(f"/api/complaints/get/{mine}", headers=citizen_headers).status_code == 200
+    assert client.get(f"/api/complaints/get/{theirs}", headers=admin_headers).status_code == 200
+
+    listing = client.get("/api/complaints/get", headers=citizen_headers).get_json()
+    assert [c["id"] for c in listing["complaints"]] == [mine]
+    found = client.get("/api/complaints/search?query=pothole", headers=citizen_headers).get_json()
+    assert [c["id"] for c in found["complaints"]] == [mine]
+    found = client.get("/api/complaints/search?query=pothole", headers=admin_headers).get_json()
+    assert sorted(c["id"] for c in found["complaints"]) == sorted([theirs, mine])
+
+
+def test_role_changes_reach_the_principal_cache(app, client, citizen_headers):
+    assert client.get("/api/metrics", headers=citizen_headers).status_code == 403
+    with app.app_context():
+        users_queries.set_user_role(2, "admin")
+    assert client.get("/api/metrics", headers=citizen_headers).status_code == 200
+
+
+def test_principal_is_cached_until_invalidated(app):
+    with app.app_context():
+        assert users_queries.get_principal(2)["role"] == "user"
+        # a change that bypasses set_user_role (another process) is seen
+        # once the entry expires or is invalidated
+        with transaction() as db:
+            db.execute("UPDATE users SET role_id = (SELECT id FROM roles WHERE name = 'admin') WHERE id = 2")
+        assert users_queries.get_principal(2)["role"] == "user"
+        users_queries.invalidate_principal(2)
+        assert users_queries.get_principal(2)["role"] == "admin"
+        assert users_queries.get_principal(999) is None
+
+
+def test_unknown_user_token_is_rejected(app, client):
+    assert client.get("/api/auth/profile", headers=bearer(app, 999)).status_code == 401
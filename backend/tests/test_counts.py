@@ -0,0 +1,76 @@
+from app.db import get_db
+from app.db.queries import (
+    archive as archive_queries,
+    complaints as complaints_queries,
+    duplicates as duplicates_queries,
+)
+from app.db.queries.other import get_status_id
+from app.utils import importer
+
+
+def counted():
+    """(user_id, status_id) -> count from COUNT(*), user 0 being everyone."""
+    rows = get_db().execute("SELECT user_id, status_id, COUNT(*) FROM complaints GROUP BY user_id, status_id").fetchall()
+    counts = {}
+    for user_id, status_id, count in rows:
+        for key in ((user_id, status_id), (0, status_id)):
+            counts[key] = counts.get(key, 0) + count
+    return counts
+
+
+def counters():
+    rows = get_db().execute("SELECT user_id, status_id, count FROM complaint_user_status_counts").fetchall()
+    return {(user_id, status_id): count for user_id, status_id, count in rows if count}
+
+
+def assert_counters_match():
+    assert counters() == counted()
+    for user_id in (None, 1, 2):
+        by_status = {status: count for status, count in complaints_queries.status_counts(user_id).items() if count}
+        expected = {}
+        for (owner, status_id), count in counted().items():
+            if owner == (user_id or 0):
+                expected[status_id] = count
+        assert {get_status_id(status): count for status, count in by_status.items()} == expected
+
+
+def test_counters_follow_every_write_path(app):
+    with app.app_context():
+        a = complaints_queries.create_complaint(2, 1, "Pothole", "Deep", None, None)
+        b = complaints_queries.create_complaint(2, 2, "Garbage", "Heap", None, None)
+        c = complaints_queries.create_complaint(1, 3, "Leak", "Water", None, None)
+        assert_counters_match()
+
+        complaints_queries.update_complaint(a, "In Progress", 1)
+        assert_counters_match()
+
+        complaints_queries.update_statuses([a, b, c], "Resolved", 1, from_status="Pending")
+        assert_counters_match()
+
+        d = complaints_queries.create_complaint(2, 1, "Pothole again", "Deep", None, None)
+        duplicates_queries.merge_duplicates({a: [d]}, changed_by=1)
+        complaints_queries.update_complaint(a, "Rejected", 1)
+        assert_counters_match()
+
+        records = [{"title": f"Imported {i}", "description": "Bulk", "category": "Water"} for i in range(5)]
+        assert importer.import_complaints(records, 2).inserted == 5
+        assert_counters_match()
+
+        moved, _ = archive_queries.archive_batch(get_status_id("Resolved"), "9999-12-31 00:00:00")
+        assert moved == 2
+        assert_counters_match()
+
+
+def test_listing_totals_match_count(app, client, citizen_headers, admin_headers):
+    with app.app_context():
+        for i in range(3):
+            complaints_queries.create_complaint(2, 1, f"Pothole {i}", "Deep", None, None)
+        complaints_queries.create_complaint(1, 2, "Garbage", "Heap", None, None)
+        complaints_queries.update_complaint(1, "Resolved", 1)
+
+    for headers, expected in ((citizen_headers, {"Pending": 2, "Resolved": 1}), (admin_headers, {"Pending": 3, "Resolved": 1})):
+        body = client.get("/api/complaints/get?per_page=1", headers=headers).get_json()
+        assert body["total"] == sum(expected.values()) and body["total_is_exact"]
+        assert {status: n for status, n in body["status_counts"].items() if n} == expected
+        body = client.get("/api/complaints/get?per_page=1&status=Pending", headers=headers).get_json()
+        assert body["total"] == expected["Pending"]
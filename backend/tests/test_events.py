@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.db import get_db, transaction
+from app.db.queries import events as events_queries
+
+
+def add_events(ages_in_days):
+    now = datetime.now(timezone.utc)
+    with transaction() as db:
+        for days in ages_in_days:
+            db.execute(
+                "INSERT INTO complaint_events (complaint_id, user_id, status_id, created_at) VALUES (1, 2, 1, ?)",
+                ((now - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S"),),
+            )
+
+
+def remaining():
+    return [row[0] for row in get_db().execute("SELECT id FROM complaint_events ORDER BY id")]
+
+
+def test_prune_keeps_recent_events(app):
+    with app.app_context():
+        add_events([10, 9, 1, 0])
+        assert events_queries.prune_events(7) == 2
+        assert remaining() == [3, 4]
+
+
+def test_prune_when_every_event_is_stale(app):
+    with app.app_context():
+        add_events([10, 9, 8])
+        assert events_queries.prune_events(7) == 3
+        assert remaining() == []
+        assert events_queries.get_event_id_range() == (0, 0)
+        # ids carry on from where they were, so clients' Last-Event-IDs stay ordered
+        add_events([0])
+        assert remaining() == [4]
+
+
+def test_prune_empty_log(app):
+    with app.app_context():
+        assert events_queries.prune_events(7) == 0
+
+
+@pytest.mark.parametrize("value", ["²", "١٢", "-1", "1.5", "abc", "9" * 19])
+def test_stream_rejects_bad_last_event_ids(client, citizen_headers, value):
+    response = client.get("/api/complaints/events", headers={**citizen_headers, "Last-Event-ID": value})
+    assert response.status_code == 400
+    response = client.get("/api/complaints/events", query_string={"last_event_id": value}, headers=citizen_headers)
+    assert response.status_code == 400
@@ -0,0 +1,75 @@
+import pytest
+from app.db.queries import complaints as complaints_queries, geo as geo_queries
+from app.utils.geo import bboxes_around, parse_location
+
+ADMIN = {"user_id": 1, "role": "admin"}
+
+
+def add(lat, lon, user_id=1, category_id=1):
+    return complaints_queries.create_complaint(user_id, category_id, "Pothole", "Deep", None, f"{lat:.4f}, {lon:.4f}")
+
+
+def test_bboxes_split_at_the_antimeridian():
+    east, west = bboxes_around(0.0, 179.99, 10_000)
+    assert east[1] < 179.99 and east[3] == 180.0
+    assert west[1] == -180.0 and -180.0 < west[3] < -179.9
+    assert len(bboxes_around(0.0, 0.0, 10_000)) == 1
+
+
+def test_bboxes_take_every_longitude_around_a_pole():
+    assert bboxes_around(89.99, 10.0, 5_000) == [(pytest.approx(89.945, abs=1e-3), -180.0, 90.0, 180.0)]
+
+
+def test_bboxes_contain_the_circle_at_high_latitudes():
+    # 2000 km at 60N reaches about 43 degrees of longitude, more than the
+    # radius over cos(lat)
+    ((_, min_lon, _, max_lon),) = bboxes_around(60.0, 0.0, 2_000_000)
+    assert max_lon > 36 and min_lon < -36
+
+
+def test_nearest_across_the_antimeridian(app):
+    with app.app_context():
+        east, west = add(0.0, 179.99), add(0.0, -179.99)
+        add(0.0, 170.0)
+        rows = geo_queries.nearest_complaints(0.0, 179.995, 2, **ADMIN)
+        assert {row["id"] for row in rows} == {east, west}
+        rows = geo_queries.complaints_within_radius(0.0, -179.995, 5_000, **ADMIN)
+        assert [row["id"] for row in rows] == [west, east]
+
+
+def test_nearest_with_fewer_matches_than_k(app):
+    with app.app_context():
+        mine = [add(10.0, 20.0, user_id=2), add(-40.0, 150.0, user_id=2)]
+        add(10.0, 20.001)
+        rows = geo_queries.nearest_complaints(10.0, 20.0, 10, user_id=2, role="user")
+        assert [row["id"] for row in rows] == mine
+        assert geo_queries.nearest_complaints(10.0, 20.0, 10, category_id=3, **ADMIN) == []
+
+
+def test_nearest_falls_back_to_a_scan_for_far_complaints(app):
+    with app.app_context():
+        near, far = add(10.0, 20.0), add(-10.0, -160.0)
+        rows = geo_queries.nearest_complaints(10.0, 20.0, 5, **ADMIN)
+        assert [row["id"] for row in rows] == [near, far]
+        assert rows[1]["distance_m"] > geo_queries.FULL_SCAN_RADIUS_M
+
+
+@pytest.mark.parametrize("location", [5, 1.5, ["12.97, 77.59"], {"lat": 12.97}])
+def test_parse_location_ignores_non_text(location):
+    assert parse_location(location) == (None, None)
+
+
+@pytest.mark.parametrize("location", [5, ["12.97, 77.59"]])
+def test_create_rejects_non_text_locations(client, citizen_headers, location):
+    body = {"category_id": 1, "title": "Pothole", "description": "Deep", "location": location}
+    response = client.post("/api/complaints/create", json=body, headers=citizen_headers)
+    assert response.status_code == 400
+
+
+def test_create_stores_coordinates(app, client, citizen_headers):
+    body = {"category_id": 1, "title": "Pothole", "description": "Deep", "location": "12.9716, 77.5946"}
+    response = client.post("/api/complaints/create", json=body, headers=citizen_headers)
+    assert response.status_code == 201
+    with app.app_context():
+        rows = geo_queries.nearest_complaints(12.9716, 77.5946, 1, **ADMIN)
+    assert [row["id"] for row in rows] == [response.get_json()["complaint_id"]]
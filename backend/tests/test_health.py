@@ -0,0 +1,31 @@
+import pytest
+
+
+def test_anonymous_health_is_status_only(client):
+    response = client.get("/api/health")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["status"] == "healthy"
+    assert "db_pool" not in body and "db_replicas" not in body
+
+
+@pytest.mark.parametrize("header", ["Bearer", "Bearer guess", "Basic"])
+def test_health_ignores_bad_credentials(client, header):
+    response = client.get("/api/health", headers={"Authorization": header})
+    assert response.status_code == 200
+    assert "db_pool" not in response.get_json()
+
+
+def test_citizen_health_is_status_only(client, citizen_headers):
+    assert "db_pool" not in client.get("/api/health", headers=citizen_headers).get_json()
+
+
+def test_admin_health_has_pool_and_replicas(client, admin_headers):
+    body = client.get("/api/health", headers=admin_headers).get_json()
+    assert body["db_pool"]["size"] > 0 and body["db_replicas"] == []
+
+
+def test_scraper_health_has_pool(app, client):
+    app.config["METRICS_TOKEN"] = "scrape-secret"
+    body = client.get("/api/health", headers={"Authorization": "Bearer scrape-secret"}).get_json()
+    assert "db_pool" in body
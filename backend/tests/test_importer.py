@@ -0,0 +1,64 @@
+import io
+import json
+import pytest
+from app.db import get_db
+from app.utils import importer
+
+
+def ndjson(*records):
+    return "\n".join(json.dumps(record) for record in records).encode() + b"\n"
+
+
+def test_parse_record_converts_offsets_to_utc(app):
+    with app.app_context():
+        row = importer.parse_record(
+            {"title": "Pothole", "description": "Deep", "category": "Roads", "created_at": "2024-05-01T10:00:00+02:00"},
+            1,
+        )
+    assert row[7] == "2024-05-01 08:00:00"
+
+
+@pytest.mark.parametrize("record, error", [
+    ({"title": 1, "description": "Deep", "category": "Roads"}, "title must be a string"),
+    ({"title": "Pothole", "description": ["Deep"], "category": "Roads"}, "description must be a string"),
+    ({"title": "Pothole", "description": "Deep", "category": ["Roads"]}, "category must be a string"),
+    ({"title": "Pothole", "description": "Deep", "category": "Roads", "status": {}}, "status must be a string"),
+    ({"title": "Pothole", "description": "Deep", "category": "Roads", "created_at": 1714550400}, "created_at must be a string"),
+])
+def test_parse_record_rejects_non_strings(app, record, error):
+    with app.app_context(), pytest.raises(ValueError, match=error):
+        importer.parse_record(record, 1)
+
+
+def test_bulk_reports_bad_types_per_row(app, client, admin_headers):
+    body = ndjson(
+        {"title": "Pothole", "description": "Deep", "category": "Roads"},
+        {"title": "Pothole", "description": "Deep", "category": {"name": "Roads"}},
+    )
+    response = client.post("/api/complaints/bulk", data=body, headers=admin_headers)
+    assert response.status_code == 200
+    report = response.get_json()["report"]
+    assert (report["inserted"], report["failed"]) == (1, 1)
+    assert report["errors"] == [{"row": 2, "error": "category must be a string"}]
+
+
+def test_bulk_rejects_invalid_utf8(app, client, admin_headers):
+    body = ndjson({"title": "Pothole", "description": "Deep", "category": "Roads"}) + b'{"title": "\xff"}\n'
+    response = client.post("/api/complaints/bulk", data=body, headers=admin_headers)
+    assert response.status_code == 400
+    assert response.get_json()["report"]["stopped"] == "Input is not valid UTF-8"
+
+
+def test_import_stops_on_invalid_utf8(app):
+    body = ndjson({"title": "Pothole", "description": "Deep", "category": "Roads"}) * 3 + b"\xff\n"
+    with app.app_context():
+        report = importer.import_complaints(importer.iter_records(importer.decode_lines(io.BytesIO(body)), "ndjson"), 1)
+        assert report.stopped and report.inserted == 3
+        assert get_db().execute("SELECT COUNT(*) FROM complaints").fetchone()[0] == 3
+
+
+def test_csv_quoted_newlines(app):
+    body = 'title,description,category\r\nPothole,"Deep\r\nand wide",Roads\r\n'.encode()
+    with app.app_context():
+        records = list(importer.iter_records(importer.decode_lines(io.BytesIO(body)), "csv"))
+    assert records == [{"title": "Pothole", "description": "Deep\r\nand wide", "category": "Roads"}]
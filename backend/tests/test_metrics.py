@@ -0,0 +1,19 @@
+import pytest
+
+
+def test_metrics_closed_by_default(client, citizen_headers):
+    assert client.get("/api/metrics").status_code == 401
+    assert client.get("/api/metrics", headers=citizen_headers).status_code == 403
+    assert client.get("/api/metrics", headers={"Authorization": "Bearer guess"}).status_code == 401
+
+
+def test_metrics_for_admins(client, admin_headers):
+    response = client.get("/api/metrics", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain")
+
+
+@pytest.mark.parametrize("header, status", [("Bearer scrape-secret", 200), ("Bearer scrape-secre", 401)])
+def test_metrics_token(app, client, header, status):
+    app.config["METRICS_TOKEN"] = "scrape-secret"
+    assert client.get("/api/metrics", headers={"Authorization": header}).status_code == status
@@ -0,0 +1,58 @@
+import base64
+import json
+import pytest
+from app.utils.pagination import LISTING_KEY, SEARCH_KEY, decode_cursor, encode_cursor
+
+
+def raw_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).rstrip(b"=").decode()
+
+
+def test_round_trip():
+    assert decode_cursor(encode_cursor("2024-05-01 10:00:00", 7), LISTING_KEY) == ["2024-05-01 10:00:00", 7]
+    assert decode_cursor(encode_cursor(-1.5, 7), SEARCH_KEY) == [-1.5, 7]
+    assert decode_cursor(encode_cursor(0, 7), SEARCH_KEY) == [0, 7]
+
+
+@pytest.mark.parametrize("values, types", [
+    ([{}, 1], LISTING_KEY),
+    (["2024-05-01", "1"], LISTING_KEY),
+    (["2024-05-01", 1.5], LISTING_KEY),
+    (["2024-05-01", True], LISTING_KEY),
+    (["2024-05-01", 1, 2], LISTING_KEY),
+    (["-1.5", 1], SEARCH_KEY),
+    ([None, 1], SEARCH_KEY),
+    ({"a": 1}, SEARCH_KEY),
+    (["2024-01-01", 2**63], LISTING_KEY),
+    (["2024-01-01", -2**63 - 1], LISTING_KEY),
+    ([10**30, 1], SEARCH_KEY),
+    ([-1.5, 2**63], SEARCH_KEY),
+    ([float("inf"), 1], SEARCH_KEY),
+    ([float("nan"), 1], SEARCH_KEY),
+])
+def test_rejects_bad_values(values, types):
+    with pytest.raises(ValueError):
+        decode_cursor(raw_cursor(values), types)
+
+
+def test_rejects_garbage():
+    with pytest.raises(ValueError):
+        decode_cursor("not a cursor!", LISTING_KEY)
+
+
+def test_accepts_the_64_bit_range():
+    assert decode_cursor(raw_cursor(["2024-01-01", 2**63 - 1]), LISTING_KEY) == ["2024-01-01", 2**63 - 1]
+    assert decode_cursor(raw_cursor([1e300, -2**63]), SEARCH_KEY) == [1e300, -2**63]
+
+
+@pytest.mark.parametrize("path, values", [
+    ("/api/complaints/get", [{}, 1]),
+    ("/api/complaints/get", ["2024-01-01", 10**30]),
+    ("/api/complaints/search?query=road", [{}, 1]),
+    ("/api/complaints/search?query=road", [10**30, 1]),
+    ("/api/complaints/search?query=road", [1.0, 10**30]),
+])
+def test_routes_answer_400(client, citizen_headers, path, values):
+    separator = "&" if "?" in path else "?"
+    response = client.get(f"{path}{separator}cursor={raw_cursor(values)}", headers=citizen_headers)
+    assert response.status_code == 400
@@ -0,0 +1,31 @@
+from app.db import get_db
+from app.db.postgres import copy_from_sqlite
+from app.db.queries import complaints as complaints_queries, geo as geo_queries
+
+TABLES = ("users", "complaints", "complaint_status_history", "complaint_user_status_counts", "complaint_minhash")
+
+
+def counts():
+    db = get_db()
+    return {table: db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in TABLES}
+
+
+def test_copy_from_sqlite(make_app, postgres_url):
+    source = make_app("sqlite")
+    with source.app_context():
+        pothole = complaints_queries.create_complaint(2, 1, "Pothole on Main Street", "Deep", None, "12.9716, 77.5946")
+        complaints_queries.create_complaint(2, 2, "Garbage heap", "Smells", None, None)
+        complaints_queries.update_complaint(pothole, "Resolved", 1)
+        expected = counts()
+    target = make_app("postgres", seed=False)
+
+    copied = copy_from_sqlite(source.config["DATABASE"], postgres_url)
+
+    assert copied["complaints"] == 2
+    with target.app_context():
+        assert counts() == expected
+        rows, _ = complaints_queries.search_complaints("pothole", 1, "admin")
+        assert len(rows) == 1
+        assert [row["id"] for row in geo_queries.nearest_complaints(12.97, 77.59, 1, user_id=1, role="admin")] == [pothole]
+        # the id sequences carry on after the copied rows
+        assert complaints_queries.create_complaint(2, 3, "Leak", "Water everywhere", None, None) == 3
@@ -0,0 +1,25 @@
+import pytest
+from app.db.queries import complaints as complaints_queries
+
+
+@pytest.fixture
+def complaints(app):
+    with app.app_context():
+        complaints_queries.create_complaint(2, 1, "Pothole on Main Street", "Deep", None, None)
+
+
+@pytest.mark.parametrize("params", ["from=yesterday", "to=2024-13-01", "from=2024-01-01&to=01/02/2024"])
+def test_search_rejects_bad_dates(client, citizen_headers, complaints, params):
+    response = client.get(f"/api/complaints/search?query=pothole&{params}", headers=citizen_headers)
+    assert response.status_code == 400
+
+
+def test_search_date_range(client, citizen_headers, complaints):
+    def search(params):
+        response = client.get(f"/api/complaints/search?query=pothole&{params}", headers=citizen_headers)
+        assert response.status_code == 200
+        return response.get_json()["complaints"]
+
+    assert len(search("from=2000-01-01&to=2999-12-31")) == 1
+    assert len(search("from=2999-01-01")) == 0
+    assert len(search("to=2000-01-01T00:00:00")) == 0
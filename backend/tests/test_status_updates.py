@@ -0,0 +1,91 @@
+import json
+import pytest
+from app.db import get_db, transaction
+from app.db.queries import complaints as complaints_queries, duplicates as duplicates_queries, history as history_queries
+
+
+def add(title="Pothole"):
+    return complaints_queries.create_complaint(2, 1, title, "Deep", None, None)
+
+
+def status(complaint_id):
+    return complaints_queries._get_complaint(complaint_id)["status"]
+
+
+def transitions(complaint_id):
+    return [
+        (row["from_status"], row["to_status"], row["changed_by"]) for row in history_queries.get_status_history(complaint_id)
+    ]
+
+
+def test_update_statuses_with_from_status(app):
+    with app.app_context():
+        a, b, c = add(), add(), add()
+        complaints_queries.update_complaint(c, "Resolved", 1)
+
+        result = complaints_queries.update_statuses([a, b, c, a, 999], "In Progress", changed_by=1, from_status="Pending")
+
+        assert result == {"updated": [a, b], "unchanged": [c], "missing": [999], "rows": 2}
+        assert [status(a), status(b), status(c)] == ["In Progress", "In Progress", "Resolved"]
+        assert transitions(a) == [("Pending", "In Progress", 1)]
+        assert transitions(c) == [("Pending", "Resolved", 1)]
+
+
+def test_update_to_the_current_status_records_nothing(app):
+    with app.app_context():
+        a = add()
+        result = complaints_queries.update_statuses([a], "Pending", changed_by=1)
+        assert result == {"updated": [], "unchanged": [a], "missing": [], "rows": 0}
+        assert transitions(a) == []
+
+
+def test_merged_duplicates_follow_with_history(app):
+    with app.app_context():
+        target, duplicate = add(), add()
+        duplicates_queries.merge_duplicates({target: [duplicate]}, changed_by=1)
+        complaints_queries.update_complaint(target, "Resolved", 1)
+        assert status(duplicate) == "Resolved"
+        assert transitions(duplicate) == [("Pending", "Resolved", 1)]
+
+
+def test_history_is_append_only(app):
+    with app.app_context():
+        a = add()
+        complaints_queries.update_complaint(a, "Resolved", 1)
+        for sql in ("UPDATE complaint_status_history SET changed_by = 2", "DELETE FROM complaint_status_history"):
+            with pytest.raises(Exception, match="append-only"), transaction() as db:
+                db.execute(sql)
+        assert get_db().execute("SELECT COUNT(*) FROM complaint_status_history").fetchone()[0] == 1
+
+
+def test_bulk_update_route(app, client, admin_headers):
+    with app.app_context():
+        a, b = add(), add()
+    body = {"ids": [a, b, 999], "status": "Resolved", "from_status": "Pending"}
+    response = client.put("/api/complaints/update", json=body, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.get_json()["updated"] == [a, b]
+    history = client.get(f"/api/complaints/history/{a}", headers=admin_headers).get_json()["history"]
+    assert [(h["from_status"], h["to_status"]) for h in history] == [("Pending", "Resolved")]
+
+
+@pytest.mark.parametrize("body", [
+    {"ids": [1], "status": "Closed"},
+    {"ids": [1], "status": "Resolved", "from_status": "Open"},
+    {"ids": [], "status": "Resolved"},
+    {"ids": ["1"], "status": "Resolved"},
+    {"ids": [True], "status": "Resolved"},
+    {"ids": [10**30], "status": "Resolved"},
+    {"ids": [0], "status": "Resolved"},
+])
+def test_bulk_update_rejects_bad_bodies(client, admin_headers, body):
+    # encoded here: the app's JSON provider refuses integers past 64 bits
+    response = client.put(
+        "/api/complaints/update", data=json.dumps(body), content_type="application/json", headers=admin_headers
+    )
+    assert response.status_code == 400
+
+
+def test_bulk_update_is_admin_only(client, citizen_headers):
+    body = {"ids": [1], "status": "Resolved"}
+    assert client.put("/api/complaints/update", json=body, headers=citizen_headers).status_code == 403
@@ -9,6 +9,8 @@ import type {
     SearchComplaintsParams,
     UpdateComplaintResponse,
     UpdateComplaintRequest,
+    UploadImageResponse,
+    ComplaintEvent,
 } from '@/types/api';
 
 
@@ -20,11 +22,28 @@ export const createComplaint = async (data: CreateComplaintRequest): Promise<Cre
     });
 };
 
+// Upload a photo as multipart form data; pass the returned id as image_id
+// to createComplaint (not via fetcher, which sends JSON)
+export const uploadImage = async (file: File): Promise<UploadImageResponse> => {
+    const token = localStorage.getItem('access_token');
+    const body = new FormData();
+    body.append('image', file);
+    const res = await fetch(`/api/images/upload`, {
+        method: 'POST',
+        headers: { Authorization: token ? `Bearer ${token}` : '' },
+        body,
+    });
+    if (!res.ok) {
+        throw new Error('Network error');
+    }
+    return res.json();
+};
+
 // Get complaints for the current user
 export const getComplaints = async (params: GetComplaintsParams = {}): Promise<GetComplaintsResponse> => {
     const searchParams = new URLSearchParams();
     
-    if (params.page) searchParams.append('page', params.page.toString());
+    if (params.cursor) searchParams.append('cursor', params.cursor);
     if (params.per_page) searchParams.append('per_page', params.per_page.toString());
     if (params.status) searchParams.append('status', params.status);
     
@@ -43,6 +62,9 @@ export const getComplaint = async (complaintId: number): Promise<GetComplaintRes
 export const searchComplaints = async (params: SearchComplaintsParams): Promise<SearchComplaintsResponse> => {
     const searchParams = new URLSearchParams();
     searchParams.append('query', params.query);
+    if (params.limit) searchParams.append('limit', params.limit.toString());
+    if (params.cursor) searchParams.append('cursor', params.cursor);
+    if (params.status) searchParams.append('status', params.status);
     
     return fetcher<SearchComplaintsResponse>(`/api/complaints/search?${searchParams.toString()}`);
 }; 
@@ -54,3 +76,21 @@ export const updateComplaint = async (complaintId: number, data: UpdateComplaint
         body: JSON.stringify(data),
     });
 };
+
+// Follow complaints being created or changing status (the user's own, or all
+// for admins) instead of re-polling getComplaints. The browser reconnects by
+// itself and resumes where it left off; onReset means events were missed and
+// listings should be reloaded. Call close() on the result to stop.
+export const subscribeComplaintEvents = (
+    onEvent: (event: ComplaintEvent, type: 'created' | 'status') => void,
+    onReset?: () => void,
+): EventSource => {
+    // EventSource cannot send an Authorization header
+    const token = localStorage.getItem('access_token') ?? '';
+    const source = new EventSource(`/api/complaints/events?access_token=${encodeURIComponent(token)}`);
+    for (const type of ['created', 'status'] as const) {
+        source.addEventListener(type, (e) => onEvent(JSON.parse((e as MessageEvent).data), type));
+    }
+    source.addEventListener('reset', () => onReset?.());
+    return source;
+};
@@ -220,7 +220,9 @@ export default function AdminPanel() {
                                                     </Badge>
                                                 </div>
                                                 <p className="text-sm text-muted-foreground line-clamp-1">
-                                                    {complaint.description}
+                                                    {'snippet' in complaint
+                                                        ? complaint.snippet.replace(/<\/?mark>/g, '')
+                                                        : complaint.excerpt}
                                                 </p>
                                                 <div className="flex items-center gap-4 text-xs text-muted-foreground">
                                                     <span className="flex items-center gap-1">
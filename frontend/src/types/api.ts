@@ -67,6 +67,7 @@ export interface Stats {
     total_reports: number;
     pending_reports: number;
     resolved_reports: number;
+    by_status: Record<string, number>;
 }
 
 export interface GetStatsResponse {
@@ -80,9 +81,32 @@ export interface CreateComplaintRequest {
     title: string;
     description: string;
     image_url?: string;
+    image_id?: string; // from POST /api/images/upload
     location?: string;
 }
 
+export interface UploadedImage {
+    id: string;
+    content_type: string;
+    bytes: number;
+    duplicate: boolean;
+    url: string;
+    thumbnail_url: string;
+    medium_url: string;
+}
+
+export interface UploadImageResponse {
+    image: UploadedImage;
+}
+
+// data of the "created" and "status" events of GET /api/complaints/events
+export interface ComplaintEvent {
+    complaint_id: number;
+    status: string;
+    from_status: string | null; // null for "created"
+    created_at: string;
+}
+
 export interface CreateComplaintResponse {
     message: string;
     complaint_id: number;
@@ -103,20 +127,42 @@ export interface Complaint {
     updated_at: string;
 }
 
+// list rows (GET /api/complaints/get): a short excerpt instead of the description
+export interface ComplaintSummary {
+    id: number;
+    user_id: number;
+    user_name: string | null;
+    category_id: number;
+    category_name: string | null;
+    status: string;
+    title: string;
+    excerpt: string;
+    thumbnail_url: string | null; // uploaded photos only
+    created_at: string;
+}
+
 export interface SearchComplaint {
     id: number;
     user_id: number;
     category_id: number;
     category_name: string;
     title: string;
-    description: string;
+    title_highlight: string;
+    snippet: string;
+    rank: number;
     user_name: string;  
     status: string;
+    thumbnail_url: string | null;
     created_at: string;
 }
 
 export interface GetComplaintsResponse {
-    complaints: Complaint[];
+    complaints: ComplaintSummary[];
+    next_cursor: string | null;
+    // complaints matching the listing (status filter included), and per status
+    total: number;
+    total_is_exact: boolean;
+    status_counts: Record<string, number>;
 }
 
 export interface GetComplaintResponse {
@@ -125,16 +171,20 @@ export interface GetComplaintResponse {
 
 export interface SearchComplaintsResponse {
     complaints: SearchComplaint[];
+    next_cursor: string | null;
 }
 
 export interface GetComplaintsParams {
-    page?: number;
+    cursor?: string;
     per_page?: number;
     status?: string;
 }
 
 export interface SearchComplaintsParams {
     query: string;
+    limit?: number;
+    cursor?: string;
+    status?: string;
 }
 
 